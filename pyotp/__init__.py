@@ -1 +1,6 @@
-# TODO FIXME add stuff here
+# Copyright (C) 2018 Elizabeth Myers. All rights reserved.
+# See the included LICENSE file for terms of distribution.
+
+"""Utilities for using HOTP and TOTP."""
+
+from pyotp.key import OTPKey
@@ -0,0 +1,263 @@
+# Copyright (C) 2018 Elizabeth Myers. All rights reserved.
+# See the included LICENSE file for terms of distribution.
+
+"""Generate and check OTP codes from the command line.
+
+The batch command reads one verification request per line from stdin, and
+writes one result line per request to stdout, in the same order.
+
+JSON requests are objects with these keys (only code and secret are
+required):
+
+    {"id": 1, "type": "totp", "code": "123456", "secret": "BASE32SECRET",
+     "timestamp": 1234567890, "counter": 0, "algorithm": "sha1",
+     "period": 30, "below": 30, "above": 30}
+
+and results are {"id": 1, "ok": true, "offset": 0}, or {"id": 1, "error":
+"..."} if the request was malformed. For HOTP, counter is required.
+
+TSV requests are type, code, secret, and optionally the timestamp (TOTP) or
+counter (HOTP), separated by tabs. Results are "ok", a tab, and the matched
+offset; "fail"; or "error", a tab, and a message.
+"""
+
+import json
+import os
+import sys
+
+from argparse import ArgumentParser
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import islice
+
+from pyotp.constants import HashAlgorithm, OTPType
+from pyotp.hotp import get_hotp_code, match_hotp
+from pyotp.secret import decode_secret
+from pyotp.totp import get_totp_code, match_totp
+
+
+_algorithms = {algorithm.value: algorithm for algorithm in HashAlgorithm}
+
+
+def _match(otp_type, code, secret, value=None, **options):
+    # Check one request, returning the matched offset or None
+    secret = decode_secret(secret)
+    if otp_type is OTPType.HOTP:
+        if value is None:
+            raise ValueError("counter is required for HOTP")
+        return match_hotp(code, secret, value, **options)
+    else:
+        return match_totp(code, secret, value, **options)
+
+
+def _int_field(request, name, minimum):
+    # An integer field of a JSON request, no less than minimum
+    value = request[name]
+    if not isinstance(value, int) or isinstance(value, bool):
+        raise TypeError("{} must be an integer".format(name))
+    if value < minimum:
+        raise ValueError("{} must be at least {}".format(name, minimum))
+
+    return value
+
+
+def _handle_json(line):
+    request_id = None
+    try:
+        request = json.loads(line)
+        if not isinstance(request, dict):
+            raise ValueError("request is not an object")
+
+        request_id = request.get("id")
+        otp_type = OTPType(request.get("type", "totp"))
+        value = request.get("counter" if otp_type is OTPType.HOTP
+                            else "timestamp")
+
+        options = {}
+        if "algorithm" in request:
+            options["hash_algorithm"] = _algorithms[request["algorithm"]]
+        if "period" in request and otp_type is OTPType.TOTP:
+            options["grace_period"] = _int_field(request, "period", 1)
+        for name in ("below", "above"):
+            if name in request:
+                options[name] = _int_field(request, name, 0)
+
+        code, secret = request["code"], request["secret"]
+        if not isinstance(code, str) or not isinstance(secret, str):
+            raise TypeError("code and secret must be strings")
+
+        offset = _match(otp_type, code, secret, value, **options)
+    except (ValueError, KeyError, TypeError) as e:
+        ret = {"id": request_id, "error": "{}: {}".format(
+            type(e).__name__, e)}
+    else:
+        ret = {"id": request_id, "ok": offset is not None, "offset": offset}
+
+    return json.dumps(ret)
+
+
+def _handle_tsv(line):
+    try:
+        fields = line.rstrip("\r\n").split("\t")
+        if not 3 <= len(fields) <= 4:
+            raise ValueError("expected 3 or 4 fields")
+
+        otp_type = OTPType(fields[0].lower())
+        value = int(fields[3]) if len(fields) > 3 and fields[3] else None
+        offset = _match(otp_type, fields[1], fields[2], value)
+    except (ValueError, KeyError, TypeError) as e:
+        return "error\t{}: {}".format(type(e).__name__, e)
+
+    if offset is None:
+        return "fail"
+
+    return "ok\t{}".format(offset)
+
+
+_handlers = {
+    "jsonl": _handle_json,
+    "tsv": _handle_tsv,
+}
+
+
+def _handle_chunk(fmt, lines):
+    # Handle a chunk of request lines, returning the output for all of them
+    handle = _handlers[fmt]
+    out = [handle(line.decode("utf-8", "replace")) for line in lines]
+    out.append("")
+    return "\n".join(out).encode("utf-8")
+
+
+def run_batch(infile, outfile, fmt="jsonl", workers=1, chunk_size=1024):
+    """Verify requests read from binary infile, writing results to outfile.
+
+    Lines are handled chunk_size at a time. With more than one worker, chunks
+    are spread over a pool of worker processes; at most two chunks per worker
+    are in flight at once, and results are written in input order.
+    """
+    handle = partial(_handle_chunk, fmt)
+    chunks = iter(lambda: list(islice(infile, chunk_size)), [])
+
+    if workers <= 1:
+        for chunk in chunks:
+            outfile.write(handle(chunk))
+        outfile.flush()
+        return
+
+    with ProcessPoolExecutor(workers) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(handle, chunk))
+            if len(pending) >= workers * 2:
+                outfile.write(pending.popleft().result())
+
+        while pending:
+            outfile.write(pending.popleft().result())
+
+    outfile.flush()
+
+
+def _add_otp_options(parser):
+    parser.add_argument("secret", help="base32-encoded secret")
+    parser.add_argument("--hotp", metavar="COUNTER", type=int,
+                        help="use HOTP with this counter (default: TOTP)")
+    parser.add_argument("-t", "--time", type=int,
+                        help="Unix time for TOTP (default: now)")
+    parser.add_argument("-d", "--digits", type=int, default=6,
+                        help="code length (default: 6)")
+    parser.add_argument("-p", "--period", type=int, default=30,
+                        help="TOTP period in seconds (default: 30)")
+    parser.add_argument("-a", "--algorithm", choices=sorted(_algorithms),
+                        default="sha1", help="hash algorithm (default: sha1)")
+
+
+def main(argv=None):
+    parser = ArgumentParser(prog="python -m pyotp",
+                            description="Generate and check OTP codes.")
+    commands = parser.add_subparsers(dest="command", metavar="command")
+    commands.required = True
+
+    gen = commands.add_parser("gen", help="print the current code")
+    _add_otp_options(gen)
+
+    check = commands.add_parser("check", help="check a code; exits with 1 "
+                                "if it doesn't match")
+    check.add_argument("code")
+    _add_otp_options(check)
+    check.add_argument("--below", type=int,
+                       help="seconds (TOTP) or counters (HOTP) below to check")
+    check.add_argument("--above", type=int,
+                       help="seconds (TOTP) or counters (HOTP) above to check")
+
+    batch = commands.add_parser("batch", help="check requests from stdin",
+                                description=__doc__)
+    batch.add_argument("-f", "--format", choices=sorted(_handlers),
+                       default="jsonl", help="request and result format "
+                       "(default: jsonl)")
+    batch.add_argument("-w", "--workers", type=int, default=os.cpu_count(),
+                       help="worker processes (default: one per CPU)")
+    batch.add_argument("-c", "--chunk-size", type=int, default=1024,
+                       help="requests per chunk handed to a worker "
+                       "(default: 1024)")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "batch":
+        run_batch(sys.stdin.buffer, sys.stdout.buffer, args.format,
+                  args.workers or 1, args.chunk_size)
+        return 0
+
+    try:
+        secret = decode_secret(args.secret)
+    except ValueError as e:
+        parser.error("invalid secret: {}".format(e))
+    hash_algorithm = _algorithms[args.algorithm]
+
+    if not 1 <= args.digits <= 8:
+        parser.error("digits must be from 1 to 8")
+    if args.period < 1:
+        parser.error("period must be at least 1")
+
+    if args.command == "gen":
+        try:
+            if args.hotp is not None:
+                code = get_hotp_code(secret, args.hotp, args.digits,
+                                     hash_algorithm)
+            else:
+                code = get_totp_code(secret, args.time, args.digits,
+                                     args.period, hash_algorithm)
+        except (ValueError, KeyError, TypeError) as e:
+            parser.error(str(e))
+        print(code)
+        return 0
+
+    for name in ("below", "above"):
+        if getattr(args, name) is not None and getattr(args, name) < 0:
+            parser.error("{} must not be negative".format(name))
+
+    options = {"hash_algorithm": hash_algorithm}
+    if args.below is not None:
+        options["below"] = args.below
+    if args.above is not None:
+        options["above"] = args.above
+
+    try:
+        if args.hotp is not None:
+            offset = match_hotp(args.code, secret, args.hotp, **options)
+        else:
+            offset = match_totp(args.code, secret, args.time, args.period,
+                                **options)
+    except (ValueError, KeyError, TypeError) as e:
+        parser.error(str(e))
+
+    if offset is None:
+        print("fail")
+        return 1
+
+    print("ok", offset)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,151 @@
+# Copyright (C) 2018 Elizabeth Myers. All rights reserved.
+# See the included LICENSE file for terms of distribution.
+
+
+"""TOTP verification that learns each user's clock drift.
+
+A device's clock tends to drift from the server's by a steady amount. As RFC
+6238 section 6 suggests, AdaptiveVerifier remembers the time step offset at
+which each user's last code matched, and checks a narrow window centered on
+that drift first. Only if that fails does it check the rest of the full
+window, and a match there updates the drift. Most checks then need one to
+three HMACs rather than the whole window.
+"""
+
+
+from collections import OrderedDict
+from threading import Lock
+from time import perf_counter
+
+from pyotp import common
+from pyotp.common import find_keyed, prekey, window_order
+from pyotp.constants import HashAlgorithm, OTPType, SearchOrder
+from pyotp.totp import totp_window
+
+
+class DriftStore:
+    """Base class for drift stores."""
+
+    def get(self, key):
+        """Return the drift in time steps last recorded for key, or None."""
+        raise NotImplementedError
+
+    def set(self, key, drift):
+        """Record the drift in time steps for key."""
+        raise NotImplementedError
+
+    def close(self):
+        """Release any resources held by the store."""
+
+
+class MemoryDriftStore(DriftStore):
+    """A bounded in-memory drift store.
+
+    Once there are more than maxsize keys, the least recently updated one is
+    dropped; its user just starts over from no drift. It is safe to share
+    between threads.
+    """
+
+    def __init__(self, maxsize=1048576):
+        self.maxsize = maxsize
+        self._drifts = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self):
+        return len(self._drifts)
+
+    def get(self, key):
+        return self._drifts.get(key)
+
+    def set(self, key, drift):
+        with self._lock:
+            self._drifts[key] = drift
+            self._drifts.move_to_end(key)
+            while len(self._drifts) > self.maxsize:
+                self._drifts.popitem(last=False)
+
+    def clear(self):
+        """Forget all drifts."""
+        with self._lock:
+            self._drifts.clear()
+
+
+class AdaptiveVerifier:
+    """Checks TOTP codes, starting from each user's learned drift.
+
+    store is a DriftStore, by default a new MemoryDriftStore. narrow is how
+    many steps either side of the learned drift the first pass checks.
+    below and above bound the full window, in seconds, as for
+    pyotp.totp.check_totp; the narrow window is always clipped to it, so a
+    learned drift never lets through a code the full window wouldn't.
+
+    With constant_time, each pass takes the same time whether and wherever
+    the code matches in it, but whether the second pass ran is visible.
+    """
+
+    def __init__(self, store=None, narrow=1, grace_period=30,
+                 hash_algorithm=HashAlgorithm.SHA1, below=30, above=30,
+                 constant_time=True):
+        self.store = MemoryDriftStore() if store is None else store
+        self.narrow = narrow
+        self.grace_period = grace_period
+        self.hash_algorithm = hash_algorithm
+        self.below = below
+        self.above = above
+        self.constant_time = constant_time
+
+    def match_totp(self, key, code, secret, timestamp=None, replay=None):
+        """Find which time step the given TOTP code matches for a user.
+
+        key identifies the user or token to the drift store; don't use the
+        secret for it. Returns the offset in time steps from the step of the
+        given timestamp, or None, as pyotp.totp.match_totp does.
+
+        If replay is a pyotp.replay.ReplayStore, key is also used as the
+        replay key.
+        """
+        stats = common._stats
+        if stats is not None:
+            started = perf_counter()
+
+        start, center, end = totp_window(timestamp, self.grace_period,
+                                         self.below, self.above)
+        drift = self.store.get(key) or 0
+        expected = min(max(center + drift, start), end)
+        low = max(expected - self.narrow, start)
+        high = min(expected + self.narrow, end)
+
+        digest = prekey(secret, self.hash_algorithm)
+        counters = window_order(low, high, expected, SearchOrder.CENTER_OUT)
+        found = find_keyed(code, digest, counters, self.constant_time)
+        if found is None:
+            # Widen to the rest of the window, nearest the drift first
+            rest = [step for step in window_order(start, end, expected,
+                                                  SearchOrder.CENTER_OUT)
+                    if not low <= step <= high]
+            found = find_keyed(code, digest, rest, self.constant_time)
+            counters += rest
+
+        replayed = (found is not None and replay is not None and
+                    not replay.reserve(key, found, self.grace_period +
+                                       self.below + self.above))
+
+        if stats is not None:
+            stats.record(OTPType.TOTP, code, counters, center, found,
+                         self.constant_time, False, replayed, started)
+
+        if found is None or replayed:
+            return None
+
+        if found - center != drift:
+            self.store.set(key, found - center)
+
+        return found - center
+
+    def check_totp(self, key, code, secret, timestamp=None, replay=None):
+        """Check if the given TOTP code matches for a user.
+
+        See match_totp.
+        """
+        return self.match_totp(key, code, secret, timestamp,
+                               replay) is not None
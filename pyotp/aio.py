@@ -0,0 +1,176 @@
+# Copyright (C) 2018 Elizabeth Myers. All rights reserved.
+# See the included LICENSE file for terms of distribution.
+
+
+"""Check OTP codes from asyncio code without blocking the event loop."""
+
+
+import asyncio
+
+from functools import partial
+from weakref import WeakKeyDictionary
+
+from pyotp import batch, hotp, totp
+
+
+def _run_calls(calls):
+    # Run a batch of calls in the executor, returning (ok, value) for each so
+    # one failure doesn't sink the rest
+    results = []
+    for func, args, kwargs in calls:
+        try:
+            results.append((True, func(*args, **kwargs)))
+        except Exception as e:
+            results.append((False, e))
+
+    return results
+
+
+class Verifier:
+    """Runs OTP checks in an executor on behalf of coroutines.
+
+    Checks requested during one pass of the event loop are collected and
+    handed to the executor together, up to max_batch at a time, so a burst of
+    requests costs a few executor hand-offs rather than one each. At most
+    max_in_flight checks are queued or running at once; further callers wait
+    their turn.
+
+    executor is a concurrent.futures executor, or None for the event loop's
+    default executor.
+
+    A Verifier must only be used from one event loop.
+    """
+
+    def __init__(self, executor=None, max_in_flight=256, max_batch=64):
+        self.executor = executor
+        self.max_batch = max_batch
+        self._semaphore = asyncio.Semaphore(max_in_flight)
+        self._pending = []
+        self._flush_scheduled = False
+
+    def _flush(self):
+        loop = asyncio.get_running_loop()
+        self._flush_scheduled = False
+        pending, self._pending = self._pending, []
+
+        for i in range(0, len(pending), self.max_batch):
+            chunk = pending[i:i+self.max_batch]
+            calls = [call for call, _ in chunk]
+            task = loop.run_in_executor(self.executor, _run_calls, calls)
+            task.add_done_callback(partial(self._resolve, chunk))
+
+    @staticmethod
+    def _resolve(chunk, task):
+        if task.cancelled():
+            for _, future in chunk:
+                future.cancel()
+            return
+
+        if task.exception() is not None:
+            for _, future in chunk:
+                if not future.done():
+                    future.set_exception(task.exception())
+            return
+
+        for (_, future), (ok, value) in zip(chunk, task.result()):
+            if future.done():
+                continue
+            elif ok:
+                future.set_result(value)
+            else:
+                future.set_exception(value)
+
+    async def _submit(self, func, *args, **kwargs):
+        async with self._semaphore:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._pending.append(((func, args, kwargs), future))
+            if not self._flush_scheduled:
+                self._flush_scheduled = True
+                loop.call_soon(self._flush)
+
+            return await future
+
+    async def check_totp(self, code, secret, timestamp=None, **kwargs):
+        """Async version of pyotp.totp.check_totp."""
+        return await self._submit(totp.check_totp, code, secret, timestamp,
+                                  **kwargs)
+
+    async def match_totp(self, code, secret, timestamp=None, **kwargs):
+        """Async version of pyotp.totp.match_totp."""
+        return await self._submit(totp.match_totp, code, secret, timestamp,
+                                  **kwargs)
+
+    async def check_hotp(self, code, secret, counter, **kwargs):
+        """Async version of pyotp.hotp.check_hotp."""
+        return await self._submit(hotp.check_hotp, code, secret, counter,
+                                  **kwargs)
+
+    async def match_hotp(self, code, secret, counter, **kwargs):
+        """Async version of pyotp.hotp.match_hotp."""
+        return await self._submit(hotp.match_hotp, code, secret, counter,
+                                  **kwargs)
+
+    async def verify_totp_many(self, items, timestamp=None, **kwargs):
+        """Async version of pyotp.batch.verify_totp_many.
+
+        The whole batch is one executor hand-off, and counts as one check
+        against max_in_flight.
+        """
+        return await self._submit(batch.verify_totp_many, list(items),
+                                  timestamp, **kwargs)
+
+    async def verify_hotp_many(self, items, **kwargs):
+        """Async version of pyotp.batch.verify_hotp_many.
+
+        The whole batch is one executor hand-off, and counts as one check
+        against max_in_flight.
+        """
+        return await self._submit(batch.verify_hotp_many, list(items),
+                                  **kwargs)
+
+
+# One default Verifier per event loop
+_verifiers = WeakKeyDictionary()
+
+
+def get_verifier():
+    """Return the default Verifier for the running event loop."""
+    loop = asyncio.get_running_loop()
+    verifier = _verifiers.get(loop)
+    if verifier is None:
+        verifier = _verifiers[loop] = Verifier()
+
+    return verifier
+
+
+async def check_totp(code, secret, timestamp=None, **kwargs):
+    """Async version of pyotp.totp.check_totp, using the default Verifier."""
+    return await get_verifier().check_totp(code, secret, timestamp, **kwargs)
+
+
+async def match_totp(code, secret, timestamp=None, **kwargs):
+    """Async version of pyotp.totp.match_totp, using the default Verifier."""
+    return await get_verifier().match_totp(code, secret, timestamp, **kwargs)
+
+
+async def check_hotp(code, secret, counter, **kwargs):
+    """Async version of pyotp.hotp.check_hotp, using the default Verifier."""
+    return await get_verifier().check_hotp(code, secret, counter, **kwargs)
+
+
+async def match_hotp(code, secret, counter, **kwargs):
+    """Async version of pyotp.hotp.match_hotp, using the default Verifier."""
+    return await get_verifier().match_hotp(code, secret, counter, **kwargs)
+
+
+async def verify_totp_many(items, timestamp=None, **kwargs):
+    """Async version of pyotp.batch.verify_totp_many, using the default
+    Verifier."""
+    return await get_verifier().verify_totp_many(items, timestamp, **kwargs)
+
+
+async def verify_hotp_many(items, **kwargs):
+    """Async version of pyotp.batch.verify_hotp_many, using the default
+    Verifier."""
+    return await get_verifier().verify_hotp_many(items, **kwargs)
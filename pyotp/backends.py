@@ -0,0 +1,229 @@
+# Copyright (C) 2018 Elizabeth Myers. All rights reserved.
+# See the included LICENSE file for terms of distribution.
+
+
+"""Interchangeable HMAC implementations for computing OTP codes.
+
+Which way of computing an HMAC is fastest depends on the Python build and
+the hash algorithm: the one-shot hmac.digest, copying a pre-keyed hmac
+object, or (if installed) the cryptography package. The first time codes
+are computed for a hash algorithm, each available backend is timed briefly
+and the fastest is used from then on.
+
+Set the PYOTP_HMAC_BACKEND environment variable to a backend name to skip
+the timing and always use that backend, or call set_backend.
+"""
+
+
+import os
+
+from hmac import new as new_hmac
+from threading import Lock
+from time import perf_counter
+
+try:
+    from hmac import digest as hmac_digest
+except ImportError:
+    # hmac.digest is new in Python 3.7
+    hmac_digest = None
+
+try:
+    from cryptography.hazmat.primitives import hashes as _hashes
+    from cryptography.hazmat.primitives import hmac as _crypto_hmac
+except ImportError:
+    _hashes = None
+    _crypto_hmac = None
+
+from pyotp.constants import HashAlgorithm
+
+
+ENVIRONMENT_VARIABLE = "PYOTP_HMAC_BACKEND"
+
+
+class HMACBackend:
+    """Base class for HMAC backends."""
+
+    name = None
+
+    def available(self):
+        """Return True if the backend can be used."""
+        return True
+
+    def digest(self, secret, value, hash_algorithm):
+        """Return the HMAC of value keyed with secret."""
+        raise NotImplementedError
+
+    def prekey(self, secret, hash_algorithm):
+        """Return a function computing the HMAC of a value keyed with secret.
+
+        Backends that can should do the key setup once, here.
+        """
+        raise NotImplementedError
+
+
+class DigestBackend(HMACBackend):
+    """The one-shot hmac.digest, which skips creating an hmac object."""
+
+    name = "digest"
+
+    def available(self):
+        return hmac_digest is not None
+
+    def digest(self, secret, value, hash_algorithm):
+        return hmac_digest(secret, value, hash_algorithm.value)
+
+    def prekey(self, secret, hash_algorithm):
+        hash_name = hash_algorithm.value
+
+        def digest(value):
+            return hmac_digest(secret, value, hash_name)
+
+        return digest
+
+
+class CopyBackend(HMACBackend):
+    """Copies of an hmac object keyed once."""
+
+    name = "copy"
+
+    def digest(self, secret, value, hash_algorithm):
+        return new_hmac(secret, value, hash_algorithm.value).digest()
+
+    def prekey(self, secret, hash_algorithm):
+        # Do the HMAC key setup (padding and hashing the inner/outer keys)
+        # once, and compute each digest from a copy of that state.
+        copy = new_hmac(secret, None, hash_algorithm.value).copy
+
+        def digest(value):
+            h = copy()
+            h.update(value)
+            return h.digest()
+
+        return digest
+
+
+class CryptographyBackend(HMACBackend):
+    """HMAC from the cryptography package, if it is installed."""
+
+    name = "cryptography"
+
+    _hashes = {
+        HashAlgorithm.SHA1: "SHA1",
+        HashAlgorithm.SHA256: "SHA256",
+        HashAlgorithm.SHA512: "SHA512",
+    }
+
+    def available(self):
+        return _crypto_hmac is not None
+
+    def _hash(self, hash_algorithm):
+        return getattr(_hashes, self._hashes[hash_algorithm])()
+
+    def digest(self, secret, value, hash_algorithm):
+        h = _crypto_hmac.HMAC(secret, self._hash(hash_algorithm))
+        h.update(value)
+        return h.finalize()
+
+    def prekey(self, secret, hash_algorithm):
+        keyed = _crypto_hmac.HMAC(secret, self._hash(hash_algorithm))
+
+        def digest(value):
+            h = keyed.copy()
+            h.update(value)
+            return h.finalize()
+
+        return digest
+
+
+BACKENDS = {backend.name: backend for backend in (
+    DigestBackend(), CopyBackend(), CryptographyBackend())}
+
+# HashAlgorithm -> selected backend
+_selected = {}
+_lock = Lock()
+
+
+def available_backends():
+    """Return the names of the backends that can be used here."""
+    return [name for name, backend in BACKENDS.items()
+            if backend.available()]
+
+
+def _lookup(name):
+    backend = BACKENDS.get(name)
+    if backend is None or not backend.available():
+        raise ValueError("HMAC backend {!r} is not available; choose from "
+                         "{}".format(name, ", ".join(available_backends())))
+
+    return backend
+
+
+def calibrate(hash_algorithm, number=200):
+    """Time each available backend, and return the fastest.
+
+    The workload is a typical window check: one key setup, then three
+    digests.
+    """
+    secret = bytes(range(20))
+    values = [i.to_bytes(8, "big") for i in range(3)]
+
+    best = None
+    best_time = None
+    for name in available_backends():
+        backend = BACKENDS[name]
+        elapsed = None
+        for _ in range(3):
+            start = perf_counter()
+            for _ in range(number):
+                digest = backend.prekey(secret, hash_algorithm)
+                for value in values:
+                    digest(value)
+            run = perf_counter() - start
+            if elapsed is None or run < elapsed:
+                elapsed = run
+
+        if best_time is None or elapsed < best_time:
+            best = backend
+            best_time = elapsed
+
+    return best
+
+
+def _select(hash_algorithm):
+    with _lock:
+        backend = _selected.get(hash_algorithm)
+        if backend is None:
+            name = os.environ.get(ENVIRONMENT_VARIABLE)
+            if name:
+                backend = _lookup(name)
+            else:
+                backend = calibrate(hash_algorithm)
+            _selected[hash_algorithm] = backend
+
+        return backend
+
+
+def get_backend(hash_algorithm):
+    """Return the backend in use for hash_algorithm, choosing it if needed."""
+    backend = _selected.get(hash_algorithm)
+    if backend is None:
+        backend = _select(hash_algorithm)
+
+    return backend
+
+
+def set_backend(name, hash_algorithm=None):
+    """Use the named backend for hash_algorithm, or all if it is None.
+
+    If name is None, the choice is forgotten, and made again at next use.
+    """
+    backend = None if name is None else _lookup(name)
+    algorithms = HashAlgorithm if hash_algorithm is None else \
+        (hash_algorithm,)
+
+    with _lock:
+        for algorithm in algorithms:
+            if backend is None:
+                _selected.pop(algorithm, None)
+            else:
+                _selected[algorithm] = backend
@@ -0,0 +1,126 @@
+# Copyright (C) 2018 Elizabeth Myers. All rights reserved.
+# See the included LICENSE file for terms of distribution.
+
+
+"""Verify many OTP codes in one call."""
+
+
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from functools import partial
+from itertools import islice
+from time import time
+
+from pyotp.hotp import check_hotp, match_hotp, resync_hotp
+from pyotp.totp import check_totp, match_totp
+
+
+def _chunks(iterable, size):
+    # Split an iterable into lists of at most size items
+    it = iter(iterable)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _check_totp_chunk(check, timestamp, chunk):
+    results = []
+    for item in chunk:
+        code, secret = item[0], item[1]
+        options = item[2] if len(item) > 2 else {}
+        results.append(check(code, secret, timestamp, **options))
+
+    return results
+
+
+def _check_hotp_chunk(check, chunk):
+    results = []
+    for item in chunk:
+        code, secret, counter = item[0], item[1], item[2]
+        options = item[3] if len(item) > 3 else {}
+        results.append(check(code, secret, counter, **options))
+
+    return results
+
+
+def _run(func, items, workers, processes, chunksize, executor):
+    # Run func over chunks of items and return the flattened results in order
+    chunks = _chunks(items, chunksize)
+
+    if executor is None:
+        if workers is None or workers <= 1:
+            # Not worth the hand-off
+            return [result for chunk in chunks for result in func(chunk)]
+
+        pool_type = ProcessPoolExecutor if processes else ThreadPoolExecutor
+        with pool_type(max_workers=workers) as pool:
+            return [result for chunk_results in pool.map(func, chunks)
+                    for result in chunk_results]
+
+    return [result for chunk_results in executor.map(func, chunks)
+            for result in chunk_results]
+
+
+def verify_totp_many(items, timestamp=None, workers=None, processes=False,
+                     chunksize=256, executor=None, offsets=False):
+    """Check many TOTP codes, returning a list of results in order.
+
+    items is an iterable of (code, secret) or (code, secret, options) tuples,
+    where options is a dict of keyword arguments for pyotp.totp.check_totp
+    (grace_period, hash_algorithm, below, above, constant_time,
+    search_order).
+
+    If offsets is True, the results are the matched offsets from
+    pyotp.totp.match_totp (None for no match) instead of booleans.
+
+    If timestamp is None, the current system time is read once and used for
+    the whole batch.
+
+    Items are checked in chunks of chunksize. With workers greater than 1,
+    chunks are spread across a thread pool, or a process pool if processes
+    is True. Threads only overlap the parts of the work that release the GIL,
+    which for short HMAC inputs is not much; use processes for large batches.
+    An existing executor may be passed in to avoid starting a pool per call.
+    """
+    if timestamp is None:
+        timestamp = int(time())
+
+    check = match_totp if offsets else check_totp
+    func = partial(_check_totp_chunk, check, timestamp)
+    return _run(func, items, workers, processes, chunksize, executor)
+
+
+def verify_hotp_many(items, workers=None, processes=False, chunksize=256,
+                     executor=None, offsets=False):
+    """Check many HOTP codes, returning a list of results in order.
+
+    items is an iterable of (code, secret, counter) or (code, secret, counter,
+    options) tuples, where options is a dict of keyword arguments for
+    pyotp.hotp.check_hotp (hash_algorithm, below, above, constant_time,
+    search_order).
+
+    If offsets is True, the results are the matched offsets from
+    pyotp.hotp.match_hotp (None for no match) instead of booleans.
+
+    See verify_totp_many for workers, processes, chunksize, and executor.
+    """
+    check = match_hotp if offsets else check_hotp
+    func = partial(_check_hotp_chunk, check)
+    return _run(func, items, workers, processes, chunksize, executor)
+
+
+def resync_hotp_many(items, workers=None, processes=False, chunksize=16,
+                     executor=None):
+    """Resynchronise many HOTP tokens, returning a list of results in order.
+
+    items is an iterable of (codes, secret, counter) or (codes, secret,
+    counter, options) tuples, where options is a dict of keyword arguments
+    for pyotp.hotp.resync_hotp (hash_algorithm, look_ahead). Each result is
+    the next counter to expect, or None.
+
+    Each resync can scan a long way, so chunks are smaller by default; see
+    verify_totp_many for workers, processes, chunksize, and executor.
+    """
+    func = partial(_check_hotp_chunk, resync_hotp)
+    return _run(func, items, workers, processes, chunksize, executor)
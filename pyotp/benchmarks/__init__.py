@@ -0,0 +1,63 @@
+# Copyright (C) 2018 Elizabeth Myers. All rights reserved.
+# See the included LICENSE file for terms of distribution.
+
+"""Performance benchmarks for pyotp.
+
+Each module in this package has a run(quick=False) function returning a list
+of results, and can be run on its own with python -m. Run them all with
+python -m pyotp.benchmarks; see --help for saving results as JSON and
+comparing against a saved baseline.
+"""
+
+import sys
+
+from timeit import repeat as _repeat
+
+
+# Benchmark modules run by python -m pyotp.benchmarks, in order
+MODULES = (
+    "core",
+    "search_order",
+    "batch",
+    "replay",
+    "aio",
+    "vector",
+    "provision",
+    "uri",
+    "server",
+    "parallel",
+    "adaptive",
+    "table",
+    "index",
+    "prewarm",
+    "backends",
+    "pskc",
+    "throttle",
+    "resync",
+)
+
+
+def measure(func, number, repeat=3):
+    """Return the best time per call of func, in seconds."""
+    return min(_repeat(func, number=number, repeat=repeat)) / number
+
+
+def result(name, seconds, ops=1, **extra):
+    """Make a result from the time taken for ops operations."""
+    ret = {
+        "name": name,
+        "seconds": seconds,
+        "ops_per_sec": ops / seconds if seconds else float("inf"),
+    }
+    ret.update(extra)
+    return ret
+
+
+def report(results, file=sys.stdout):
+    """Print results as a table."""
+    width = max((len(r["name"]) for r in results), default=0)
+    for r in results:
+        extra = " ".join("{}={}".format(k, v) for k, v in r.items()
+                         if k not in ("name", "seconds", "ops_per_sec"))
+        print("{:<{}}  {:>14,.1f} ops/s  {}".format(
+            r["name"], width, r["ops_per_sec"], extra).rstrip(), file=file)
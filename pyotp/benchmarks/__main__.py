@@ -0,0 +1,97 @@
+# Copyright (C) 2018 Elizabeth Myers. All rights reserved.
+# See the included LICENSE file for terms of distribution.
+
+"""Run the pyotp benchmarks, optionally comparing against a baseline."""
+
+import json
+import platform
+import sys
+
+from argparse import ArgumentParser
+from importlib import import_module
+
+from pyotp.benchmarks import MODULES, report
+
+
+def compare(baseline, results, threshold, file=sys.stdout):
+    """Compare results against a baseline, printing the differences.
+
+    Returns the names of results slower than the baseline by more than
+    threshold (a fraction, so 0.1 is 10%).
+    """
+    old = {r["name"]: r for r in baseline}
+    regressions = []
+    for r in results:
+        before = old.get(r["name"])
+        if before is None:
+            print("{}: new".format(r["name"]), file=file)
+            continue
+
+        ratio = r["ops_per_sec"] / before["ops_per_sec"]
+        flag = ""
+        if ratio < 1 - threshold:
+            flag = "  REGRESSION"
+            regressions.append(r["name"])
+
+        print("{}: {:,.1f} -> {:,.1f} ops/s ({:+.1%}){}".format(
+            r["name"], before["ops_per_sec"], r["ops_per_sec"], ratio - 1,
+            flag), file=file)
+
+    return regressions
+
+
+def main(argv=None):
+    parser = ArgumentParser(prog="python -m pyotp.benchmarks",
+                            description=__doc__)
+    parser.add_argument("modules", nargs="*", metavar="module",
+                        help="benchmark modules to run (default: all of {})"
+                        .format(", ".join(MODULES)))
+    parser.add_argument("-q", "--quick", action="store_true",
+                        help="fewer iterations, for a smoke test")
+    parser.add_argument("-o", "--output", metavar="FILE",
+                        help="write results as JSON to FILE")
+    parser.add_argument("-c", "--compare", metavar="FILE",
+                        help="compare against a baseline saved with -o")
+    parser.add_argument("-t", "--threshold", type=float, default=0.1,
+                        help="slowdown counted as a regression, as a "
+                        "fraction (default: 0.1)")
+    args = parser.parse_args(argv)
+
+    modules = args.modules or MODULES
+    for name in modules:
+        if name not in MODULES:
+            parser.error("unknown benchmark module: {}".format(name))
+
+    results = []
+    for name in modules:
+        module = import_module("pyotp.benchmarks." + name)
+        module_results = module.run(args.quick)
+        report(module_results)
+        results.extend(module_results)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "python": platform.python_version(),
+                "implementation": platform.python_implementation(),
+                "machine": platform.machine(),
+                "quick": args.quick,
+                "results": results,
+            }, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+
+        print()
+        regressions = compare(baseline, results, args.threshold)
+        if regressions:
+            print("\n{} regression(s) beyond {:.0%}".format(
+                len(regressions), args.threshold))
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
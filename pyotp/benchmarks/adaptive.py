@@ -0,0 +1,59 @@
+# Copyright (C) 2018 Elizabeth Myers. All rights reserved.
+# See the included LICENSE file for terms of distribution.
+
+"""Adaptive drift-centered checks against full-window checks."""
+
+from random import Random
+from time import perf_counter
+
+from pyotp.adaptive import AdaptiveVerifier
+from pyotp.benchmarks import result, report
+from pyotp.secret import make_secret
+from pyotp.totp import check_totp, get_totp_code
+
+
+def run(quick=False):
+    timestamp = 1234567890
+    users = 200 if quick else 5000
+    rounds = 3
+    window = 300
+
+    # Each user has a steady drift of up to 5 steps either way
+    rng = Random(0)
+    tokens = []
+    for i in range(users):
+        secret = make_secret()
+        drift = rng.randint(-5, 5)
+        tokens.append(("user{}".format(i), secret, drift))
+
+    requests = []
+    for round_ in range(rounds):
+        now = timestamp + round_ * 3600
+        for key, secret, drift in tokens:
+            requests.append((key, get_totp_code(secret, now + drift * 30),
+                             secret, now))
+
+    results = []
+    for constant_time in (False, True):
+        mode = "constant" if constant_time else "plain"
+
+        start = perf_counter()
+        for _, code, secret, now in requests:
+            check_totp(code, secret, now, below=window, above=window,
+                       constant_time=constant_time)
+        results.append(result("adaptive.full_window.{}".format(mode),
+                              perf_counter() - start, len(requests)))
+
+        verifier = AdaptiveVerifier(below=window, above=window,
+                                    constant_time=constant_time)
+        start = perf_counter()
+        for key, code, secret, now in requests:
+            verifier.check_totp(key, code, secret, now)
+        results.append(result("adaptive.learned.{}".format(mode),
+                              perf_counter() - start, len(requests)))
+
+    return results
+
+
+if __name__ == "__main__":
+    report(run())
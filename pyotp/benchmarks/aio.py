@@ -0,0 +1,96 @@
+# Copyright (C) 2018 Elizabeth Myers. All rights reserved.
+# See the included LICENSE file for terms of distribution.
+
+"""Event loop responsiveness while checking codes under load.
+
+A ticker task sleeps for 1ms at a time and records how late it wakes up, while
+bursts of wide-window TOTP checks run either inline on the loop or through a
+pyotp.aio.Verifier.
+"""
+
+import asyncio
+
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+
+from pyotp import aio
+from pyotp.benchmarks import result, report
+from pyotp.secret import make_secret
+from pyotp.totp import check_totp
+
+
+# 61 steps, which is slow enough to notice
+WINDOW = 30 * 30
+
+
+async def _ticker(lags, stop):
+    while not stop.is_set():
+        start = perf_counter()
+        await asyncio.sleep(0.001)
+        lags.append(perf_counter() - start - 0.001)
+
+
+async def _inline(code, secret):
+    return check_totp(code, secret, 1234567890, below=WINDOW, above=WINDOW)
+
+
+async def _load(check, secrets, bursts):
+    for _ in range(bursts):
+        await asyncio.gather(*(check("000000", secret) for secret in secrets))
+        # Give the ticker a chance between bursts
+        await asyncio.sleep(0)
+
+
+def _percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+async def _measure(name, check, secrets, bursts):
+    lags = []
+    stop = asyncio.Event()
+    ticker = asyncio.ensure_future(_ticker(lags, stop))
+    await asyncio.sleep(0.01)
+
+    start = perf_counter()
+    await _load(check, secrets, bursts)
+    elapsed = perf_counter() - start
+
+    stop.set()
+    await ticker
+    lags = lags or [0.0]
+    return result(name, elapsed, len(secrets) * bursts,
+                  lag_p50_ms=round(_percentile(lags, 0.5) * 1000, 2),
+                  lag_p99_ms=round(_percentile(lags, 0.99) * 1000, 2),
+                  lag_max_ms=round(max(lags) * 1000, 2))
+
+
+async def _run(quick):
+    secrets = [make_secret() for _ in range(50 if quick else 200)]
+    bursts = 2 if quick else 10
+    results = [await _measure("aio.inline", _inline, secrets, bursts)]
+
+    with ThreadPoolExecutor(4) as pool:
+        for max_batch in (1, 16, 64):
+            verifier = aio.Verifier(pool, max_batch=max_batch)
+
+            async def check(code, secret):
+                return await verifier.check_totp(code, secret, 1234567890,
+                                                 below=WINDOW, above=WINDOW)
+
+            name = "aio.verifier.batch{}".format(max_batch)
+            results.append(await _measure(name, check, secrets, bursts))
+
+    return results
+
+
+def run(quick=False):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(_run(quick))
+    finally:
+        loop.close()
+
+
+if __name__ == "__main__":
+    report(run())
@@ -0,0 +1,46 @@
+# Copyright (C) 2018 Elizabeth Myers. All rights reserved.
+# See the included LICENSE file for terms of distribution.
+
+"""HMAC backends, one-shot and pre-keyed, per hash algorithm."""
+
+from time import perf_counter
+
+from pyotp import backends
+from pyotp.benchmarks import measure, result, report
+from pyotp.benchmarks.core import SECRETS
+
+
+def run(quick=False):
+    number = 500 if quick else 20000
+    value = (1234).to_bytes(8, "big")
+    values = [i.to_bytes(8, "big") for i in range(3)]
+
+    results = []
+    for algorithm, secret in SECRETS.items():
+        for name in backends.available_backends():
+            backend = backends.BACKENDS[name]
+            kind = "{}.{}".format(name, algorithm.value)
+
+            seconds = measure(
+                lambda: backend.digest(secret, value, algorithm), number)
+            results.append(result("backend.digest." + kind, seconds))
+
+            def window():
+                digest = backend.prekey(secret, algorithm)
+                for value in values:
+                    digest(value)
+
+            seconds = measure(window, number)
+            results.append(result("backend.window3." + kind, seconds))
+
+        # Time the calibration itself, which happens once per algorithm
+        start = perf_counter()
+        selected = backends.calibrate(algorithm)
+        results.append(result("backend.calibrate." + algorithm.value,
+                              perf_counter() - start, choice=selected.name))
+
+    return results
+
+
+if __name__ == "__main__":
+    report(run())
@@ -0,0 +1,63 @@
+# Copyright (C) 2018 Elizabeth Myers. All rights reserved.
+# See the included LICENSE file for terms of distribution.
+
+"""Batch verification throughput against worker count."""
+
+import os
+
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from time import perf_counter
+
+from pyotp.batch import verify_totp_many
+from pyotp.benchmarks import result, report
+from pyotp.secret import make_secret
+from pyotp.totp import get_totp_code
+
+
+def _items(count, timestamp):
+    items = []
+    for i in range(count):
+        secret = make_secret()
+        # Half valid, half invalid, so both full and early-exit scans happen
+        code = get_totp_code(secret, timestamp) if i % 2 else "000000"
+        items.append((code, secret))
+
+    return items
+
+
+def run(quick=False):
+    timestamp = 1234567890
+    count = 2000 if quick else 50000
+    items = _items(count, timestamp)
+    max_workers = os.cpu_count() or 1
+
+    worker_counts = [1]
+    while worker_counts[-1] * 2 <= max_workers:
+        worker_counts.append(worker_counts[-1] * 2)
+
+    results = []
+    start = perf_counter()
+    verify_totp_many(items, timestamp)
+    results.append(result("batch.totp.inline", perf_counter() - start,
+                          count))
+
+    for pool_type, kind in ((ThreadPoolExecutor, "threads"),
+                            (ProcessPoolExecutor, "processes")):
+        for workers in worker_counts:
+            # Pool startup isn't what we're measuring
+            with pool_type(max_workers=workers) as pool:
+                verify_totp_many(items[:workers], timestamp, chunksize=1,
+                                 executor=pool)
+                start = perf_counter()
+                verify_totp_many(items, timestamp, chunksize=1024,
+                                 executor=pool)
+                elapsed = perf_counter() - start
+
+            name = "batch.totp.{}{}".format(kind, workers)
+            results.append(result(name, elapsed, count))
+
+    return results
+
+
+if __name__ == "__main__":
+    report(run())
@@ -0,0 +1,135 @@
+# Copyright (C) 2018 Elizabeth Myers. All rights reserved.
+# See the included LICENSE file for terms of distribution.
+
+"""Code generation, window checks, and secret encoding."""
+
+from pyotp.benchmarks import measure, result, report
+from pyotp.cache import SecretCache
+from pyotp.common import disable_stats, enable_stats, get_code
+from pyotp.constants import HashAlgorithm, SecretEncoding, SecretLength
+from pyotp.hotp import check_hotp, get_hotp_code
+from pyotp.secret import decode_secret, encode_secret, make_secret
+from pyotp.totp import check_totp, get_totp_code
+
+
+SECRETS = {
+    HashAlgorithm.SHA1: b"12345678901234567890",
+    HashAlgorithm.SHA256: b"12345678901234567890123456789012",
+    HashAlgorithm.SHA512: b"1234567890123456789012345678901234567890"
+                          b"123456789012345678901234",
+}
+
+
+def _get_code(number):
+    results = []
+    for algorithm, secret in SECRETS.items():
+        for length in (6, 8):
+            seconds = measure(
+                lambda: get_code(secret, 1234, length, algorithm), number)
+            name = "get_code.{}.len{}".format(algorithm.value, length)
+            results.append(result(name, seconds))
+
+    return results
+
+
+def _checks(number):
+    secret = SECRETS[HashAlgorithm.SHA1]
+    timestamp = 1234567890
+    step = timestamp // 30
+
+    results = []
+    for steps in (1, 5, 10):
+        window = steps * 30
+        positions = {
+            "first": get_totp_code(secret, timestamp - window),
+            "center": get_totp_code(secret, timestamp),
+            "last": get_totp_code(secret, timestamp + window),
+            "none": "000000",
+        }
+
+        for position, code in positions.items():
+            for constant_time in (False, True):
+                mode = "constant" if constant_time else "plain"
+
+                seconds = measure(
+                    lambda: check_totp(code, secret, timestamp, below=window,
+                                       above=window,
+                                       constant_time=constant_time),
+                    number)
+                name = "check_totp.window{}.{}.{}".format(
+                    steps * 2 + 1, position, mode)
+                results.append(result(name, seconds))
+
+                hotp_code = {
+                    "first": get_hotp_code(secret, step - steps),
+                    "center": get_hotp_code(secret, step),
+                    "last": get_hotp_code(secret, step + steps),
+                    "none": "000000",
+                }[position]
+                seconds = measure(
+                    lambda: check_hotp(hotp_code, secret, step, below=steps,
+                                       above=steps,
+                                       constant_time=constant_time),
+                    number)
+                name = "check_hotp.window{}.{}.{}".format(
+                    steps * 2 + 1, position, mode)
+                results.append(result(name, seconds))
+
+    return results
+
+
+def _stats(number):
+    # Cost of instrumentation, off and on, for a typical check
+    secret = SECRETS[HashAlgorithm.SHA1]
+    timestamp = 1234567890
+    code = get_totp_code(secret, timestamp)
+
+    results = []
+    for mode in ("off", "on", "callback"):
+        if mode == "on":
+            enable_stats()
+        elif mode == "callback":
+            enable_stats(lambda event: None)
+
+        try:
+            seconds = measure(lambda: check_totp(code, secret, timestamp),
+                              number)
+        finally:
+            disable_stats()
+
+        results.append(result("check_totp.stats_" + mode, seconds))
+
+    return results
+
+
+def _secrets(number):
+    results = []
+    for encoding in SecretEncoding:
+        for length in SecretLength:
+            secret = make_secret(length)
+            encoded = encode_secret(secret, encoding)
+            kind = "{}.{}".format(encoding.name.lower(), length.value)
+
+            seconds = measure(lambda: encode_secret(secret, encoding), number)
+            results.append(result("encode_secret." + kind, seconds))
+
+            seconds = measure(lambda: decode_secret(encoded, encoding),
+                              number)
+            results.append(result("decode_secret." + kind, seconds))
+
+            cache = SecretCache()
+            seconds = measure(lambda: cache.decode(encoded, encoding),
+                              number)
+            results.append(result("decode_secret.cached." + kind, seconds))
+
+    return results
+
+
+def run(quick=False):
+    number = 200 if quick else 5000
+    return (_get_code(number) + _checks(number // 5) + _stats(number // 5) +
+            _secrets(number))
+
+
+if __name__ == "__main__":
+    report(run())
@@ -0,0 +1,48 @@
+# Copyright (C) 2018 Elizabeth Myers. All rights reserved.
+# See the included LICENSE file for terms of distribution.
+
+"""Reverse code index build, rollover, memory, and lookup."""
+
+import tracemalloc
+
+from time import perf_counter
+
+from pyotp.benchmarks import measure, result, report
+from pyotp.index import CodeIndex
+from pyotp.secret import make_secret
+from pyotp.totp import get_totp_code
+
+
+def run(quick=False):
+    tokens = 5000 if quick else 100000
+    timestamp = 1234567890
+    secrets = [make_secret() for _ in range(tokens)]
+    index = CodeIndex(secrets)
+
+    results = []
+    tracemalloc.start()
+    try:
+        start = perf_counter()
+        index.advance(timestamp)
+        elapsed = perf_counter() - start
+        memory = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    results.append(result("index.build.tokens{}".format(tokens), elapsed,
+                          tokens, bytes=memory))
+
+    start = perf_counter()
+    index.advance(timestamp + 30)
+    results.append(result("index.rollover.tokens{}".format(tokens),
+                          perf_counter() - start, tokens))
+
+    code = get_totp_code(secrets[tokens // 2], timestamp + 30)
+    number = 1000 if quick else 20000
+    seconds = measure(lambda: index.lookup(code, timestamp + 30), number)
+    results.append(result("index.lookup.tokens{}".format(tokens), seconds))
+
+    return results
+
+
+if __name__ == "__main__":
+    report(run())
@@ -0,0 +1,60 @@
+# Copyright (C) 2018 Elizabeth Myers. All rights reserved.
+# See the included LICENSE file for terms of distribution.
+
+"""Sharded shared-memory verification throughput against worker count."""
+
+import os
+
+from time import perf_counter
+
+from pyotp.benchmarks import result, report
+from pyotp.constants import HashAlgorithm
+from pyotp.parallel import ParallelVerifier, SecretTable
+from pyotp.secret import make_secret
+from pyotp.totp import get_totp_code
+
+
+def run(quick=False):
+    timestamp = 1234567890
+    count = 2000 if quick else 50000
+    tokens = []
+    requests = []
+    for i in range(count):
+        secret = make_secret()
+        tokens.append((secret, HashAlgorithm.SHA1, 6, 30))
+        # Half valid, half invalid, so both full and early-exit scans happen
+        code = get_totp_code(secret, timestamp) if i % 2 else "000000"
+        requests.append((i, code, timestamp))
+
+    max_workers = os.cpu_count() or 1
+    worker_counts = [1]
+    while worker_counts[-1] * 2 <= max_workers:
+        worker_counts.append(worker_counts[-1] * 2)
+
+    results = []
+    table = SecretTable.create(tokens)
+    try:
+        for workers in worker_counts:
+            with ParallelVerifier(table, workers) as verifier:
+                # The first pass also keys every token in its worker
+                start = perf_counter()
+                verifier.match_totp_many(requests, constant_time=False)
+                cold = perf_counter() - start
+
+                start = perf_counter()
+                verifier.match_totp_many(requests, constant_time=False)
+                warm = perf_counter() - start
+
+            results.append(result("parallel.totp.cold.workers{}".format(
+                workers), cold, count))
+            results.append(result("parallel.totp.warm.workers{}".format(
+                workers), warm, count))
+    finally:
+        table.close()
+        table.unlink()
+
+    return results
+
+
+if __name__ == "__main__":
+    report(run())
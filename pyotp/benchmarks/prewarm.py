@@ -0,0 +1,58 @@
+# Copyright (C) 2018 Elizabeth Myers. All rights reserved.
+# See the included LICENSE file for terms of distribution.
+
+"""Checks right after a step rollover, with and without pre-warming."""
+
+from time import perf_counter
+
+from pyotp.benchmarks import result, report
+from pyotp.prewarm import Prewarmer, StepClock
+from pyotp.secret import make_secret
+from pyotp.totp import check_totp, get_totp_code
+
+
+class _Clock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def run(quick=False):
+    users = 1000 if quick else 20000
+    secrets = [make_secret() for _ in range(users)]
+    # One second before a rollover
+    fake = _Clock(41152263 * 30 + 29)
+    prewarmer = Prewarmer(clock=StepClock(30, fake), max_per_tick=users)
+
+    for secret in secrets:
+        prewarmer.check_totp("000000", secret)
+    prewarmer.tick()
+
+    start = perf_counter()
+    prewarmer.tick()
+    results = [result("prewarm.tick.next_step", perf_counter() - start,
+                      users)]
+
+    fake.now += 1
+    prewarmer.tick()
+    codes = [get_totp_code(secret, fake.now) for secret in secrets]
+
+    start = perf_counter()
+    for code, secret in zip(codes, secrets):
+        check_totp(code, secret, fake.now)
+    results.append(result("prewarm.rollover.check_totp",
+                          perf_counter() - start, users))
+
+    start = perf_counter()
+    for code, secret in zip(codes, secrets):
+        prewarmer.check_totp(code, secret)
+    results.append(result("prewarm.rollover.prewarmed",
+                          perf_counter() - start, users))
+
+    return results
+
+
+if __name__ == "__main__":
+    report(run())
@@ -0,0 +1,44 @@
+# Copyright (C) 2018 Elizabeth Myers. All rights reserved.
+# See the included LICENSE file for terms of distribution.
+
+"""Bulk secret generation against a make_secret/encode_secret loop."""
+
+from io import StringIO
+
+from pyotp.benchmarks import measure, result, report
+from pyotp.constants import ExportFormat, SecretEncoding, SecretLength
+from pyotp.secret import (encode_secret, make_secret, make_secrets,
+                          write_secrets)
+
+
+def run(quick=False):
+    count = 2000 if quick else 200000
+    number = 1 if quick else 3
+
+    results = []
+    for encoding in (SecretEncoding.BASE32, SecretEncoding.BASE64_STD):
+        for length in (SecretLength.GOOGLE_AUTH,
+                       SecretLength.RFC_4226_RECOMMEND):
+            kind = "{}.{}".format(encoding.name.lower(), length.value)
+
+            seconds = measure(
+                lambda: [encode_secret(make_secret(length), encoding)
+                         for _ in range(count)], number)
+            results.append(result("provision.loop." + kind, seconds, count))
+
+            seconds = measure(
+                lambda: list(make_secrets(count, length, encoding)), number)
+            results.append(result("provision.bulk." + kind, seconds, count))
+
+    for fmt in ExportFormat:
+        seconds = measure(
+            lambda: write_secrets(StringIO(), make_secrets(
+                count, encoding=SecretEncoding.BASE32), fmt), number)
+        results.append(result("provision.write." + fmt.value, seconds,
+                              count))
+
+    return results
+
+
+if __name__ == "__main__":
+    report(run())
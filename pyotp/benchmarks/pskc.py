@@ -0,0 +1,79 @@
+# Copyright (C) 2018 Elizabeth Myers. All rights reserved.
+# See the included LICENSE file for terms of distribution.
+
+"""Streaming PSKC import throughput and memory."""
+
+import binascii
+import os
+import tracemalloc
+
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+from pyotp.benchmarks import result, report
+from pyotp.pskc import parse_pskc
+from pyotp.secret import make_secrets
+
+
+_PACKAGE = """  <KeyPackage>
+    <DeviceInfo><SerialNo>{serial}</SerialNo></DeviceInfo>
+    <Key Id="{serial}" Algorithm="urn:ietf:params:xml:ns:keyprov:pskc:{kind}">
+      <AlgorithmParameters>
+        <ResponseFormat Length="6" Encoding="DECIMAL"/>
+      </AlgorithmParameters>
+      <Data>
+        <Secret><PlainValue>{secret}</PlainValue></Secret>
+        <Counter><PlainValue>0</PlainValue></Counter>
+        <TimeInterval><PlainValue>30</PlainValue></TimeInterval>
+      </Data>
+    </Key>
+  </KeyPackage>
+"""
+
+
+def _write(path, count):
+    with open(path, "w") as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n<KeyContainer '
+                'Version="1.0" xmlns="urn:ietf:params:xml:ns:keyprov:pskc">\n')
+        for i, secret in enumerate(make_secrets(count)):
+            f.write(_PACKAGE.format(
+                serial=i, kind="hotp" if i % 2 else "totp",
+                secret=binascii.b2a_base64(secret, newline=False).decode()))
+        f.write("</KeyContainer>\n")
+
+
+def run(quick=False):
+    count = 5000 if quick else 100000
+
+    with TemporaryDirectory() as tempdir:
+        path = os.path.join(tempdir, "tokens.pskc")
+        _write(path, count)
+        size = os.path.getsize(path)
+
+        tracemalloc.start()
+        try:
+            start = perf_counter()
+            imported = sum(1 for _, record, _ in parse_pskc(path)
+                           if record is not None)
+            elapsed = perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+        assert imported == count
+
+        # Without tracemalloc, which slows allocation down a lot
+        start = perf_counter()
+        for _ in parse_pskc(path):
+            pass
+        untraced = perf_counter() - start
+
+    return [
+        result("pskc.parse.traced", elapsed, count, file_bytes=size,
+               peak_bytes=peak),
+        result("pskc.parse", untraced, count),
+    ]
+
+
+if __name__ == "__main__":
+    report(run())
@@ -0,0 +1,73 @@
+# Copyright (C) 2018 Elizabeth Myers. All rights reserved.
+# See the included LICENSE file for terms of distribution.
+
+"""Replay store reservation throughput."""
+
+import os
+
+from concurrent.futures import ThreadPoolExecutor
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+from pyotp.benchmarks import result, report
+from pyotp.replay import MemoryReplayStore, SQLiteReplayStore
+
+
+def _reserve_all(store, keys, step):
+    reserve = store.reserve
+    for key in keys:
+        reserve(key, step, 90)
+
+
+def _time(store, keys, threads=1):
+    # Reserve a fresh step for every key, and return the time taken
+    start = perf_counter()
+    if threads == 1:
+        _reserve_all(store, keys, 2)
+    else:
+        shares = [keys[i::threads] for i in range(threads)]
+        with ThreadPoolExecutor(threads) as pool:
+            list(pool.map(lambda share: _reserve_all(store, share, 2),
+                          shares))
+    return perf_counter() - start
+
+
+def run(quick=False):
+    count = 5000 if quick else 100000
+    keys = ["user{}".format(i) for i in range(count)]
+
+    results = []
+    for threads in (1, 4):
+        store = MemoryReplayStore()
+        _reserve_all(store, keys, 1)
+        name = "replay.memory.threads{}".format(threads)
+        results.append(result(name, _time(store, keys, threads), count))
+
+    with TemporaryDirectory() as tempdir:
+        for batch_size in (1, 256, 4096):
+            path = os.path.join(tempdir, "replay{}.db".format(batch_size))
+            store = SQLiteReplayStore(path, batch_size=batch_size)
+            # batch_size=1 commits (and syncs the WAL) on every reservation,
+            # which is far slower; use fewer keys so it finishes
+            sample = keys if batch_size > 1 else keys[:count // 20]
+            _reserve_all(store, sample, 1)
+            elapsed = _time(store, sample)
+            store.close()
+            results.append(result(
+                "replay.sqlite.batch{}".format(batch_size), elapsed,
+                len(sample)))
+
+            store = SQLiteReplayStore(path, batch_size=batch_size)
+            start = perf_counter()
+            store.reserve_many([(key, 3) for key in sample], 90)
+            elapsed = perf_counter() - start
+            store.close()
+            results.append(result(
+                "replay.sqlite.reserve_many.batch{}".format(batch_size),
+                elapsed, len(sample)))
+
+    return results
+
+
+if __name__ == "__main__":
+    report(run())
@@ -0,0 +1,38 @@
+# Copyright (C) 2018 Elizabeth Myers. All rights reserved.
+# See the included LICENSE file for terms of distribution.
+
+"""HOTP resynchronisation over a large look-ahead, for many tokens."""
+
+from random import Random
+from time import perf_counter
+
+from pyotp.batch import resync_hotp_many
+from pyotp.benchmarks import result, report
+from pyotp.hotp import get_hotp_code
+from pyotp.secret import make_secret
+
+
+def run(quick=False):
+    tokens = 50 if quick else 2000
+    look_ahead = 1000
+
+    # Tokens drifted anywhere within the look-ahead
+    rng = Random(0)
+    items = []
+    for _ in range(tokens):
+        secret = make_secret()
+        counter = rng.randrange(look_ahead - 2)
+        codes = [get_hotp_code(secret, c) for c in range(counter, counter + 3)]
+        items.append((codes, secret, 0, {"look_ahead": look_ahead}))
+
+    start = perf_counter()
+    results = resync_hotp_many(items)
+    elapsed = perf_counter() - start
+    assert None not in results
+
+    return [result("resync.hotp.lookahead{}".format(look_ahead), elapsed,
+                   tokens)]
+
+
+if __name__ == "__main__":
+    report(run())
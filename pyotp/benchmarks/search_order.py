@@ -0,0 +1,75 @@
+# Copyright (C) 2018 Elizabeth Myers. All rights reserved.
+# See the included LICENSE file for terms of distribution.
+
+"""Linear against center-out window search, over client drift distributions.
+
+Drift is in time steps of the client's clock relative to ours.
+"""
+
+import random
+
+from time import perf_counter
+
+from pyotp.benchmarks import result, report
+from pyotp.common import window_order
+from pyotp.constants import SearchOrder
+from pyotp.totp import get_totp_code, match_totp
+
+
+DISTRIBUTIONS = {
+    # Well-synced phones, and users who were slow to type the code in
+    "synced": {0: 0.90, -1: 0.08, 1: 0.02},
+    # Phones with poor clock sync
+    "drifting": {0: 0.60, -1: 0.18, 1: 0.10, -2: 0.07, 2: 0.05},
+    # Worst case for center-out: uniform across the window
+    "uniform": None,
+}
+
+
+def _sample(distribution, steps, count, rng):
+    if distribution is None:
+        return [rng.randint(-steps, steps) for _ in range(count)]
+
+    drifts = [d for d in distribution if -steps <= d <= steps]
+    weights = [distribution[d] for d in drifts]
+    return rng.choices(drifts, weights, k=count)
+
+
+def run(quick=False):
+    rng = random.Random(4226)
+    secret = b"12345678901234567890"
+    timestamp = 1234567890
+    center = timestamp // 30
+    count = 200 if quick else 5000
+
+    results = []
+    for steps in (1, 5, 10):
+        window = steps * 30
+        for name, distribution in DISTRIBUTIONS.items():
+            drifts = _sample(distribution, steps, count, rng)
+            codes = [get_totp_code(secret, timestamp + d * 30)
+                     for d in drifts]
+
+            for order in SearchOrder:
+                counters = list(window_order(center - steps, center + steps,
+                                             center, order))
+                hmacs = sum(counters.index(center + d) + 1 for d in drifts)
+
+                start = perf_counter()
+                for code in codes:
+                    match_totp(code, secret, timestamp, below=window,
+                               above=window, constant_time=False,
+                               search_order=order)
+                elapsed = perf_counter() - start
+
+                results.append(result(
+                    "search.{}.{}.window{}".format(
+                        name, order.name.lower(), steps * 2 + 1),
+                    elapsed, count, hmacs_per_check=round(hmacs / count, 2),
+                    usec_per_check=round(elapsed / count * 1e6, 2)))
+
+    return results
+
+
+if __name__ == "__main__":
+    report(run())
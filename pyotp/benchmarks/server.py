@@ -0,0 +1,129 @@
+# Copyright (C) 2018 Elizabeth Myers. All rights reserved.
+# See the included LICENSE file for terms of distribution.
+
+"""Load test for the verification daemon.
+
+Run as part of the suite, this starts a daemon in a subprocess on a temporary
+Unix socket. To load test a daemon that is already running, use:
+
+    python -m pyotp.benchmarks.server --unix PATH
+    python -m pyotp.benchmarks.server --port PORT
+"""
+
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+from argparse import ArgumentParser
+from tempfile import TemporaryDirectory
+
+from pyotp.benchmarks import result, report
+from pyotp.constants import OTPType
+from pyotp.secret import make_secret
+from pyotp.server import Client, encode_item
+from pyotp.totp import get_totp_code
+
+
+def _percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+async def _worker(client, secrets, timestamp, requests, latencies):
+    for i in range(requests):
+        secret = secrets[i % len(secrets)]
+        start = time.perf_counter()
+        await client.check_totp(get_totp_code(secret, timestamp), secret,
+                                timestamp)
+        latencies.append(time.perf_counter() - start)
+
+
+async def _load(client, concurrency, requests, batch_size):
+    timestamp = 1234567890
+    secrets = [make_secret() for _ in range(1000)]
+    results = []
+
+    # Warm up the connections
+    await asyncio.gather(*(client.check_totp("000000", secrets[0])
+                           for _ in range(client.pool_size)))
+
+    for workers in concurrency:
+        latencies = []
+        start = time.perf_counter()
+        await asyncio.gather(*(
+            _worker(client, secrets, timestamp, requests // workers,
+                    latencies) for _ in range(workers)))
+        elapsed = time.perf_counter() - start
+
+        latencies.sort()
+        results.append(result(
+            "server.check.concurrency{}".format(workers), elapsed,
+            len(latencies),
+            p50_ms=round(_percentile(latencies, 0.5) * 1000, 3),
+            p99_ms=round(_percentile(latencies, 0.99) * 1000, 3)))
+
+    items = [encode_item(OTPType.TOTP, "000000", secret, timestamp)
+             for secret in secrets[:batch_size]]
+    frames = max(1, requests // batch_size)
+    start = time.perf_counter()
+    await asyncio.gather(*(client.verify_many(items) for _ in range(frames)))
+    elapsed = time.perf_counter() - start
+    results.append(result("server.batch{}".format(batch_size), elapsed,
+                          frames * batch_size))
+
+    return results
+
+
+def _run_against(quick, path=None, port=None):
+    client = Client(path, port=port, pool_size=4)
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(_load(
+            client, (1, 16, 64), 500 if quick else 20000,
+            100 if quick else 1000))
+    finally:
+        loop.run_until_complete(client.close())
+        loop.close()
+
+
+def run(quick=False):
+    if not hasattr(asyncio, "open_unix_connection"):
+        return []
+
+    with TemporaryDirectory() as tempdir:
+        path = os.path.join(tempdir, "pyotp.sock")
+        daemon = subprocess.Popen([sys.executable, "-m", "pyotp.server",
+                                   "--unix", path])
+        try:
+            deadline = time.monotonic() + 10
+            while not os.path.exists(path):
+                if time.monotonic() > deadline or daemon.poll() is not None:
+                    raise RuntimeError("daemon didn't start")
+                time.sleep(0.01)
+
+            return _run_against(quick, path)
+        finally:
+            daemon.terminate()
+            daemon.wait()
+
+
+def main(argv=None):
+    parser = ArgumentParser(prog="python -m pyotp.benchmarks.server",
+                            description=__doc__)
+    where = parser.add_mutually_exclusive_group()
+    where.add_argument("--unix", metavar="PATH",
+                       help="load test the daemon on this Unix socket")
+    where.add_argument("--port", type=int,
+                       help="load test the daemon on this loopback port")
+    parser.add_argument("-q", "--quick", action="store_true")
+    args = parser.parse_args(argv)
+
+    if args.unix or args.port:
+        report(_run_against(args.quick, args.unix, args.port))
+    else:
+        report(run(args.quick))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+# Copyright (C) 2018 Elizabeth Myers. All rights reserved.
+# See the included LICENSE file for terms of distribution.
+
+"""Precomputed code table build, open, and lookup speed."""
+
+import os
+
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+from pyotp.benchmarks import measure, result, report
+from pyotp.secret import make_secret
+from pyotp.table import CodeTable, write_table
+from pyotp.totp import check_totp, get_totp_code
+
+
+def run(quick=False):
+    tokens = 100 if quick else 1000
+    # A day of steps per token
+    start = 1234567890
+    end = start + 86400
+    secrets = [make_secret() for _ in range(tokens)]
+    number = 200 if quick else 5000
+
+    results = []
+    with TemporaryDirectory() as tempdir:
+        path = os.path.join(tempdir, "codes.tbl")
+
+        began = perf_counter()
+        with open(path, "wb") as f:
+            write_table(f, secrets, start, end)
+        results.append(result("table.write", perf_counter() - began,
+                              tokens, bytes=os.path.getsize(path)))
+
+        seconds = measure(lambda: CodeTable(path).close(), number)
+        results.append(result("table.open", seconds))
+
+        timestamp = start + 43200
+        token = tokens // 2
+        secret = secrets[token]
+        code = get_totp_code(secret, timestamp)
+        with CodeTable(path) as table:
+            for constant_time in (False, True):
+                mode = "constant" if constant_time else "plain"
+                seconds = measure(
+                    lambda: table.check_totp(token, code, timestamp,
+                                             constant_time=constant_time),
+                    number)
+                results.append(result("table.check_totp." + mode, seconds))
+
+                seconds = measure(
+                    lambda: check_totp(code, secret, timestamp,
+                                       constant_time=constant_time),
+                    number)
+                results.append(result("table.hmac_check_totp." + mode,
+                                      seconds))
+
+    return results
+
+
+if __name__ == "__main__":
+    report(run())
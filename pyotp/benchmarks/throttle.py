@@ -0,0 +1,67 @@
+# Copyright (C) 2018 Elizabeth Myers. All rights reserved.
+# See the included LICENSE file for terms of distribution.
+
+"""Cost per guess in a brute-force flood, with and without throttling."""
+
+from time import perf_counter
+
+from pyotp.benchmarks import result, report
+from pyotp.secret import make_secret
+from pyotp.throttle import MemoryThrottleStore
+from pyotp.totp import check_totp
+
+
+def _flood(secret, keys, attempts, window, throttle):
+    # Wrong guesses spread over keys, as fast as they can be made. Returns
+    # (seconds, guesses timed). With a throttle, every bucket is emptied
+    # first and only rejected guesses are timed, so the few that get through
+    # on refill don't add a window's worth of HMACs to the cost.
+    timestamp = 1234567890
+    if throttle is not None:
+        for key in keys:
+            while throttle.acquire(key):
+                pass
+
+    elapsed = 0.0
+    timed = 0
+    for i in range(attempts):
+        rejected = throttle.rejected if throttle is not None else 0
+        start = perf_counter()
+        check_totp("{:06d}".format(i % 1000000), secret, timestamp,
+                   below=window, above=window, throttle=throttle,
+                   throttle_key=keys[i % len(keys)])
+        end = perf_counter()
+        if throttle is None or throttle.rejected != rejected:
+            elapsed += end - start
+            timed += 1
+
+    return elapsed, timed
+
+
+def run(quick=False):
+    attempts = 5000 if quick else 200000
+    secret = make_secret()
+
+    results = []
+    for users in (1, 100):
+        keys = ["user{}".format(i) for i in range(users)]
+        for steps in (1, 10, 30):
+            window = steps * 30
+            name = "throttle.flood.users{}.window{}".format(users,
+                                                            steps * 2 + 1)
+
+            store = MemoryThrottleStore()
+            elapsed, rejected = _flood(secret, keys, attempts, window, store)
+            results.append(result(name + ".throttled", elapsed, rejected,
+                                  allowed=attempts - rejected))
+
+            # Unthrottled, every guess computes the whole window
+            sample = max(1, attempts // 20)
+            elapsed, sample = _flood(secret, keys, sample, window, None)
+            results.append(result(name + ".unthrottled", elapsed, sample))
+
+    return results
+
+
+if __name__ == "__main__":
+    report(run())
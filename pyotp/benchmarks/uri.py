@@ -0,0 +1,41 @@
+# Copyright (C) 2018 Elizabeth Myers. All rights reserved.
+# See the included LICENSE file for terms of distribution.
+
+"""otpauth:// URI generation and bulk parsing."""
+
+from io import StringIO
+
+from pyotp.benchmarks import measure, result, report
+from pyotp.constants import OTPType
+from pyotp.secret import make_secrets
+from pyotp.uri import make_uri, parse_uri, parse_uris, write_uris
+
+
+def run(quick=False):
+    count = 2000 if quick else 100000
+    number = 1 if quick else 3
+
+    records = []
+    for i, secret in enumerate(make_secrets(count)):
+        otp_type = OTPType.HOTP if i % 4 == 0 else OTPType.TOTP
+        uri = make_uri(secret, "user{}@example.com".format(i), otp_type,
+                       "Example Co", counter=i)
+        records.append(parse_uri(uri))
+
+    out = StringIO()
+    write_uris(out, records)
+    text = out.getvalue()
+
+    results = []
+    seconds = measure(lambda: write_uris(StringIO(), records), number)
+    results.append(result("uri.write", seconds, count))
+
+    seconds = measure(lambda: sum(1 for _ in parse_uris(StringIO(text))),
+                      number)
+    results.append(result("uri.parse", seconds, count))
+
+    return results
+
+
+if __name__ == "__main__":
+    report(run())
@@ -0,0 +1,60 @@
+# Copyright (C) 2018 Elizabeth Myers. All rights reserved.
+# See the included LICENSE file for terms of distribution.
+
+"""NumPy bulk code generation against the pure Python code_range.
+
+Produces no results if NumPy isn't installed.
+"""
+
+from pyotp import vector
+from pyotp.benchmarks import measure, result, report
+from pyotp.common import code_range, keyed_code_range_int, prekey
+from pyotp.constants import HashAlgorithm
+from pyotp.secret import make_secret
+
+
+def run(quick=False):
+    if vector.numpy is None:
+        return []
+
+    secret = b"12345678901234567890"
+    count = 1000 if quick else 100000
+    number = 1 if quick else 3
+    sha1 = HashAlgorithm.SHA1
+
+    results = []
+    seconds = measure(lambda: list(code_range(secret, 6, sha1, 0, count)),
+                      number)
+    results.append(result("vector.range.python_str", seconds, count))
+
+    def python_int():
+        digest = prekey(secret, sha1)
+        return list(keyed_code_range_int(digest, 6, 0, count))
+
+    seconds = measure(python_int, number)
+    results.append(result("vector.range.python_int", seconds, count))
+
+    seconds = measure(lambda: vector.code_range(secret, 6, sha1, 0, count),
+                      number)
+    results.append(result("vector.range.numpy", seconds, count))
+
+    # Truncation alone, which is the part vectorised
+    digest = prekey(secret, sha1)
+    digests = [digest(i.to_bytes(8, "big")) for i in range(count)]
+    seconds = measure(lambda: vector.digests_to_codes(digests, 6), number)
+    results.append(result("vector.truncate.numpy", seconds, count))
+
+    codes = vector.code_range(secret, 6, sha1, 0, count)
+    seconds = measure(lambda: vector.match(999999, codes), number * 10)
+    results.append(result("vector.match.numpy", seconds, count))
+
+    secrets = [make_secret() for _ in range(count)]
+    seconds = measure(
+        lambda: vector.codes_for_secrets(secrets, 41152263, 6, sha1), number)
+    results.append(result("vector.secrets.numpy", seconds, count))
+
+    return results
+
+
+if __name__ == "__main__":
+    report(run())
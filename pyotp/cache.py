@@ -0,0 +1,239 @@
+# Copyright (C) 2018 Elizabeth Myers. All rights reserved.
+# See the included LICENSE file for terms of distribution.
+
+
+"""Caches for reusing OTP work between calls."""
+
+
+from collections import OrderedDict
+from threading import Lock
+
+from pyotp.common import prekey, keyed_codes_int, parse_code, match_index
+from pyotp.constants import HashAlgorithm, SecretEncoding
+from pyotp.key import OTPKey
+from pyotp.secret import decode_secret
+
+
+class _CodeEntry:
+    # Codes for one (secret, hash algorithm, length), keyed by counter
+
+    __slots__ = ("digest", "codes", "window", "span")
+
+    def __init__(self, digest):
+        self.digest = digest
+        self.codes = {}
+        self.window = None
+        self.span = 0
+
+
+class CodeCache:
+    """A bounded cache of TOTP codes, for reuse across checks.
+
+    Codes are kept per (secret, hash algorithm, length), along with the
+    pre-keyed HMAC state for the secret. The least recently used secret is
+    dropped once there are more than maxsize of them.
+
+    Codes for a secret expire when the window asked for moves: once a newer
+    step is asked for, steps that have fallen out of the widest window seen
+    for that secret are dropped. Whichever way the window moves, steps more
+    than that width below or above it are dropped too, so each secret holds
+    at most three windows' worth of codes.
+
+    Pass an instance as the cache argument of pyotp.totp.check_totp or
+    pyotp.totp.get_totp_code. It is safe to share between threads.
+    """
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expired = 0
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _entry(self, secret, length, hash_algorithm):
+        # Must be called with the lock held
+        key = (secret, hash_algorithm, length)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            return entry
+
+        entry = _CodeEntry(prekey(secret, hash_algorithm))
+        self._entries[key] = entry
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+        return entry
+
+    def codes(self, secret, length, hash_algorithm, counters):
+        """Return a list of the integer codes for the given counters."""
+        if not counters:
+            return []
+
+        low = min(counters)
+        high = max(counters)
+
+        with self._lock:
+            entry = self._entry(secret, length, hash_algorithm)
+            codes = entry.codes
+
+            if high - low > entry.span:
+                entry.span = high - low
+
+            if entry.window != (low, high):
+                if entry.window is not None and high > entry.window[1]:
+                    # Moving forward, as time does: steps before the window
+                    # won't be asked for again
+                    floor = high - entry.span
+                else:
+                    floor = low - entry.span
+                ceiling = high + entry.span
+                entry.window = (low, high)
+
+                stale = [step for step in codes
+                         if step < floor or step > ceiling]
+                for step in stale:
+                    del codes[step]
+                self.expired += len(stale)
+
+            ret = []
+            for step in counters:
+                code = codes.get(step)
+                if code is None:
+                    code = next(keyed_codes_int(entry.digest, length,
+                                                (step,)))
+                    codes[step] = code
+                    self.misses += 1
+                else:
+                    self.hits += 1
+                ret.append(code)
+
+            return ret
+
+    def code_range(self, secret, length, hash_algorithm, start, end):
+        """Return a list of the integer codes from start to end inclusive."""
+        return self.codes(secret, length, hash_algorithm,
+                          range(start, end+1))
+
+    def find(self, code, secret, hash_algorithm, counters, constant_time):
+        """Return the first of counters whose code matches, or None.
+
+        Codes for every counter are computed up front, since they will be
+        wanted by later checks anyway.
+        """
+        parsed = parse_code(code)
+        if parsed is None:
+            return None
+
+        value, length = parsed
+        codes = self.codes(secret, length, hash_algorithm, counters)
+        index = match_index(value, codes, constant_time)
+        if index is None:
+            return None
+
+        return counters[index]
+
+    def check_range(self, code, secret, hash_algorithm, start, end,
+                    constant_time):
+        """Check the code against the steps from start to end inclusive."""
+        counters = range(start, end+1)
+        return self.find(code, secret, hash_algorithm, counters,
+                         constant_time) is not None
+
+    def stats(self):
+        """Return a dict of the hit, miss, eviction, and expiry counters."""
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expired": self.expired,
+            }
+
+    def clear(self):
+        """Drop all cached codes and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = self.expired = 0
+
+
+class SecretCache:
+    """A bounded cache of decoded secrets, keyed by their encoded form.
+
+    For secrets stored encoded and decoded on every check. decode() returns
+    the decoded secret; key() returns a pyotp.key.OTPKey for it, which also
+    saves setting up the HMAC key. The least recently used entry is dropped
+    once there are more than maxsize.
+
+    It is safe to share between threads.
+    """
+
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _get(self, cache_key, make):
+        with self._lock:
+            value = self._entries.get(cache_key)
+            if value is not None:
+                self._entries.move_to_end(cache_key)
+                self.hits += 1
+                return value
+
+            self.misses += 1
+
+        # Decoding can raise; don't hold the lock for it
+        value = make()
+
+        with self._lock:
+            self._entries[cache_key] = value
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+        return value
+
+    def decode(self, encoded, encoding=SecretEncoding.BASE32):
+        """Return the decoded secret; see pyotp.secret.decode_secret."""
+        return self._get((encoded, encoding),
+                         lambda: decode_secret(encoded, encoding))
+
+    def key(self, encoded, encoding=SecretEncoding.BASE32,
+            hash_algorithm=HashAlgorithm.SHA1, length=6):
+        """Return a pyotp.key.OTPKey for the encoded secret."""
+        return self._get(
+            (encoded, encoding, hash_algorithm, length),
+            lambda: OTPKey(decode_secret(encoded, encoding), hash_algorithm,
+                           length))
+
+    def stats(self):
+        """Return a dict of the hit, miss, and eviction counters."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def clear(self):
+        """Drop all cached secrets and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
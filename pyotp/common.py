@@ -3,8 +3,11 @@
 
 """This module is designed for internal use by pyotp."""
 
-from time import time as unix_time
-from hmac import compare_digest, new as new_hmac
+from time import time as unix_time, perf_counter
+from threading import Lock
+
+from pyotp.backends import get_backend
+from pyotp.constants import SearchOrder
 
 
 # These constants were taken from RFC 6238
@@ -21,50 +24,322 @@ _digits_mod = {
 }
 
 
-def get_code(secret, value, length, hash_algorithm):
-    # Given the OTP secret, value, length, and hash algorithm, return the OTP
-    # code
-    code_length = _digits_mod[length]
+def prekey(secret, hash_algorithm):
+    # Return a function computing the digest of a counter value keyed with
+    # secret. The backend does any key setup once, here.
+    return get_backend(hash_algorithm).prekey(secret, hash_algorithm)
 
-    if not isinstance(value, bytes):
-        value = value.to_bytes(8, "big")
-
-    digest = new_hmac(secret, value, hash_algorithm.value).digest()
 
+def _truncate(digest, code_length):
+    # Dynamic truncation from RFC 4226
     offset = digest[-1] & 0xf
 
     code = int.from_bytes(digest[offset:offset+4], "big")
     code &= 0x7FFFFFFF
     code %= code_length
 
+    return code
+
+
+def get_code_int(secret, value, length, hash_algorithm):
+    # Same as get_code, but return the code as an integer; this skips the
+    # string formatting
+    if not isinstance(value, bytes):
+        value = value.to_bytes(8, "big")
+
+    digest = get_backend(hash_algorithm).digest(secret, value, hash_algorithm)
+
+    return _truncate(digest, _digits_mod[length])
+
+
+def get_code(secret, value, length, hash_algorithm):
+    # Given the OTP secret, value, length, and hash algorithm, return the OTP
+    # code
+    code = get_code_int(secret, value, length, hash_algorithm)
     return str(code).zfill(length)
 
 
-def code_range(secret, length, hash_algorithm, start, end):
-    # Return codes in a given range
-    for i in range(start, end+1):
+def parse_code(code):
+    # Parse a submitted code (str, bytes, bytearray or memoryview) into its
+    # integer value and length. Returns None if it isn't all ASCII digits,
+    # or is longer than any supported code, since such a code can never
+    # match.
+    if isinstance(code, str):
+        try:
+            code = code.encode("ascii")
+        except UnicodeEncodeError:
+            return None
+    elif isinstance(code, memoryview):
+        code = code.tobytes()
+
+    if len(code) not in _digits_mod or not code.isdigit():
+        return None
+
+    return int(code), len(code)
+
+
+def keyed_codes_int(digest, length, counters):
+    # Return integer codes for the given counters, using a digest function
+    # from prekey
+    code_length = _digits_mod[length]
+    for i in counters:
         # 64-bit integers only, please!
         i &= 0xFFFFFFFFFFFFFFFF
-        yield get_code(secret, i, length, hash_algorithm)
+        yield _truncate(digest(i.to_bytes(8, "big")), code_length)
+
+
+def keyed_code_range_int(digest, length, start, end):
+    # Return integer codes in a given range, using a digest function from
+    # prekey
+    return keyed_codes_int(digest, length, range(start, end+1))
+
+
+def keyed_code_range(digest, length, start, end):
+    # Same as code_range, but using a digest function from prekey
+    for code in keyed_code_range_int(digest, length, start, end):
+        yield str(code).zfill(length)
+
+
+def code_range(secret, length, hash_algorithm, start, end):
+    # Return codes in a given range
+    digest = prekey(secret, hash_algorithm)
+    return keyed_code_range(digest, length, start, end)
+
+
+def window_order(start, end, center, order):
+    # Return the counters from start to end inclusive, in the given search
+    # order. center need not be inside the window.
+    if order is SearchOrder.LINEAR:
+        return range(start, end+1)
+
+    if center < start:
+        center = start
+    elif center > end:
+        center = end
+
+    counters = [center]
+    below = center - 1
+    above = center + 1
+    while below >= start or above <= end:
+        if below >= start:
+            counters.append(below)
+            below -= 1
+        if above <= end:
+            counters.append(above)
+            above += 1
+
+    return counters
+
+
+def match_index(value, codes, constant_time):
+    # Return the index of the first integer code in codes matching value, or
+    # None if there isn't one
+    if not constant_time:
+        for index, comp in enumerate(codes):
+            if value == comp:
+                return index
+
+        return None
+
+    # Compare against every code, doing the same work whether and wherever a
+    # code matches: no early exit, and no branching on the comparisons.
+    found = 0
+    match = 0
+    for index, comp in enumerate(codes):
+        # Codes are below 2**31, so this is 1 if comp == value, else 0
+        equal = (((comp ^ value) - 1) >> 63) & 1
+        # Only the first match counts; -first is all ones if it is set
+        first = equal & (found ^ 1)
+        match |= -first & index
+        found |= equal
+
+    return match if found else None
+
+
+def find_keyed(code, digest, counters, constant_time):
+    # Return the first counter in the sequence counters whose code matches
+    # the given code, or None, using a digest function from prekey
+    # The code is parsed once and compared as an integer to each candidate
+    parsed = parse_code(code)
+    if parsed is None:
+        return None
+
+    value, length = parsed
+    codes = keyed_codes_int(digest, length, counters)
+    index = match_index(value, codes, constant_time)
+    if index is None:
+        return None
+
+    return counters[index]
+
+
+def check_keyed_range(code, digest, start, end, constant_time):
+    # Check the code for validity in the given range between start and end,
+    # using a digest function from prekey
+    counters = range(start, end+1)
+    return find_keyed(code, digest, counters, constant_time) is not None
+
+
+def resync_keyed(codes, digest, counter, look_ahead):
+    # Find where the given consecutive codes appear from counter up to
+    # counter + look_ahead, using a digest function from prekey, and return
+    # the counter after the last; see pyotp.hotp.resync_hotp
+    if not 2 <= len(codes) <= 3:
+        raise ValueError("resync needs 2 or 3 consecutive codes")
+
+    parsed = [parse_code(code) for code in codes]
+    if None in parsed or len({length for _, length in parsed}) != 1:
+        return None
+
+    values = [value for value, _ in parsed]
+    first = values[0]
+    rest = values[1:]
+    length = parsed[0][1]
+
+    end = counter + look_ahead
+    for found, value in enumerate(keyed_code_range_int(digest, length,
+                                                       counter, end),
+                                  counter):
+        if value != first:
+            continue
+
+        # Only now are the follow-up codes worth computing
+        following = range(found + 1, found + len(codes))
+        if list(keyed_codes_int(digest, length, following)) == rest:
+            return found + len(codes)
+
+    return None
 
 
 def check_range(code, secret, hash_algorithm, start, end):
     # Check the code for validity in the given range between start and end
     # Non-constant time comparison
-    # Assumes code length and generated lengths are equal
-    length = len(code)
-    for comp in code_range(secret, length, hash_algorithm, start, end):
-        if code == comp:
-            return True
-
-    return False
+    digest = prekey(secret, hash_algorithm)
+    return check_keyed_range(code, digest, start, end, False)
 
 
 def check_range_constant(code, secret, hash_algorithm, start, end):
-    # Same as above, but constant-time-ish. No promises!
-    length = len(code)
-    for comp in code_range(secret, length, hash_algorithm, start, end):
-        if compare_digest(code, comp):
-            return True
+    # Same as above, but every code in the range is computed and compared
+    # regardless of where (or if) it matches
+    digest = prekey(secret, hash_algorithm)
+    return check_keyed_range(code, digest, start, end, True)
+
+
+# Instrumentation
+#
+# Off by default. While off, _stats is None and the only cost to a check is
+# reading it; match_totp, match_hotp, and OTPKey look at it once per call.
+_stats = None
+
+
+class _Stats:
+    # Counters for one kind of OTP check
+
+    __slots__ = ("checks", "matches", "failures", "replayed", "hmacs",
+                 "cached_checks", "seconds", "offsets", "failures_by_window")
+
+    def __init__(self):
+        self.checks = 0
+        self.matches = 0
+        self.failures = 0
+        self.replayed = 0
+        self.hmacs = 0
+        self.cached_checks = 0
+        self.seconds = 0.0
+        self.offsets = {}
+        self.failures_by_window = {}
+
+    def snapshot(self):
+        return {name: (dict(value) if isinstance(value, dict) else value)
+                for name, value in
+                ((name, getattr(self, name)) for name in self.__slots__)}
+
+
+class _Instrument:
+    # Enabled instrumentation: counters per OTP type, and the callback
+
+    def __init__(self, callback):
+        self.callback = callback
+        self.lock = Lock()
+        self.kinds = {}
+
+    def record(self, kind, code, counters, center, found, constant_time,
+               cached, replayed, started):
+        seconds = perf_counter() - started
+        window = len(counters)
+
+        # HMACs computed for this check; codes served from a CodeCache are
+        # not known here, so cached checks are counted separately
+        if cached:
+            hmacs = None
+        elif parse_code(code) is None:
+            hmacs = 0
+        elif constant_time or found is None:
+            hmacs = window
+        else:
+            hmacs = counters.index(found) + 1
+
+        offset = None if found is None or replayed else found - center
+
+        with self.lock:
+            stats = self.kinds.get(kind)
+            if stats is None:
+                stats = self.kinds[kind] = _Stats()
+
+            stats.checks += 1
+            stats.seconds += seconds
+            if hmacs is None:
+                stats.cached_checks += 1
+            else:
+                stats.hmacs += hmacs
+
+            if offset is not None:
+                stats.matches += 1
+                stats.offsets[offset] = stats.offsets.get(offset, 0) + 1
+            else:
+                stats.failures += 1
+                stats.failures_by_window[window] = \
+                    stats.failures_by_window.get(window, 0) + 1
+                if replayed:
+                    stats.replayed += 1
+
+        if self.callback is not None:
+            self.callback({
+                "type": kind.value,
+                "window": window,
+                "offset": offset,
+                "replayed": replayed,
+                "hmacs": hmacs,
+                "seconds": seconds,
+            })
+
+
+def enable_stats(callback=None):
+    # Start collecting verification statistics, clearing any already kept.
+    # If callback is given, it is called after every check with a dict of
+    # type ("totp" or "hotp"), window (codes in the window), offset (matched
+    # offset, or None on failure), replayed, hmacs (None if a CodeCache was
+    # used), and seconds. It runs in the checking thread, so keep it quick.
+    global _stats
+    _stats = _Instrument(callback)
+
+
+def disable_stats():
+    # Stop collecting statistics and drop those kept
+    global _stats
+    _stats = None
+
+
+def stats_snapshot():
+    # Return a dict of the statistics per type ("totp", "hotp"), or None if
+    # they aren't enabled. Each has counts of checks, matches, failures,
+    # replayed (rejected by a replay store, and counted as failures), hmacs,
+    # and cached_checks, total seconds, offsets (a histogram of matched
+    # offsets), and failures_by_window (failures by window size).
+    instrument = _stats
+    if instrument is None:
+        return None
 
-    return False
+    with instrument.lock:
+        return {kind.value: stats.snapshot()
+                for kind, stats in instrument.kinds.items()}
@@ -19,6 +19,16 @@ class SecretLength(Enum):
     """RFC 4226 recommended secret length of 160 bits (20 bytes)."""
 
 
+class OTPType(Enum):
+    """Kinds of OTP, as named in otpauth:// URIs."""
+
+    HOTP = "hotp"
+    """Counter-based OTP (RFC 4226)."""
+
+    TOTP = "totp"
+    """Time-based OTP (RFC 6238)."""
+
+
 class HashAlgorithm(Enum):
     """Valid hash algorithms for TOTP use (RFC 6238)."""
 
@@ -51,3 +61,27 @@ class SecretEncoding(Enum):
 
     ASCII85 = auto()
     """Ascii85 encoding; very uncommon variant."""
+
+
+class ExportFormat(Enum):
+    """File formats for exporting secrets."""
+
+    CSV = "csv"
+    """Comma-separated values with a header row."""
+
+    JSONL = "jsonl"
+    """One JSON object per line."""
+
+
+class SearchOrder(Enum):
+    """Order in which counters in a window are checked."""
+
+    LINEAR = auto()
+    """From the lowest counter in the window to the highest."""
+
+    CENTER_OUT = auto()
+    """Current counter first, then one below, one above, two below, etc.
+
+    Most codes match the current counter or one next to it, so this finds them
+    with fewer HMAC computations when the check stops at the first match.
+    """
@@ -5,8 +5,12 @@
 """HOTP-related functions."""
 
 
-from pyotp.constants import HashAlgorithm
-from pyotp.common import get_code, check_range, check_range_constant
+from time import perf_counter
+
+from pyotp import common
+from pyotp.constants import HashAlgorithm, OTPType, SearchOrder
+from pyotp.common import (get_code, get_code_int, prekey, find_keyed,
+                          window_order, resync_keyed)
 
 
 def get_hotp_code(secret, counter, length=6, hash_algorithm=HashAlgorithm.SHA1):
@@ -18,8 +22,65 @@ def get_hotp_code(secret, counter, length=6, hash_algorithm=HashAlgorithm.SHA1):
     return get_code(secret, counter, length, hash_algorithm)
 
 
+def get_hotp_code_int(secret, counter, length=6,
+                      hash_algorithm=HashAlgorithm.SHA1):
+    """Same as get_hotp_code, but return the code as an integer.
+
+    This skips formatting the code as a zero-padded string.
+    """
+    return get_code_int(secret, counter, length, hash_algorithm)
+
+
+def match_hotp(code, secret, counter, hash_algorithm=HashAlgorithm.SHA1,
+               below=0, above=15, constant_time=True,
+               search_order=SearchOrder.LINEAR, replay=None, replay_key=None,
+               throttle=None, throttle_key=None):
+    """Find which counter the given HOTP code matches.
+
+    Returns the offset of the matching counter from the given counter, or None
+    if the code doesn't match. Be careful to check the result against None
+    rather than for truthiness, as 0 is a match. The next counter to expect
+    is counter + offset + 1.
+
+    See check_hotp for the other arguments.
+    """
+    if replay is not None and replay_key is None:
+        raise ValueError("replay_key is required with replay")
+    if throttle is not None:
+        if throttle_key is None:
+            raise ValueError("throttle_key is required with throttle")
+        if not throttle.acquire(throttle_key):
+            return None
+
+    stats = common._stats
+    if stats is not None:
+        started = perf_counter()
+
+    counters = window_order(counter - below, counter + above, counter,
+                            search_order)
+    found = find_keyed(code, prekey(secret, hash_algorithm), counters,
+                       constant_time)
+
+    replayed = (found is not None and replay is not None and
+                not replay.reserve(replay_key, found))
+
+    if stats is not None:
+        stats.record(OTPType.HOTP, code, counters, counter, found,
+                     constant_time, False, replayed, started)
+
+    if found is None or replayed:
+        return None
+
+    if throttle is not None:
+        throttle.reset(throttle_key)
+
+    return found - counter
+
+
 def check_hotp(code, secret, counter, hash_algorithm=HashAlgorithm.SHA1,
-               below=0, above=15, constant_time=True):
+               below=0, above=15, constant_time=True,
+               search_order=SearchOrder.LINEAR, replay=None, replay_key=None,
+               throttle=None, throttle_key=None):
     """Check if the given HOTP code matches the given counter.
 
     It is not recommended to use any algorithm but SHA1 unless you know what
@@ -30,12 +91,53 @@ def check_hotp(code, secret, counter, hash_algorithm=HashAlgorithm.SHA1,
     it will check 190 and 210 as well. This is in case they incremented the
     counter by mistake.
 
-    constant_time determines if a constant time string comparison is used, to
-    help mitigate timing attacks.
+    constant_time determines if a constant time comparison is used, to help
+    mitigate timing attacks. In that mode the whole window is always computed
+    and compared, so the time taken doesn't show whether or where the code
+    matched; match_hotp still reports which counter matched.
+
+    The code may be a str, or bytes, bytearray, or memoryview straight from a
+    request buffer. It is parsed once and compared as an integer.
+
+    search_order is a pyotp.constants.SearchOrder. With constant_time off,
+    checking stops at the first match, so SearchOrder.CENTER_OUT finds codes
+    at or near the given counter with fewer HMACs.
+
+    If replay is a pyotp.replay.ReplayStore, a matching code is only accepted
+    if its counter is newer than the last one accepted for replay_key, and
+    that counter is then reserved, atomically. replay_key identifies the user
+    or token; don't use the secret for it.
+
+    If throttle is a pyotp.throttle.ThrottleStore, each check uses up one of
+    throttle_key's attempts, and is rejected without computing any codes if
+    it has none left. A successful check gives throttle_key its full
+    allowance back.
+
+    Use match_hotp to find out which counter matched.
+    """
+    return match_hotp(code, secret, counter, hash_algorithm, below, above,
+                      constant_time, search_order, replay, replay_key,
+                      throttle, throttle_key) is not None
+
+
+def resync_hotp(codes, secret, counter, hash_algorithm=HashAlgorithm.SHA1,
+                look_ahead=1000):
+    """Resynchronise a token's counter from consecutive codes.
+
+    codes is a sequence of 2 or 3 codes the token produced one after
+    another. The counters from counter to counter + look_ahead are scanned
+    for the first code, and wherever it matches, the following codes are
+    checked too; this is the resynchronisation scheme from RFC 4226 section
+    7.4. Returns the next counter to expect (the counter after the last
+    code), or None if the codes weren't found.
+
+    The whole look-ahead uses one pre-keyed HMAC, and stops at the first
+    match, so resyncs take time that depends on how far the token is ahead.
+    That is fine for an occasional, deliberate resync; it is not a
+    replacement for check_hotp. Requiring the follow-up codes is what keeps
+    a large look-ahead safe: a lone 6 digit code is expected to turn up
+    once in every million counters by chance, but consecutive codes are
+    not.
     """
-    start = counter - below
-    end = counter + above
-    if constant_time:
-        return check_range_constant(code, secret, hash_algorithm, start, end)
-    else:
-        return check_range(code, secret, hash_algorithm, start, end)
+    return resync_keyed(codes, prekey(secret, hash_algorithm), counter,
+                        look_ahead)
@@ -0,0 +1,150 @@
+# Copyright (C) 2018 Elizabeth Myers. All rights reserved.
+# See the included LICENSE file for terms of distribution.
+
+
+"""A reverse index from current TOTP codes to the tokens that produced them.
+
+Finding which of many secrets produced a code (for enrolling an unassigned
+hardware token, say, or a help desk lookup) would otherwise take a full
+window of HMACs per secret. CodeIndex computes each time step's code for
+every secret once, and answers lookups with a dictionary lookup per step in
+the window.
+
+Codes are short, so with many tokens some will share a code; lookups return
+every token that matches.
+"""
+
+
+from hmac import new as new_hmac
+from threading import Lock
+
+try:
+    from hmac import digest as hmac_digest
+except ImportError:
+    # hmac.digest is new in Python 3.7
+    def hmac_digest(key, msg, digest):
+        return new_hmac(key, msg, digest).digest()
+
+from pyotp import vector
+from pyotp.common import _digits_mod, _truncate, parse_code
+from pyotp.constants import HashAlgorithm
+from pyotp.totp import totp_window
+
+
+def step_codes(secrets, step, length=6, hash_algorithm=HashAlgorithm.SHA1):
+    """Return a list of the integer code of each secret at one time step.
+
+    Uses pyotp.vector if NumPy is installed.
+    """
+    if vector.numpy is not None:
+        return vector.codes_for_secrets(secrets, step, length,
+                                        hash_algorithm).tolist()
+
+    value = (step & 0xFFFFFFFFFFFFFFFF).to_bytes(8, "big")
+    hash_name = hash_algorithm.value
+    mod = _digits_mod[length]
+    return [_truncate(hmac_digest(secret, value, hash_name), mod)
+            for secret in secrets]
+
+
+def _build_step(secrets, step, length, hash_algorithm):
+    # Map each code at step to the token that produced it, or a tuple of
+    # tokens if several did
+    index = {}
+    get = index.get
+    for token, code in enumerate(step_codes(secrets, step, length,
+                                            hash_algorithm)):
+        other = get(code)
+        if other is None:
+            index[code] = token
+        elif isinstance(other, tuple):
+            index[code] = other + (token,)
+        else:
+            index[code] = (other, token)
+
+    return index
+
+
+class CodeIndex:
+    """An index of the codes of many TOTP secrets over the active window.
+
+    Tokens are identified by their position in secrets. The window is below
+    and above seconds either side of the current time, as for
+    pyotp.totp.check_totp.
+
+    The index follows the clock by itself: a lookup first calls advance(),
+    which at each step rollover drops the oldest step and computes the
+    newest one. Call advance() from a timer just before each rollover to
+    keep that work off the lookup path. Lookups are safe from several
+    threads, and see either the old window or the new one.
+    """
+
+    def __init__(self, secrets, length=6, grace_period=30,
+                 hash_algorithm=HashAlgorithm.SHA1, below=30, above=30):
+        self.secrets = secrets
+        self.length = length
+        self.grace_period = grace_period
+        self.hash_algorithm = hash_algorithm
+        self.below = below
+        self.above = above
+        # (center step, {step: {code: token or tuple of tokens}}), replaced
+        # whole so lookups always see a consistent window
+        self._window = (None, {})
+        self._lock = Lock()
+
+    def __len__(self):
+        return len(self.secrets)
+
+    def advance(self, timestamp=None):
+        """Bring the index up to the window for timestamp (None for now).
+
+        Returns the number of steps computed.
+        """
+        start, center, end = totp_window(timestamp, self.grace_period,
+                                         self.below, self.above)
+        if center == self._window[0]:
+            return 0
+
+        with self._lock:
+            current, old = self._window
+            if center == current:
+                return 0
+
+            steps = {}
+            built = 0
+            for step in range(start, end+1):
+                index = old.get(step)
+                if index is None:
+                    index = _build_step(self.secrets, step, self.length,
+                                        self.hash_algorithm)
+                    built += 1
+                steps[step] = index
+
+            self._window = (center, steps)
+            return built
+
+    def lookup(self, code, timestamp=None):
+        """Return the tokens whose code matches, with their step offsets.
+
+        Returns a list of (token, offset) pairs, nearest the current step
+        first, where offset is as returned by pyotp.totp.match_totp. The
+        list is empty if nothing matches.
+        """
+        parsed = parse_code(code)
+        if parsed is None or parsed[1] != self.length:
+            return []
+
+        self.advance(timestamp)
+        value = parsed[0]
+        center, steps = self._window
+
+        found = []
+        for step in sorted(steps, key=lambda step: abs(step - center)):
+            tokens = steps[step].get(value)
+            if tokens is None:
+                continue
+            if not isinstance(tokens, tuple):
+                tokens = (tokens,)
+            found.extend((token, step - center) for token in tokens)
+
+        return found
@@ -0,0 +1,137 @@
+# Copyright (C) 2018 Elizabeth Myers. All rights reserved.
+# See the included LICENSE file for terms of distribution.
+
+
+"""Reusable pre-keyed OTP secrets."""
+
+
+from time import perf_counter
+
+from pyotp import common
+from pyotp.constants import HashAlgorithm, OTPType, SearchOrder
+from pyotp.common import (prekey, keyed_codes_int, find_keyed, window_order,
+                          resync_keyed)
+from pyotp.totp import totp_step, totp_window
+
+
+class OTPKey:
+    """An OTP secret with its HMAC key setup done once.
+
+    The functions in pyotp.hotp and pyotp.totp set up the HMAC key from the
+    secret on every call. An OTPKey does that work when it is created, and
+    each code after that only costs a copy of the keyed state and one hash.
+    Keep one around per secret if you check many codes against it.
+
+    The methods give the same results as their counterparts in pyotp.hotp and
+    pyotp.totp, except that codes whose length is not the key's length are
+    always rejected.
+    """
+
+    __slots__ = ("secret", "hash_algorithm", "length", "_digest")
+
+    def __init__(self, secret, hash_algorithm=HashAlgorithm.SHA1, length=6):
+        self.secret = secret
+        self.hash_algorithm = hash_algorithm
+        self.length = length
+        self._digest = prekey(secret, hash_algorithm)
+
+    def __repr__(self):
+        return "{}(hash_algorithm={}, length={})".format(
+            type(self).__name__, self.hash_algorithm, self.length)
+
+    def _code(self, counter):
+        counter &= 0xFFFFFFFFFFFFFFFF
+        return next(keyed_codes_int(self._digest, self.length, (counter,)))
+
+    def _match(self, otp_type, code, start, center, end, constant_time,
+               search_order):
+        if len(code) != self.length:
+            return None
+
+        stats = common._stats
+        if stats is not None:
+            started = perf_counter()
+
+        counters = window_order(start, end, center, search_order)
+        found = find_keyed(code, self._digest, counters, constant_time)
+
+        if stats is not None:
+            stats.record(otp_type, code, counters, center, found,
+                         constant_time, False, False, started)
+
+        if found is None:
+            return None
+
+        return found - center
+
+    def hotp(self, counter):
+        """Get the HOTP code for the given counter.
+
+        See pyotp.hotp.get_hotp_code.
+        """
+        return str(self._code(counter)).zfill(self.length)
+
+    def hotp_int(self, counter):
+        """Get the HOTP code for the given counter as an integer."""
+        return self._code(counter)
+
+    def totp(self, timestamp=None, grace_period=30):
+        """Get the TOTP code for the given timestamp.
+
+        See pyotp.totp.get_totp_code.
+        """
+        return str(self.totp_int(timestamp, grace_period)).zfill(self.length)
+
+    def totp_int(self, timestamp=None, grace_period=30):
+        """Get the TOTP code for the given timestamp as an integer."""
+        return self._code(totp_step(timestamp, grace_period))
+
+    def match_hotp(self, code, counter, below=0, above=15,
+                   constant_time=True, search_order=SearchOrder.LINEAR):
+        """Find which counter the given HOTP code matches.
+
+        See pyotp.hotp.match_hotp.
+        """
+        return self._match(OTPType.HOTP, code, counter - below, counter,
+                           counter + above, constant_time, search_order)
+
+    def check_hotp(self, code, counter, below=0, above=15,
+                   constant_time=True, search_order=SearchOrder.LINEAR):
+        """Check if the given HOTP code matches the given counter.
+
+        See pyotp.hotp.check_hotp.
+        """
+        return self.match_hotp(code, counter, below, above, constant_time,
+                               search_order) is not None
+
+    def resync_hotp(self, codes, counter, look_ahead=1000):
+        """Resynchronise a token's counter from consecutive codes.
+
+        See pyotp.hotp.resync_hotp.
+        """
+        if any(len(code) != self.length for code in codes):
+            return None
+
+        return resync_keyed(codes, self._digest, counter, look_ahead)
+
+    def match_totp(self, code, timestamp=None, grace_period=30, below=30,
+                   above=30, constant_time=True,
+                   search_order=SearchOrder.LINEAR):
+        """Find which time step the given TOTP code matches.
+
+        See pyotp.totp.match_totp.
+        """
+        start, center, end = totp_window(timestamp, grace_period, below,
+                                         above)
+        return self._match(OTPType.TOTP, code, start, center, end,
+                           constant_time, search_order)
+
+    def check_totp(self, code, timestamp=None, grace_period=30, below=30,
+                   above=30, constant_time=True,
+                   search_order=SearchOrder.LINEAR):
+        """Check if the given TOTP code matches the given timestamp.
+
+        See pyotp.totp.check_totp.
+        """
+        return self.match_totp(code, timestamp, grace_period, below, above,
+                               constant_time, search_order) is not None
@@ -0,0 +1,280 @@
+# Copyright (C) 2018 Elizabeth Myers. All rights reserved.
+# See the included LICENSE file for terms of distribution.
+
+
+"""Verification spread over worker processes, with secrets in shared memory.
+
+Threads can't run the short HMACs used for OTP codes in parallel, because of
+the GIL. ParallelVerifier instead runs a pool of worker processes. Secrets
+are loaded once into a SecretTable, a block of shared memory holding a fixed
+size record per token, which every worker maps rather than being sent its
+own copy. Each token is always handled by the same worker (its shard), so
+each worker only sets up the HMAC keys for its own share of the tokens.
+
+This module needs Python 3.8 or later, for multiprocessing.shared_memory.
+"""
+
+
+import os
+import struct
+
+from multiprocessing import get_context
+from multiprocessing.shared_memory import SharedMemory
+
+from pyotp.common import _digits_mod, find_keyed, prekey, window_order
+from pyotp.constants import HashAlgorithm, OTPType, SearchOrder
+from pyotp.totp import totp_window
+
+
+_algorithms = tuple(HashAlgorithm)
+_algorithm_ids = {algorithm: i for i, algorithm in enumerate(_algorithms)}
+
+
+class SecretTable:
+    """A table of OTP secrets in shared memory.
+
+    Each record holds a secret of up to MAX_SECRET bytes, its length, hash
+    algorithm, code length, and TOTP period. Tokens are identified by their
+    index in the table.
+
+    Use create() to make a new table, and attach() to map an existing one
+    by name from another process. The creator should unlink() it when done.
+    """
+
+    MAX_SECRET = 64
+
+    _RECORD = struct.Struct("<{}sBBBxI".format(MAX_SECRET))
+
+    def __init__(self, shm, count):
+        self.shm = shm
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    @classmethod
+    def create(cls, tokens):
+        """Create a table from a sequence of tokens.
+
+        Each token is a tuple of (secret, hash_algorithm, length,
+        grace_period).
+        """
+        size = cls._RECORD.size
+        shm = SharedMemory(create=True, size=max(1, len(tokens) * size))
+        try:
+            for i, (secret, hash_algorithm, length, period) in \
+                    enumerate(tokens):
+                if len(secret) > cls.MAX_SECRET:
+                    raise ValueError("secret {} is longer than {} "
+                                     "bytes".format(i, cls.MAX_SECRET))
+                if length not in _digits_mod:
+                    raise ValueError("invalid length for secret {}: "
+                                     "{}".format(i, length))
+                if period < 1:
+                    raise ValueError("invalid period for secret {}: "
+                                     "{}".format(i, period))
+
+                cls._RECORD.pack_into(shm.buf, i * size, secret, len(secret),
+                                      _algorithm_ids[hash_algorithm], length,
+                                      period)
+        except BaseException:
+            shm.close()
+            shm.unlink()
+            raise
+
+        return cls(shm, len(tokens))
+
+    @classmethod
+    def attach(cls, name, count):
+        """Map an existing table by name."""
+        return cls(SharedMemory(name), count)
+
+    def record(self, index):
+        """Return (secret, hash_algorithm, length, grace_period) for a token.
+
+        The secret is a memoryview into the shared memory, not a copy.
+        """
+        if not 0 <= index < self.count:
+            raise IndexError("token index out of range")
+
+        offset = index * self._RECORD.size
+        _, secret_len, algorithm_id, length, period = \
+            self._RECORD.unpack_from(self.shm.buf, offset)
+        secret = self.shm.buf[offset:offset+secret_len]
+        return secret, _algorithms[algorithm_id], length, period
+
+    def close(self):
+        """Unmap the table from this process."""
+        self.shm.close()
+
+    def unlink(self):
+        """Free the shared memory; call once, from the creating process."""
+        self.shm.unlink()
+
+
+def _check(table, keys, otp_type, index, code, value, below, above,
+           constant_time, search_order):
+    # Check one request in a worker, returning the matched offset or None.
+    # keys caches (digest function, length, period) per token.
+    key = keys.get(index)
+    if key is None:
+        secret, hash_algorithm, length, period = table.record(index)
+        # hmac needs the key as bytes; this is the one copy of it, made once
+        # per token per worker
+        digest = prekey(bytes(secret), hash_algorithm)
+        secret.release()
+        key = keys[index] = (digest, length, period)
+
+    digest, length, period = key
+    if len(code) != length:
+        return None
+
+    if otp_type is OTPType.TOTP:
+        start, center, end = totp_window(value, period, below, above)
+    else:
+        start, center, end = value - below, value, value + above
+
+    counters = window_order(start, end, center, search_order)
+    found = find_keyed(code, digest, counters, constant_time)
+    if found is None:
+        return None
+
+    return found - center
+
+
+def _worker(name, count, conn):
+    # Worker process main loop: receive batches of requests for this shard,
+    # and send back the results
+    table = SecretTable.attach(name, count)
+    keys = {}
+    try:
+        while True:
+            message = conn.recv()
+            if message is None:
+                break
+
+            otp_type, options, requests = message
+            results = []
+            for index, code, value in requests:
+                try:
+                    results.append(_check(table, keys, otp_type, index, code,
+                                          value, *options))
+                except Exception as e:
+                    # Whatever went wrong, it's this request's reply; the
+                    # worker carries on with the rest
+                    results.append(e)
+            conn.send(results)
+    finally:
+        keys.clear()
+        table.close()
+        conn.close()
+
+
+class ParallelVerifier:
+    """Verifies codes against a SecretTable on a pool of worker processes.
+
+    Requests are routed to workers by token index (index % workers). Use it
+    as a context manager, or call close() when done; the table is not
+    unlinked.
+    """
+
+    def __init__(self, table, workers=None, context=None):
+        self.table = table
+        self.workers = workers or os.cpu_count() or 1
+        context = context or get_context()
+
+        self._conns = []
+        self._processes = []
+        for _ in range(self.workers):
+            parent, child = context.Pipe()
+            process = context.Process(target=_worker,
+                                      args=(table.name, len(table), child),
+                                      daemon=True)
+            process.start()
+            child.close()
+            self._conns.append(parent)
+            self._processes.append(process)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _verify(self, otp_type, requests, options):
+        # Split requests into shards, remembering where each came from
+        shards = [([], []) for _ in range(self.workers)]
+        count = 0
+        for i, (index, code, value) in enumerate(requests):
+            if not isinstance(code, str):
+                code = bytes(code)
+            slots, batch = shards[index % self.workers]
+            slots.append(i)
+            batch.append((index, code, value))
+            count = i + 1
+
+        busy = []
+        for conn, (slots, batch) in zip(self._conns, shards):
+            if batch:
+                conn.send((otp_type, options, batch))
+                busy.append((conn, slots))
+
+        # Read every reply before raising, or unread replies would be taken
+        # as the answers to the next call's requests
+        results = [None] * count
+        error = None
+        for conn, slots in busy:
+            for slot, result in zip(slots, conn.recv()):
+                if isinstance(result, Exception):
+                    if error is None:
+                        error = result
+                    continue
+                results[slot] = result
+
+        if error is not None:
+            raise error
+
+        return results
+
+    def match_totp_many(self, requests, below=30, above=30,
+                        constant_time=True,
+                        search_order=SearchOrder.LINEAR):
+        """Check (token index, code, timestamp) requests for TOTP codes.
+
+        timestamp may be None for the current time. Each token's own hash
+        algorithm, length, and period from the table are used. Returns the
+        matched offset, or None, for each request in order; see
+        pyotp.totp.match_totp. Codes of the wrong length never match.
+        """
+        options = (below, above, constant_time, search_order)
+        return self._verify(OTPType.TOTP, requests, options)
+
+    def match_hotp_many(self, requests, below=0, above=15,
+                        constant_time=True,
+                        search_order=SearchOrder.LINEAR):
+        """Check (token index, code, counter) requests for HOTP codes.
+
+        Returns the matched offset, or None, for each request in order; see
+        pyotp.hotp.match_hotp.
+        """
+        options = (below, above, constant_time, search_order)
+        return self._verify(OTPType.HOTP, requests, options)
+
+    def close(self):
+        """Stop the worker processes."""
+        for conn in self._conns:
+            try:
+                conn.send(None)
+            except OSError:
+                pass
+            conn.close()
+
+        for process in self._processes:
+            process.join()
+
+        self._conns = []
+        self._processes = []
@@ -0,0 +1,289 @@
+# Copyright (C) 2018 Elizabeth Myers. All rights reserved.
+# See the included LICENSE file for terms of distribution.
+
+
+"""Computing TOTP codes for active users ahead of each time step.
+
+Logins bunch up right after each step rollover, which is also when every
+check has to compute fresh codes. Prewarmer remembers the secrets that have
+been checked recently, and shortly before each rollover computes their codes
+for the next step in the background, publishing them all at once when the
+step changes. Checks for those secrets are then lookups, with no HMACs.
+"""
+
+
+import logging
+
+from queue import Empty, Full, Queue
+from threading import Event, Lock, Thread
+from time import perf_counter, time
+
+from pyotp import common
+from pyotp.common import (find_keyed, keyed_codes_int, match_index,
+                          parse_code, prekey)
+from pyotp.constants import HashAlgorithm, OTPType
+from pyotp.totp import totp_window
+
+
+_log = logging.getLogger(__name__)
+
+
+class StepClock:
+    """The current TOTP time step, recomputed only at rollover.
+
+    clock is a function returning the time as a Unix timestamp; replace it
+    in tests.
+    """
+
+    def __init__(self, grace_period=30, clock=time):
+        self.grace_period = grace_period
+        self.clock = clock
+        self._step = None
+        self._next = None
+
+    def now(self):
+        """Return the current Unix timestamp as an integer."""
+        return int(self.clock())
+
+    def step(self):
+        """Return the current time step."""
+        now = self.clock()
+        if self._next is None or not self._next - self.grace_period <= \
+                now < self._next:
+            step = int(now) // self.grace_period
+            self._next = (step + 1) * self.grace_period
+            self._step = step
+
+        return self._step
+
+    def until_rollover(self):
+        """Return the seconds left until the next time step."""
+        self.step()
+        return self._next - self.clock()
+
+
+class Prewarmer:
+    """Checks TOTP codes from codes precomputed for recently active secrets.
+
+    All secrets share one length, grace period, hash algorithm, and window
+    (below and above, in seconds, as for pyotp.totp.check_totp). A secret
+    becomes active at the first tick after it is checked, and stays so until
+    it hasn't been checked for idle seconds. At most max_active secrets are
+    kept.
+
+    Call tick() regularly, or start() a thread that does. Each tick does at
+    most max_per_tick secrets' worth of work: filling in codes for secrets
+    that just became active, and, within lead seconds of a rollover, the
+    next step's codes. A secret whose codes aren't ready is checked the usual
+    way, so a small budget only costs lookups, not correctness.
+    """
+
+    def __init__(self, length=6, grace_period=30,
+                 hash_algorithm=HashAlgorithm.SHA1, below=30, above=30,
+                 clock=None, lead=2.0, idle=300, max_active=100000,
+                 max_per_tick=1000, interval=0.1):
+        self.length = length
+        self.grace_period = grace_period
+        self.hash_algorithm = hash_algorithm
+        self.below = below
+        self.above = above
+        self.clock = StepClock(grace_period) if clock is None else clock
+        self.lead = lead
+        self.idle = idle
+        self.max_active = max_active
+        self.max_per_tick = max_per_tick
+        self.interval = interval
+
+        # Steps either side of the current one that any window can reach
+        self._before = -(-below // grace_period)
+        self._after = -(-above // grace_period)
+
+        # secret -> time last checked; only changed by tick(), which learns
+        # of checks through _seen
+        self._active = {}
+        self._seen = Queue(max_active)
+        # Published codes: (step, {secret: codes from step - _before to
+        # step + _after})
+        self._current = (None, {})
+        # Codes for the next step, as they are computed
+        self._next = {}
+        self._pending = []
+        self._fill = []
+        self._lock = Lock()
+        self._stop = Event()
+        self._thread = None
+
+    def __len__(self):
+        return len(self._active)
+
+    def _window_codes(self, secret, step, previous=None):
+        # Codes for the window around step, shifting previous (the codes for
+        # step - 1) along by one if given
+        if previous is not None:
+            new = keyed_codes_int(prekey(secret, self.hash_algorithm),
+                                  self.length, (step + self._after,))
+            return previous[1:] + tuple(new)
+
+        return tuple(keyed_codes_int(prekey(secret, self.hash_algorithm),
+                                     self.length,
+                                     range(step - self._before,
+                                           step + self._after + 1)))
+
+    def match_totp(self, code, secret, timestamp=None, constant_time=True):
+        """Find which time step the given TOTP code matches.
+
+        Returns the offset in time steps, or None, as pyotp.totp.match_totp
+        does. Codes of a different length never match.
+        """
+        stats = common._stats
+        if stats is not None:
+            started = perf_counter()
+
+        if timestamp is None:
+            timestamp = self.clock.now()
+
+        # Tell tick() about new secrets, and refresh active ones well before
+        # they go idle; if it has fallen that far behind, skip it
+        last = self._active.get(secret)
+        if last is None or timestamp - last > self.idle / 2:
+            try:
+                self._seen.put_nowait((secret, timestamp))
+            except Full:
+                pass
+
+        start, center, end = totp_window(timestamp, self.grace_period,
+                                         self.below, self.above)
+        counters = range(start, end+1)
+        parsed = parse_code(code)
+        if parsed is None or parsed[1] != self.length:
+            found = None
+            cached = parsed is not None
+        else:
+            step, published = self._current
+            codes = published.get(secret)
+            first = None if step is None else step - self._before
+            cached = (codes is not None and first <= start and
+                      end < first + len(codes))
+            if cached:
+                index = match_index(parsed[0],
+                                    codes[start-first:end-first+1],
+                                    constant_time)
+                found = None if index is None else start + index
+            else:
+                found = find_keyed(code, prekey(secret, self.hash_algorithm),
+                                   counters, constant_time)
+
+        if stats is not None:
+            stats.record(OTPType.TOTP, code, counters, center, found,
+                         constant_time, cached, False, started)
+
+        if found is None:
+            return None
+
+        return found - center
+
+    def check_totp(self, code, secret, timestamp=None, constant_time=True):
+        """Check if the given TOTP code matches.
+
+        See match_totp.
+        """
+        return self.match_totp(code, secret, timestamp,
+                               constant_time) is not None
+
+    def tick(self):
+        """Do one bounded round of work.
+
+        Returns the number of seconds until there is more work to do.
+        """
+        with self._lock:
+            while True:
+                try:
+                    secret, seen = self._seen.get_nowait()
+                except Empty:
+                    break
+
+                last = self._active.get(secret)
+                if last is not None:
+                    self._active[secret] = max(last, seen)
+                elif len(self._active) < self.max_active:
+                    self._active[secret] = seen
+                    self._fill.append(secret)
+
+            step = self.clock.step()
+            current, published = self._current
+
+            if step != current:
+                # Publish whatever is ready for the new step, and forget
+                # secrets that have gone idle
+                ready = self._next if current is not None and \
+                    step == current + 1 else {}
+                cutoff = self.clock.now() - self.idle
+                idle = [secret for secret, last in list(self._active.items())
+                        if last < cutoff]
+                for secret in idle:
+                    del self._active[secret]
+                    ready.pop(secret, None)
+
+                self._current = (step, ready)
+                published = ready
+                self._next = {}
+                self._pending = []
+                self._fill = [secret for secret in self._active
+                              if secret not in ready]
+
+            budget = self.max_per_tick
+
+            # Secrets newly active, or left out of the last rollover
+            while self._fill and budget:
+                secret = self._fill.pop()
+                if secret not in published and secret in self._active:
+                    published[secret] = self._window_codes(secret, step)
+                    budget -= 1
+
+            until = self.clock.until_rollover()
+            if until <= self.lead:
+                if not self._next and not self._pending:
+                    self._pending = list(self._active)
+
+                while self._pending and budget:
+                    secret = self._pending.pop()
+                    self._next[secret] = self._window_codes(
+                        secret, step + 1, published.get(secret))
+                    budget -= 1
+
+            if self._fill or (self._pending and until <= self.lead):
+                return 0
+
+            if until > self.lead:
+                return until - self.lead
+
+            return until
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                delay = self.tick()
+            except Exception:
+                # Keep prewarming; checks fall back to computing codes
+                _log.exception("prewarm tick failed")
+                delay = self.interval
+            self._stop.wait(min(delay, self.interval))
+
+    def start(self):
+        """Start a background thread calling tick()."""
+        if self._thread is not None:
+            return
+
+        self._stop.clear()
+        self._thread = Thread(target=self._run, name="pyotp-prewarm",
+                              daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the background thread."""
+        if self._thread is None:
+            return
+
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
@@ -0,0 +1,189 @@
+# Copyright (C) 2018 Elizabeth Myers. All rights reserved.
+# See the included LICENSE file for terms of distribution.
+
+
+"""Streaming import of PSKC (RFC 6030) token seed files.
+
+Hardware token vendors ship secrets as PSKC XML, one KeyPackage element per
+token. parse_pskc reads such a file incrementally with
+xml.etree.ElementTree.iterparse, and throws away each KeyPackage once it has
+been turned into a record, so memory use doesn't grow with the file.
+
+Only plain (unencrypted) secrets are supported. Files with encrypted
+secrets must be decrypted with the vendor's tools first.
+"""
+
+
+import binascii
+
+from collections import namedtuple
+from xml.etree.ElementTree import iterparse
+
+from pyotp.common import _digits_mod
+from pyotp.constants import HashAlgorithm, OTPType
+
+
+PSKCKey = namedtuple("PSKCKey", (
+    "key_id",
+    "serial",
+    "issuer",
+    "user_id",
+    "otp_type",
+    "secret",
+    "hash_algorithm",
+    "length",
+    "grace_period",
+    "counter",
+))
+PSKCKey.__doc__ = """A token from a PSKC file.
+
+key_id is the Key element's Id, and serial the device serial number; either
+may be None, as may issuer and user_id. otp_type is an OTPType, secret is the
+raw secret bytes, hash_algorithm is a HashAlgorithm, length is the number of
+digits, and grace_period is the TOTP period in seconds. counter is the HOTP
+counter (None for TOTP).
+"""
+
+
+_algorithms = {
+    "urn:ietf:params:xml:ns:keyprov:pskc:hotp": OTPType.HOTP,
+    "urn:ietf:params:xml:ns:keyprov:pskc#hotp": OTPType.HOTP,
+    "urn:ietf:params:xml:ns:keyprov:pskc:totp": OTPType.TOTP,
+    "urn:ietf:params:xml:ns:keyprov:pskc#totp": OTPType.TOTP,
+}
+
+_suites = {
+    "HMAC-SHA1": HashAlgorithm.SHA1,
+    "HMAC-SHA256": HashAlgorithm.SHA256,
+    "HMAC-SHA512": HashAlgorithm.SHA512,
+}
+
+
+def _local(tag):
+    # Strip the namespace from an element tag
+    return tag.rpartition("}")[2]
+
+
+def _child(elem, *path):
+    # Follow a path of local element names down from elem, or return None
+    for name in path:
+        if elem is None:
+            return None
+        elem = next((child for child in elem if _local(child.tag) == name),
+                    None)
+
+    return elem
+
+
+def _text(elem, *path):
+    elem = _child(elem, *path)
+    if elem is None or elem.text is None:
+        return None
+
+    return elem.text.strip()
+
+
+def _int_value(data, name, default):
+    # Integer PlainValue of a Data child
+    value = _text(data, name, "PlainValue")
+    if value is None:
+        if _child(data, name, "EncryptedValue") is not None:
+            raise ValueError("encrypted {} is not supported".format(name))
+        return default
+
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError("{} is not an integer: {!r}".format(
+            name, value)) from None
+
+
+def _parse_package(package):
+    # Turn a KeyPackage element into a PSKCKey, or raise ValueError
+    key = _child(package, "Key")
+    if key is None:
+        raise ValueError("KeyPackage has no Key")
+
+    algorithm = key.get("Algorithm", "")
+    otp_type = _algorithms.get(algorithm.lower())
+    if otp_type is None:
+        raise ValueError("unsupported algorithm: {!r}".format(algorithm))
+
+    params = _child(key, "AlgorithmParameters")
+    suite = _text(params, "Suite") or "HMAC-SHA1"
+    hash_algorithm = _suites.get(suite.upper())
+    if hash_algorithm is None:
+        raise ValueError("unsupported suite: {!r}".format(suite))
+
+    length = 6
+    response = _child(params, "ResponseFormat")
+    if response is not None:
+        if response.get("Encoding", "DECIMAL").upper() != "DECIMAL":
+            raise ValueError("unsupported response encoding: {!r}".format(
+                response.get("Encoding")))
+        try:
+            length = int(response.get("Length", "6"))
+        except ValueError:
+            raise ValueError("response length is not an integer") from None
+        if length not in _digits_mod:
+            raise ValueError("response length out of range: {}".format(
+                length))
+
+    data = _child(key, "Data")
+    secret = _text(data, "Secret", "PlainValue")
+    if secret is None:
+        if _child(data, "Secret", "EncryptedValue") is not None:
+            raise ValueError("encrypted secrets are not supported")
+        raise ValueError("missing secret")
+    try:
+        secret = binascii.a2b_base64(secret)
+    except binascii.Error:
+        raise ValueError("secret is not valid base64") from None
+
+    if otp_type is OTPType.HOTP:
+        counter = _int_value(data, "Counter", 0)
+        grace_period = 30
+    else:
+        counter = None
+        grace_period = _int_value(data, "TimeInterval", 30)
+        if grace_period < 1:
+            raise ValueError("time interval must be positive")
+        if _int_value(data, "Time", 0) != 0:
+            raise ValueError("a time origin other than 0 is not supported")
+
+    return PSKCKey(key.get("Id"), _text(package, "DeviceInfo", "SerialNo"),
+                   _text(key, "Issuer"), _text(key, "UserId"), otp_type,
+                   secret, hash_algorithm, length, grace_period, counter)
+
+
+def parse_pskc(source):
+    """Parse a PSKC file, one KeyPackage at a time.
+
+    source is a filename or a binary file object. This is a generator
+    yielding (number, record, error) for each KeyPackage, numbered from 1.
+    record is a PSKCKey, or None if the package couldn't be used, in which
+    case error says why. Malformed XML raises
+    xml.etree.ElementTree.ParseError.
+    """
+    number = 0
+    root = None
+    for event, elem in iterparse(source, events=("start", "end")):
+        if event == "start":
+            if root is None:
+                root = elem
+            continue
+
+        if _local(elem.tag) != "KeyPackage":
+            continue
+
+        number += 1
+        try:
+            record, error = _parse_package(elem), None
+        except ValueError as e:
+            record, error = None, str(e)
+
+        # Drop the finished package, and the reference the root keeps to it
+        elem.clear()
+        root.clear()
+
+        yield number, record, error
@@ -0,0 +1,202 @@
+# Copyright (C) 2018 Elizabeth Myers. All rights reserved.
+# See the included LICENSE file for terms of distribution.
+
+
+"""Stores that stop an OTP code from being accepted more than once.
+
+A replay store remembers the last time step (TOTP) or counter (HOTP) used by
+each key, where a key is whatever identifies the user or token to you. Pass a
+store and a key as the replay and replay_key arguments of
+pyotp.totp.check_totp or pyotp.hotp.check_hotp, and a matching code is only
+accepted if its step is newer than the last one accepted for that key.
+"""
+
+
+import sqlite3
+
+from collections import OrderedDict
+from threading import Lock
+from time import monotonic, time
+
+
+class ReplayStore:
+    """Base class for replay stores."""
+
+    def reserve(self, key, step, ttl=None):
+        """Atomically record step as used for key.
+
+        Returns True if step is newer than the last step recorded for key (or
+        there is none), and False if it is a replay.
+
+        If ttl is not None, the record may be forgotten after ttl seconds. Use
+        a TTL only where the step can no longer be accepted by then anyway.
+        """
+        raise NotImplementedError
+
+    def reserve_many(self, items, ttl=None):
+        """Reserve each (key, step) in items, returning a list of results."""
+        return [self.reserve(key, step, ttl) for key, step in items]
+
+    def close(self):
+        """Release any resources held by the store."""
+
+
+class MemoryReplayStore(ReplayStore):
+    """A bounded in-memory replay store.
+
+    Keys are spread over stripes, each with its own lock, so threads
+    reserving different keys rarely contend. Each stripe holds at most
+    maxsize // stripes keys; records past their TTL are dropped first, then
+    the least recently updated ones.
+
+    Beware that a record dropped to stay within maxsize can be replayed, so
+    size the store for the number of keys active within one TTL.
+    """
+
+    def __init__(self, maxsize=1048576, stripes=64, clock=monotonic):
+        self.maxsize = maxsize
+        self.clock = clock
+        self.evictions = 0
+        self._stripe_size = max(1, maxsize // stripes)
+        self._stripes = [(Lock(), OrderedDict()) for _ in range(stripes)]
+
+    def __len__(self):
+        return sum(len(records) for _, records in self._stripes)
+
+    def reserve(self, key, step, ttl=None):
+        lock, records = self._stripes[hash(key) % len(self._stripes)]
+        with lock:
+            now = self.clock()
+            record = records.get(key)
+            if record is not None:
+                last, expires = record
+                if step <= last and (expires is None or expires > now):
+                    return False
+
+            records[key] = (step, None if ttl is None else now + ttl)
+            records.move_to_end(key)
+
+            # Records are in order of last update, so expired ones collect at
+            # the front
+            while records:
+                expires = next(iter(records.values()))[1]
+                if expires is None or expires > now:
+                    break
+                records.popitem(last=False)
+
+            while len(records) > self._stripe_size:
+                records.popitem(last=False)
+                self.evictions += 1
+
+            return True
+
+    def clear(self):
+        """Forget all records."""
+        for lock, records in self._stripes:
+            with lock:
+                records.clear()
+
+
+class SQLiteReplayStore(ReplayStore):
+    """A replay store kept in an SQLite database.
+
+    The database is put in WAL mode, and every reservation is a single
+    prepared upsert. Writes are committed in batches: after batch_size
+    reservations, or when a reservation comes more than max_delay seconds
+    after the last commit, or on flush() or close(). Reservations are atomic
+    within this object, but other connections to the same database only see
+    them once committed, and uncommitted ones are lost on a crash. Use
+    batch_size=1 if several processes share the database.
+
+    It is safe to share between threads.
+    """
+
+    _UPSERT = (
+        "INSERT INTO pyotp_replay (key, step, expires) VALUES (?, ?, ?) "
+        "ON CONFLICT (key) DO UPDATE "
+        "SET step = excluded.step, expires = excluded.expires "
+        "WHERE excluded.step > pyotp_replay.step "
+        "OR pyotp_replay.expires < ?"
+    )
+
+    def __init__(self, path, batch_size=256, max_delay=0.1,
+                 purge_interval=60.0):
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self.purge_interval = purge_interval
+        self._lock = Lock()
+        self._pending = 0
+        self._last_commit = monotonic()
+        self._last_purge = self._last_commit
+
+        self._conn = sqlite3.connect(path, isolation_level=None,
+                                     check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute("PRAGMA synchronous = NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS pyotp_replay ("
+            "key TEXT PRIMARY KEY, step INTEGER NOT NULL, expires REAL"
+            ") WITHOUT ROWID")
+        self._cursor = self._conn.cursor()
+
+    def _reserve(self, key, step, ttl, now):
+        # Must be called with the lock held
+        if not self._pending:
+            self._cursor.execute("BEGIN")
+
+        expires = None if ttl is None else now + ttl
+        self._cursor.execute(self._UPSERT, (key, step, expires, now))
+        self._pending += 1
+
+        return self._cursor.rowcount == 1
+
+    def _maybe_commit(self):
+        # Must be called with the lock held
+        clock = monotonic()
+        if (self._pending >= self.batch_size or
+                clock - self._last_commit >= self.max_delay):
+            self._commit(clock)
+
+        if clock - self._last_purge >= self.purge_interval:
+            self._purge(clock)
+
+    def _commit(self, clock):
+        if self._pending:
+            self._cursor.execute("COMMIT")
+            self._pending = 0
+        self._last_commit = clock
+
+    def _purge(self, clock):
+        self._commit(clock)
+        self._cursor.execute("DELETE FROM pyotp_replay WHERE expires < ?",
+                             (time(),))
+        self._last_purge = clock
+
+    def reserve(self, key, step, ttl=None):
+        with self._lock:
+            result = self._reserve(key, step, ttl, time())
+            self._maybe_commit()
+            return result
+
+    def reserve_many(self, items, ttl=None):
+        with self._lock:
+            now = time()
+            results = [self._reserve(key, step, ttl, now)
+                       for key, step in items]
+            self._maybe_commit()
+            return results
+
+    def flush(self):
+        """Commit any pending reservations."""
+        with self._lock:
+            self._commit(monotonic())
+
+    def purge(self):
+        """Commit pending reservations and delete expired records."""
+        with self._lock:
+            self._purge(monotonic())
+
+    def close(self):
+        with self._lock:
+            self._commit(monotonic())
+            self._conn.close()
@@ -2,10 +2,13 @@
 # See the included LICENSE file for terms of distribution.
 
 import base64
+import binascii
+import csv
+import json
 
 from secrets import token_bytes
 
-from pyotp.constants import SecretEncoding, SecretLength
+from pyotp.constants import ExportFormat, SecretEncoding, SecretLength
 
 
 # Map constants to encoding algorithms
@@ -18,9 +21,61 @@ _encoding_map = {
 }
 
 
+# Encodings whose output can be sliced per secret when a whole run of secrets
+# is encoded at once, given as (input bytes, output bytes) per group. Ascii85
+# isn't here because it encodes zero groups as a single "z".
+_encoding_groups = {
+    SecretEncoding.BASE32: (5, 8),
+    SecretEncoding.BASE64_STD: (3, 4),
+    SecretEncoding.BASE64_URLSAFE: (3, 4),
+    SecretEncoding.BASE85: (4, 5),
+}
+
+
+# Translates the base32 alphabet, in either case, to the digits int() uses for
+# base 32 (0-9, a-v). Everything else becomes "!", which int() rejects.
+_b32_table = bytearray(b"!" * 256)
+for _char, _digit in zip(b"ABCDEFGHIJKLMNOPQRSTUVWXYZ234567",
+                         b"0123456789abcdefghijklmnopqrstuv"):
+    _b32_table[_char] = _digit
+    _b32_table[_char | 0x20] = _digit  # Lowercase; no effect on 2-7
+_b32_table = bytes(_b32_table)
+del _char, _digit
+
+
+def _b32decode(secret):
+    # Tolerant base32 decoder: case-insensitive, padding optional, whitespace
+    # ignored. Gives the same result as base64.b32decode on valid input, but
+    # lets int() do the work in one go rather than eight characters at a time.
+    if isinstance(secret, str):
+        try:
+            secret = secret.encode("ascii")
+        except UnicodeEncodeError:
+            raise ValueError("string argument should contain only ASCII "
+                             "characters") from None
+    elif not isinstance(secret, bytes):
+        secret = bytes(secret)
+
+    secret = secret.translate(None, b" \t\r\n\v\f").rstrip(b"=")
+    length = len(secret)
+    if length % 8 in (1, 3, 6):
+        raise binascii.Error("Incorrect padding")
+    elif not length:
+        return b""
+
+    try:
+        value = int(secret.translate(_b32_table), 32)
+    except ValueError:
+        raise binascii.Error("Non-base32 digit found") from None
+
+    # Drop the bits left over from the last character
+    size = length * 5 // 8
+    return (value >> (length * 5 - size * 8)).to_bytes(size, "big")
+
+
 # Same as above, but for decoding
 _decoding_map = {
-    SecretEncoding.BASE32: base64.b32decode,
+    SecretEncoding.BASE32: _b32decode,
     SecretEncoding.BASE64_STD: base64.standard_b64decode,
     SecretEncoding.BASE64_URLSAFE: base64.urlsafe_b64decode,
     SecretEncoding.ASCII85: base64.a85decode,
@@ -36,11 +91,96 @@ def make_secret(length=SecretLength.GOOGLE_AUTH):
     return token_bytes(length)
 
 
+def make_secrets(count, length=SecretLength.GOOGLE_AUTH, encoding=None,
+                 chunk_size=65536):
+    """Generate count secrets of the given byte length.
+
+    This is a generator. If encoding is None, each secret is yielded as bytes;
+    otherwise it is yielded encoded with that encoding, as from encode_secret.
+
+    Random bytes are read from the OS in chunks of about chunk_size bytes.
+    Where the secret length is a whole number of the encoding's groups (say,
+    a multiple of 5 bytes for base32), each chunk is encoded in one call and
+    the output sliced up, rather than encoding every secret separately.
+    """
+    if hasattr(length, "value"):
+        length = length.value
+
+    per_chunk = max(1, chunk_size // length)
+    encode = None if encoding is None else _encoding_map[encoding]
+    out_length = None
+    group = _encoding_groups.get(encoding)
+    if group is not None and length % group[0] == 0:
+        out_length = length // group[0] * group[1]
+
+    while count > 0:
+        batch = min(count, per_chunk)
+        count -= batch
+        chunk = token_bytes(batch * length)
+
+        if encode is None:
+            view = memoryview(chunk)
+            for i in range(0, batch * length, length):
+                yield bytes(view[i:i+length])
+        elif out_length is not None:
+            encoded = encode(chunk)
+            for i in range(0, batch * out_length, out_length):
+                yield encoded[i:i+out_length]
+        else:
+            view = memoryview(chunk)
+            for i in range(0, batch * length, length):
+                yield encode(view[i:i+length])
+
+
+def write_secrets(fileobj, secrets, fmt=ExportFormat.CSV, start=0,
+                  batch_size=4096):
+    """Write encoded secrets to a text file, numbering them from start.
+
+    secrets is an iterable of encoded secrets (str or ASCII bytes), such as
+    from make_secrets with an encoding. fmt is an ExportFormat; CSV has a
+    header row of id,secret, and JSONL has an object with id and secret keys
+    per line.
+
+    Secrets are written batch_size at a time and never all held in memory, so
+    this works with a make_secrets generator of any size. Returns the number
+    of secrets written.
+    """
+    if fmt is ExportFormat.CSV:
+        writer = csv.writer(fileobj, lineterminator="\n")
+        writer.writerow(("id", "secret"))
+        flush = writer.writerows
+    else:
+        def flush(rows):
+            fileobj.write("".join(
+                json.dumps({"id": n, "secret": s}) + "\n" for n, s in rows))
+
+    written = 0
+    rows = []
+    for n, secret in enumerate(secrets, start):
+        if not isinstance(secret, str):
+            secret = secret.decode("ascii")
+        rows.append((n, secret))
+        if len(rows) >= batch_size:
+            flush(rows)
+            written += len(rows)
+            rows = []
+
+    if rows:
+        flush(rows)
+        written += len(rows)
+
+    return written
+
+
 def encode_secret(secret, encoding=SecretEncoding.BASE32):
     """Encode a secret with the given encoding."""
     return _encoding_map[encoding](secret)
 
 
 def decode_secret(secret, encoding=SecretEncoding.BASE32):
-    """Decode a secret with the given encoding."""
+    """Decode a secret with the given encoding.
+
+    Base32 decoding is lenient about what users and authenticator apps send:
+    lowercase, missing padding, and whitespace are all accepted.
+    """
     return _decoding_map[encoding](secret)
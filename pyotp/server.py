@@ -0,0 +1,447 @@
+# Copyright (C) 2018 Elizabeth Myers. All rights reserved.
+# See the included LICENSE file for terms of distribution.
+
+
+"""A local verification daemon and its client.
+
+Running one daemon per host, rather than checking codes in every worker
+process, means one code cache and one replay store shared by all of them.
+Start it with:
+
+    python -m pyotp.server --unix /run/pyotp.sock
+
+and check codes with Client. The protocol is length-prefixed binary frames;
+requests can be pipelined, and each frame carries a batch of checks.
+
+Protocol
+--------
+
+All integers are big-endian. Each frame is a 4 byte length followed by that
+many bytes of body.
+
+A request body is a 4 byte request ID and a 2 byte item count, followed by
+that many items. Each item is:
+
+    type (1 byte): 0 for TOTP, 1 for HOTP
+    algorithm (1 byte): 0 for SHA1, 1 for SHA256, 2 for SHA512
+    period (2 bytes): TOTP period in seconds
+    below, above (4 bytes each): as for check_totp/check_hotp
+    value (8 bytes, signed): timestamp (TOTP, -1 for now) or counter (HOTP)
+    code, secret, and replay key lengths (1 byte each)
+    code, secret, and replay key
+
+The replay key may be empty, in which case replays aren't checked.
+
+A response body is the request ID, the item count, and for each item a
+1 byte status (0 no match, 1 match, 2 error) and a 4 byte signed value: the
+matched offset, or for errors, an error code (see the ERROR_* constants).
+Responses on a connection come back in the order their requests were sent.
+"""
+
+
+import asyncio
+import struct
+
+from argparse import ArgumentParser
+from itertools import count
+
+from pyotp.cache import CodeCache
+from pyotp.constants import HashAlgorithm, OTPType
+from pyotp.hotp import match_hotp
+from pyotp.replay import MemoryReplayStore, SQLiteReplayStore
+from pyotp.totp import match_totp
+
+
+_LENGTH = struct.Struct(">I")
+_HEADER = struct.Struct(">IH")
+_ITEM = struct.Struct(">BBHIIqBBB")
+_RESULT = struct.Struct(">Bi")
+
+STATUS_FAIL = 0
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+ERROR_MALFORMED = 1
+"""The item couldn't be decoded."""
+
+ERROR_INVALID = 2
+"""The item had an invalid value, such as an unknown algorithm."""
+
+ERROR_INTERNAL = 3
+"""The check raised an unexpected exception."""
+
+ERROR_WINDOW = 4
+"""below or above was larger than the server allows."""
+
+# Default for Server's cache argument, since None turns the cache off
+_DEFAULT_CACHE = object()
+
+_types = (OTPType.TOTP, OTPType.HOTP)
+_type_ids = {otp_type: i for i, otp_type in enumerate(_types)}
+_algorithms = tuple(HashAlgorithm)
+_algorithm_ids = {algorithm: i for i, algorithm in enumerate(_algorithms)}
+
+
+def _ascii(s):
+    return s.encode("ascii") if isinstance(s, str) else bytes(s)
+
+
+def encode_item(otp_type, code, secret, value=None,
+                hash_algorithm=HashAlgorithm.SHA1, grace_period=30, below=30,
+                above=30, replay_key=None):
+    """Encode one check as a request item; see the module docstring."""
+    code = _ascii(code)
+    if replay_key is None:
+        replay_key = b""
+    elif isinstance(replay_key, str):
+        replay_key = replay_key.encode("utf-8")
+
+    return b"".join((
+        _ITEM.pack(_type_ids[otp_type], _algorithm_ids[hash_algorithm],
+                   grace_period, below, above, -1 if value is None else value,
+                   len(code), len(secret), len(replay_key)),
+        code, secret, replay_key))
+
+
+def encode_request(request_id, items):
+    """Encode a framed request from a list of encoded items."""
+    body = _HEADER.pack(request_id, len(items)) + b"".join(items)
+    return _LENGTH.pack(len(body)) + body
+
+
+def decode_response(body):
+    """Decode a response body into its request ID and (status, value)s."""
+    request_id, item_count = _HEADER.unpack_from(body)
+    results = [_RESULT.unpack_from(body, _HEADER.size + i * _RESULT.size)
+               for i in range(item_count)]
+    return request_id, results
+
+
+class Server:
+    """Serves verification requests.
+
+    cache is a pyotp.cache.CodeCache shared by all TOTP checks (a new one
+    by default; pass None to disable), and replay is an optional
+    pyotp.replay.ReplayStore, used for items with a replay key. Checks are
+    always constant time.
+
+    Checks run on the event loop, in order, as frames arrive; they are short,
+    and running them inline avoids executor hand-offs. To keep them short,
+    items asking for a below or above larger than max_totp_window seconds
+    (TOTP) or max_hotp_window counters (HOTP) get an ERROR_WINDOW reply.
+    Frames larger than max_frame bytes close the connection.
+    """
+
+    def __init__(self, cache=_DEFAULT_CACHE, replay=None, max_frame=1 << 20,
+                 max_totp_window=600, max_hotp_window=100):
+        self.cache = CodeCache() if cache is _DEFAULT_CACHE else cache
+        self.replay = replay
+        self.max_frame = max_frame
+        self.max_totp_window = max_totp_window
+        self.max_hotp_window = max_hotp_window
+
+    def _check(self, item, view, pos):
+        (type_id, algorithm_id, grace_period, below, above, value, code_len,
+         secret_len, key_len) = item
+
+        code = view[pos:pos+code_len]
+        pos += code_len
+        secret = bytes(view[pos:pos+secret_len])
+        pos += secret_len
+        replay_key = bytes(view[pos:pos+key_len]) if key_len else None
+
+        try:
+            otp_type = _types[type_id]
+            hash_algorithm = _algorithms[algorithm_id]
+        except IndexError:
+            return STATUS_ERROR, ERROR_INVALID
+
+        if otp_type is OTPType.TOTP:
+            max_window = self.max_totp_window
+        else:
+            max_window = self.max_hotp_window
+        if below > max_window or above > max_window:
+            return STATUS_ERROR, ERROR_WINDOW
+
+        replay = self.replay if replay_key is not None else None
+        try:
+            if otp_type is OTPType.TOTP:
+                if grace_period == 0:
+                    return STATUS_ERROR, ERROR_INVALID
+                offset = match_totp(code, secret,
+                                    None if value < 0 else value,
+                                    grace_period, hash_algorithm, below,
+                                    above, cache=self.cache, replay=replay,
+                                    replay_key=replay_key)
+            else:
+                offset = match_hotp(code, secret, value, hash_algorithm,
+                                    below, above, replay=replay,
+                                    replay_key=replay_key)
+        except (KeyError, ValueError):
+            # Bad code length and the like
+            return STATUS_ERROR, ERROR_INVALID
+        except Exception:
+            return STATUS_ERROR, ERROR_INTERNAL
+
+        if offset is None:
+            return STATUS_FAIL, 0
+
+        return STATUS_OK, offset
+
+    def handle_request(self, body):
+        """Handle a request body, returning the framed response."""
+        view = memoryview(body)
+        try:
+            request_id, item_count = _HEADER.unpack_from(view)
+        except struct.error:
+            return None
+
+        pos = _HEADER.size
+        out = [_HEADER.pack(request_id, item_count)]
+        for _ in range(item_count):
+            try:
+                item = _ITEM.unpack_from(view, pos)
+            except struct.error:
+                result = (STATUS_ERROR, ERROR_MALFORMED)
+            else:
+                pos += _ITEM.size
+                end = pos + item[6] + item[7] + item[8]
+                if end > len(view):
+                    result = (STATUS_ERROR, ERROR_MALFORMED)
+                else:
+                    result = self._check(item, view, pos)
+                pos = end
+            out.append(_RESULT.pack(*result))
+
+        response = b"".join(out)
+        return _LENGTH.pack(len(response)) + response
+
+    async def handle_connection(self, reader, writer):
+        """Serve requests from one connection until it closes."""
+        try:
+            while True:
+                (length,) = _LENGTH.unpack(await reader.readexactly(4))
+                if length > self.max_frame:
+                    break
+
+                response = self.handle_request(
+                    await reader.readexactly(length))
+                if response is None:
+                    break
+                writer.write(response)
+
+                # Let pipelined requests pile up responses, within reason
+                if writer.transport.get_write_buffer_size() > 65536:
+                    await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def start_unix(self, path):
+        """Listen on a Unix domain socket; returns the asyncio server."""
+        return await asyncio.start_unix_server(self.handle_connection, path)
+
+    async def start_tcp(self, host="127.0.0.1", port=0):
+        """Listen on a TCP port; returns the asyncio server."""
+        return await asyncio.start_server(self.handle_connection, host, port)
+
+
+class _Connection:
+    # One pooled client connection, with a task matching responses to their
+    # requests
+
+    def __init__(self, reader, writer):
+        self.writer = writer
+        self.futures = {}
+        self.task = asyncio.ensure_future(self._read(reader))
+
+    async def _read(self, reader):
+        error = None
+        try:
+            while True:
+                (length,) = _LENGTH.unpack(await reader.readexactly(4))
+                request_id, results = decode_response(
+                    await reader.readexactly(length))
+                future = self.futures.pop(request_id, None)
+                if future is not None and not future.done():
+                    future.set_result(results)
+        except Exception as e:
+            error = e
+        finally:
+            for future in self.futures.values():
+                if not future.done():
+                    future.set_exception(ConnectionError(
+                        "connection to server lost: {!r}".format(error)))
+            self.futures.clear()
+
+    def send(self, request_id, frame):
+        future = asyncio.get_running_loop().create_future()
+        self.futures[request_id] = future
+        self.writer.write(frame)
+        return future
+
+    def close(self):
+        self.writer.close()
+        self.task.cancel()
+
+
+class Client:
+    """A client for Server, with a pool of pipelined connections.
+
+    Connect over a Unix socket with path, or over TCP with host and port.
+    Up to pool_size connections are opened as needed and requests are spread
+    across them; any number of requests can be outstanding on each.
+    """
+
+    def __init__(self, path=None, host="127.0.0.1", port=None, pool_size=4):
+        self.path = path
+        self.host = host
+        self.port = port
+        self.pool_size = pool_size
+        self._connections = []
+        self._next = 0
+        self._ids = count()
+
+    async def _connect(self):
+        if self.path is not None:
+            reader, writer = await asyncio.open_unix_connection(self.path)
+        else:
+            reader, writer = await asyncio.open_connection(self.host,
+                                                           self.port)
+        return _Connection(reader, writer)
+
+    @staticmethod
+    def _alive(connecting):
+        # Whether a connection (or its connection attempt) is still usable
+        if not connecting.done():
+            return True
+        elif connecting.cancelled() or connecting.exception() is not None:
+            return False
+
+        return not connecting.result().task.done()
+
+    async def _connection(self):
+        # Connections are kept as tasks, so that requests arriving while one
+        # is being opened wait for it rather than opening more
+        self._connections = [c for c in self._connections if self._alive(c)]
+        if len(self._connections) < self.pool_size:
+            connecting = asyncio.ensure_future(self._connect())
+            self._connections.append(connecting)
+        else:
+            self._next = (self._next + 1) % len(self._connections)
+            connecting = self._connections[self._next]
+
+        return await connecting
+
+    async def request(self, items):
+        """Send encoded items as one request; returns (status, value)s."""
+        request_id = next(self._ids) & 0xFFFFFFFF
+        connection = await self._connection()
+        return await connection.send(request_id,
+                                     encode_request(request_id, items))
+
+    @staticmethod
+    def _result(result):
+        status, value = result
+        if status == STATUS_ERROR:
+            raise ValueError("server error {}".format(value))
+        return value if status == STATUS_OK else None
+
+    async def match_totp(self, code, secret, timestamp=None, grace_period=30,
+                         hash_algorithm=HashAlgorithm.SHA1, below=30,
+                         above=30, replay_key=None):
+        """Like pyotp.totp.match_totp, checked by the server."""
+        item = encode_item(OTPType.TOTP, code, secret, timestamp,
+                           hash_algorithm, grace_period, below, above,
+                           replay_key)
+        return self._result((await self.request([item]))[0])
+
+    async def check_totp(self, code, secret, timestamp=None, **kwargs):
+        """Like pyotp.totp.check_totp, checked by the server."""
+        return await self.match_totp(code, secret, timestamp,
+                                     **kwargs) is not None
+
+    async def match_hotp(self, code, secret, counter,
+                         hash_algorithm=HashAlgorithm.SHA1, below=0,
+                         above=15, replay_key=None):
+        """Like pyotp.hotp.match_hotp, checked by the server."""
+        item = encode_item(OTPType.HOTP, code, secret, counter,
+                           hash_algorithm, 30, below, above, replay_key)
+        return self._result((await self.request([item]))[0])
+
+    async def check_hotp(self, code, secret, counter, **kwargs):
+        """Like pyotp.hotp.check_hotp, checked by the server."""
+        return await self.match_hotp(code, secret, counter,
+                                     **kwargs) is not None
+
+    async def verify_many(self, items):
+        """Check many encoded items (see encode_item) in one request.
+
+        Returns the matched offset, or None, for each item in order. Raises
+        ValueError if the server reports an error for any item.
+        """
+        results = []
+        # Item counts are 16 bit
+        for i in range(0, len(items), 65535):
+            response = await self.request(items[i:i+65535])
+            results.extend(self._result(result) for result in response)
+
+        return results
+
+    async def close(self):
+        """Close all connections."""
+        for connecting in self._connections:
+            if self._alive(connecting) and connecting.done():
+                connecting.result().close()
+            else:
+                connecting.cancel()
+        self._connections = []
+
+
+def main(argv=None):
+    parser = ArgumentParser(prog="python -m pyotp.server",
+                            description="Run the pyotp verification daemon.")
+    where = parser.add_mutually_exclusive_group(required=True)
+    where.add_argument("--unix", metavar="PATH",
+                       help="listen on a Unix domain socket")
+    where.add_argument("--port", type=int, help="listen on a loopback port")
+    parser.add_argument("--host", default="127.0.0.1",
+                        help="address for --port (default: 127.0.0.1)")
+    parser.add_argument("--cache-size", type=int, default=65536,
+                        help="secrets kept in the code cache")
+    parser.add_argument("--replay-db", metavar="PATH",
+                        help="SQLite replay database (default: in memory)")
+    parser.add_argument("--max-totp-window", type=int, default=600,
+                        help="largest TOTP below/above allowed, in seconds")
+    parser.add_argument("--max-hotp-window", type=int, default=100,
+                        help="largest HOTP below/above allowed, in counters")
+    args = parser.parse_args(argv)
+
+    if args.replay_db:
+        replay = SQLiteReplayStore(args.replay_db)
+    else:
+        replay = MemoryReplayStore()
+
+    server = Server(CodeCache(args.cache_size), replay,
+                    max_totp_window=args.max_totp_window,
+                    max_hotp_window=args.max_hotp_window)
+    loop = asyncio.new_event_loop()
+    if args.unix:
+        listener = loop.run_until_complete(server.start_unix(args.unix))
+    else:
+        listener = loop.run_until_complete(server.start_tcp(args.host,
+                                                            args.port))
+
+    try:
+        loop.run_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        listener.close()
+        replay.close()
+        loop.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+# Copyright (C) 2018 Elizabeth Myers. All rights reserved.
+# See the included LICENSE file for terms of distribution.
+
+
+"""Precomputed TOTP code tables, for checking codes without the secrets.
+
+write_table computes every code for a set of tokens over a range of time
+steps and writes them to a file: a small header, then one packed array of
+32-bit codes per token, indexed by step. CodeTable memory-maps such a file
+and checks codes by indexing straight into it, with no HMAC work and no
+secrets. Opening a table only reads the header, and the operating system
+loads pages of codes as they are used.
+
+Tokens are identified by their position in the sequence given to
+write_table; keep your own mapping from users to positions.
+
+Anyone who can read the table can read every code in it, so protect it as
+you would the secrets for the period it covers.
+"""
+
+
+import mmap
+import struct
+import sys
+
+from array import array
+
+from pyotp.common import (keyed_code_range_int, match_index, parse_code,
+                          prekey, _digits_mod)
+from pyotp.constants import HashAlgorithm
+from pyotp.totp import totp_step, totp_window
+
+
+_MAGIC = b"PYOTPTBL"
+_VERSION = 1
+
+# magic, version, code length, grace period, token count, steps per token,
+# first step
+_HEADER = struct.Struct("<8sBBxxIIIq")
+
+_TYPECODE = "I" if array("I").itemsize == 4 else "L"
+
+
+def write_table(fileobj, secrets, start, end, length=6, grace_period=30,
+                hash_algorithm=HashAlgorithm.SHA1):
+    """Write a code table for secrets, from timestamp start to end inclusive.
+
+    fileobj must be a binary file. secrets is a sequence of secrets, all
+    using the same hash algorithm, length, and grace period. Returns the
+    number of tokens written.
+
+    The table takes 4 bytes per token per time step.
+    """
+    if length not in _digits_mod:
+        raise ValueError("invalid length: {}".format(length))
+
+    first = totp_step(start, grace_period)
+    last = totp_step(end, grace_period)
+    if last < first:
+        raise ValueError("end is before start")
+
+    fileobj.write(_HEADER.pack(_MAGIC, _VERSION, length, grace_period,
+                               len(secrets), last - first + 1, first))
+
+    for secret in secrets:
+        codes = array(_TYPECODE, keyed_code_range_int(
+            prekey(secret, hash_algorithm), length, first, last))
+        if sys.byteorder != "little":
+            codes.byteswap()
+        codes.tofile(fileobj)
+
+    return len(secrets)
+
+
+class CodeTable:
+    """A memory-mapped table of precomputed TOTP codes.
+
+    Use it as a context manager, or call close() when done. Checks are safe
+    from several threads.
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            header = f.read(_HEADER.size)
+            if len(header) < _HEADER.size:
+                raise ValueError("not a code table")
+
+            magic, version, length, grace_period, count, steps, first = \
+                _HEADER.unpack(header)
+            if magic != _MAGIC or version != _VERSION:
+                raise ValueError("not a code table")
+
+            size = _HEADER.size + count * steps * 4
+            f.seek(0, 2)
+            if f.tell() < size:
+                raise ValueError("code table is truncated")
+
+            self._mmap = mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ)
+
+        self.length = length
+        self.grace_period = grace_period
+        self.count = count
+        self.steps = steps
+        self.first_step = first
+        self.last_step = first + steps - 1
+        self._codes = memoryview(self._mmap)[_HEADER.size:].cast(_TYPECODE)
+
+    def __len__(self):
+        return self.count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _range(self, token, low, high):
+        # Return the codes for token from step low to high inclusive, which
+        # must be within the table
+        if not 0 <= token < self.count:
+            raise IndexError("token index out of range")
+
+        offset = token * self.steps - self.first_step
+        codes = self._codes[offset+low:offset+high+1]
+        if sys.byteorder != "little":
+            codes = array(_TYPECODE, codes)
+            codes.byteswap()
+
+        return codes
+
+    def code_int(self, token, step):
+        """Return the integer code for token at the given time step.
+
+        Raises IndexError if the step isn't in the table.
+        """
+        if not self.first_step <= step <= self.last_step:
+            raise IndexError("step not in table")
+
+        return self._range(token, step, step)[0]
+
+    def match_totp(self, token, code, timestamp=None, below=30, above=30,
+                   constant_time=True):
+        """Find which time step the given TOTP code matches for token.
+
+        Returns the offset in time steps from the step of the given
+        timestamp, or None, as pyotp.totp.match_totp does. Steps outside the
+        table never match; codes of a different length from the table's
+        never match.
+        """
+        parsed = parse_code(code)
+        if parsed is None or parsed[1] != self.length:
+            return None
+
+        start, center, end = totp_window(timestamp, self.grace_period,
+                                         below, above)
+        low = max(start, self.first_step)
+        high = min(end, self.last_step)
+        if low > high:
+            if not 0 <= token < self.count:
+                raise IndexError("token index out of range")
+            return None
+
+        index = match_index(parsed[0], self._range(token, low, high),
+                            constant_time)
+        if index is None:
+            return None
+
+        return low + index - center
+
+    def check_totp(self, token, code, timestamp=None, below=30, above=30,
+                   constant_time=True):
+        """Check if the given TOTP code matches for token.
+
+        See match_totp.
+        """
+        return self.match_totp(token, code, timestamp, below, above,
+                               constant_time) is not None
+
+    def close(self):
+        """Unmap the table."""
+        self._codes.release()
+        self._mmap.close()
@@ -0,0 +1,77 @@
+# Copyright (C) 2018 Elizabeth Myers. All rights reserved.
+# See the included LICENSE file for terms of distribution.
+
+from unittest import TestCase
+
+from pyotp import common, totp
+from pyotp.adaptive import AdaptiveVerifier, MemoryDriftStore
+from pyotp.replay import MemoryReplayStore
+
+
+class TestAdaptiveVerifier(TestCase):
+    secret = b"12345678901234567890"
+    timestamp = 1234567890
+
+    def code(self, steps):
+        return totp.get_totp_code(self.secret, self.timestamp + steps * 30)
+
+    def test_matches_like_match_totp(self):
+        """Ensure results match match_totp over and around the window."""
+        for drift in (-5, 0, 3):
+            verifier = AdaptiveVerifier(below=120, above=120)
+            verifier.store.set("user", drift)
+            for steps in range(-6, 7):
+                with self.subTest(drift=drift, steps=steps):
+                    code = self.code(steps)
+                    expected = totp.match_totp(code, self.secret,
+                                               self.timestamp, below=120,
+                                               above=120)
+                    got = verifier.match_totp("user", code, self.secret,
+                                              self.timestamp)
+                    self.assertEqual(got, expected)
+
+    def test_learns_drift(self):
+        """Ensure a match records the drift, and later checks start there."""
+        store = MemoryDriftStore()
+        verifier = AdaptiveVerifier(store, narrow=0, below=300, above=300)
+        self.assertEqual(verifier.match_totp("user", self.code(-4),
+                                             self.secret, self.timestamp), -4)
+        self.assertEqual(store.get("user"), -4)
+        self.assertIsNone(store.get("other"))
+
+        common.enable_stats()
+        self.addCleanup(common.disable_stats)
+        self.assertTrue(verifier.check_totp("user", self.code(-4),
+                                            self.secret, self.timestamp))
+        self.assertEqual(common.stats_snapshot()["totp"]["hmacs"], 1)
+
+        self.assertFalse(verifier.check_totp("user", "000000", self.secret,
+                                             self.timestamp))
+        self.assertEqual(store.get("user"), -4)
+
+    def test_drift_clipped_to_window(self):
+        """Ensure a learned drift can't reach past the full window."""
+        verifier = AdaptiveVerifier(below=30, above=30)
+        verifier.store.set("user", 10)
+        self.assertIsNone(verifier.match_totp("user", self.code(10),
+                                              self.secret, self.timestamp))
+        self.assertEqual(verifier.match_totp("user", self.code(1),
+                                             self.secret, self.timestamp), 1)
+
+    def test_replay(self):
+        """Ensure a replay store rejects a second use of a code."""
+        verifier = AdaptiveVerifier()
+        store = MemoryReplayStore()
+        code = self.code(0)
+        self.assertTrue(verifier.check_totp("user", code, self.secret,
+                                            self.timestamp, store))
+        self.assertFalse(verifier.check_totp("user", code, self.secret,
+                                             self.timestamp, store))
+
+    def test_store_bounded(self):
+        """Ensure the memory store drops the least recently updated key."""
+        store = MemoryDriftStore(maxsize=2)
+        for key in ("a", "b", "c"):
+            store.set(key, 1)
+        self.assertEqual(len(store), 2)
+        self.assertIsNone(store.get("a"))
@@ -0,0 +1,73 @@
+# Copyright (C) 2018 Elizabeth Myers. All rights reserved.
+# See the included LICENSE file for terms of distribution.
+
+import asyncio
+
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase
+
+from pyotp import aio, hotp, totp
+
+
+class TestAsyncVerification(TestCase):
+    secret = b"12345678901234567890"
+    timestamp = 1234567890
+
+    def run_async(self, coro):
+        loop = asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(coro)
+        finally:
+            loop.close()
+
+    def test_check(self):
+        """Ensure async checks give the same results as the sync ones."""
+        code = totp.get_totp_code(self.secret, self.timestamp)
+
+        async def checks():
+            return await asyncio.gather(
+                aio.check_totp(code, self.secret, self.timestamp),
+                aio.check_totp("000000", self.secret, self.timestamp),
+                aio.match_totp(code, self.secret, self.timestamp + 30),
+                aio.check_hotp("287082", self.secret, 0),
+                aio.match_hotp("287082", self.secret, 0),
+            )
+
+        self.assertEqual(self.run_async(checks()),
+                         [True, False, -1, True, 1])
+
+    def test_coalescing(self):
+        """Ensure a burst of checks is handed off in batches."""
+        codes = [hotp.get_hotp_code(self.secret, i) for i in range(40)]
+        with ThreadPoolExecutor(2) as pool:
+            verifier = aio.Verifier(pool, max_in_flight=16, max_batch=8)
+
+            async def checks():
+                return await asyncio.gather(*(
+                    verifier.match_hotp(code, self.secret, 0, above=40)
+                    for code in codes))
+
+            self.assertEqual(self.run_async(checks()), list(range(40)))
+
+    def test_batch(self):
+        """Ensure async batch checks work."""
+        code = totp.get_totp_code(self.secret, self.timestamp)
+        items = [(code, self.secret), ("000000", self.secret)]
+        result = self.run_async(aio.verify_totp_many(items, self.timestamp))
+        self.assertEqual(result, [True, False])
+
+        items = [("755224", self.secret, 0), ("755224", self.secret, 1)]
+        result = self.run_async(aio.verify_hotp_many(items))
+        self.assertEqual(result, [True, False])
+
+    def test_exceptions(self):
+        """Ensure an exception only fails the check that raised it."""
+        async def checks():
+            return await asyncio.gather(
+                aio.check_totp("000000", self.secret, replay=object()),
+                aio.check_totp("000000", self.secret, self.timestamp),
+                return_exceptions=True)
+
+        error, result = self.run_async(checks())
+        self.assertIsInstance(error, ValueError)
+        self.assertFalse(result)
@@ -0,0 +1,84 @@
+# Copyright (C) 2018 Elizabeth Myers. All rights reserved.
+# See the included LICENSE file for terms of distribution.
+
+import os
+
+from unittest import TestCase
+from unittest.mock import patch
+
+from pyotp import backends, hotp, totp
+from pyotp.constants import HashAlgorithm
+from pyotp.key import OTPKey
+from pyotp.tests import test_hotp, test_totp
+
+
+class TestBackends(TestCase):
+    def setUp(self):
+        self.addCleanup(backends.set_backend, None)
+
+    def test_rfc_vectors(self):
+        """Ensure every available backend gives the RFC 4226/6238 codes."""
+        hotp_vectors = test_hotp.TestHOTPGeneration
+        totp_vectors = test_totp.TestTOTPGeneration
+        for name in backends.available_backends():
+            backends.set_backend(name)
+            for counter, expected in enumerate(hotp_vectors.codes):
+                with self.subTest(backend=name, counter=counter):
+                    secret = hotp_vectors.secret
+                    self.assertEqual(hotp.get_hotp_code(secret, counter),
+                                     expected)
+                    self.assertEqual(OTPKey(secret).hotp(counter), expected)
+                    self.assertEqual(hotp.match_hotp(expected, secret, 0,
+                                                     above=9), counter)
+
+            for timestamp, expected, algorithm in totp_vectors.tests:
+                with self.subTest(backend=name, timestamp=timestamp,
+                                  algorithm=algorithm):
+                    secret = totp_vectors.secret_algo[algorithm]
+                    self.assertEqual(totp.get_totp_code(
+                        secret, timestamp, 8, hash_algorithm=algorithm),
+                        expected)
+                    self.assertEqual(totp.match_totp(
+                        expected, secret, timestamp - 30,
+                        hash_algorithm=algorithm), 1)
+
+    def test_calibrate(self):
+        """Ensure calibration picks an available backend per algorithm."""
+        for algorithm in HashAlgorithm:
+            with self.subTest(algorithm=algorithm):
+                backend = backends.calibrate(algorithm, number=5)
+                self.assertIn(backend.name, backends.available_backends())
+                self.assertIs(backends.get_backend(algorithm),
+                              backends._selected[algorithm])
+
+    def test_environment(self):
+        """Ensure the environment variable overrides calibration."""
+        with patch.dict(os.environ, {backends.ENVIRONMENT_VARIABLE: "copy"}):
+            backends.set_backend(None)
+            for algorithm in HashAlgorithm:
+                self.assertEqual(backends.get_backend(algorithm).name, "copy")
+
+        with patch.dict(os.environ, {backends.ENVIRONMENT_VARIABLE: "nope"}):
+            backends.set_backend(None)
+            with self.assertRaises(ValueError):
+                backends.get_backend(HashAlgorithm.SHA1)
+
+    def test_no_hmac_digest(self):
+        """Ensure the digest backend is skipped without hmac.digest."""
+        with patch.object(backends, "hmac_digest", None):
+            self.assertNotIn("digest", backends.available_backends())
+            backends.set_backend(None)
+            backend = backends.get_backend(HashAlgorithm.SHA1)
+            self.assertNotEqual(backend.name, "digest")
+            self.assertEqual(hotp.get_hotp_code(b"12345678901234567890", 0),
+                             "755224")
+            with self.assertRaises(ValueError):
+                backends.set_backend("digest")
+
+    def test_set_backend(self):
+        """Ensure set_backend applies per algorithm and rejects bad names."""
+        backends.set_backend("digest", HashAlgorithm.SHA256)
+        self.assertEqual(backends.get_backend(HashAlgorithm.SHA256).name,
+                         "digest")
+        with self.assertRaises(ValueError):
+            backends.set_backend("nope")
@@ -0,0 +1,94 @@
+# Copyright (C) 2018 Elizabeth Myers. All rights reserved.
+# See the included LICENSE file for terms of distribution.
+
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase
+
+from pyotp import batch, hotp, totp
+from pyotp.constants import HashAlgorithm, SearchOrder
+
+
+class TestBatchVerification(TestCase):
+    secret = b"12345678901234567890"
+    timestamp = 1234567890
+
+    def totp_items(self):
+        items = []
+        for i in range(50):
+            secret = self.secret + bytes([i])
+            code = totp.get_totp_code(secret, self.timestamp)
+            items.append((code if i % 3 else "000000", secret))
+        items.append(("89005924", self.secret,
+                      {"hash_algorithm": HashAlgorithm.SHA1, "below": 0}))
+        return items
+
+    def test_totp_many(self):
+        """Ensure batch TOTP results match check_totp, in order."""
+        items = self.totp_items()
+        expected = [totp.check_totp(item[0], item[1], self.timestamp,
+                                    **(item[2] if len(item) > 2 else {}))
+                    for item in items]
+
+        for workers in (None, 1, 4):
+            with self.subTest(workers=workers):
+                got = batch.verify_totp_many(items, self.timestamp,
+                                             workers=workers, chunksize=7)
+                self.assertEqual(got, expected)
+
+        with ThreadPoolExecutor(2) as pool:
+            got = batch.verify_totp_many(iter(items), self.timestamp,
+                                         chunksize=5, executor=pool)
+        self.assertEqual(got, expected)
+
+    def test_totp_many_processes(self):
+        """Ensure batch TOTP works on a process pool."""
+        items = self.totp_items()
+        expected = batch.verify_totp_many(items, self.timestamp)
+        got = batch.verify_totp_many(items, self.timestamp, workers=2,
+                                     processes=True, chunksize=16)
+        self.assertEqual(got, expected)
+
+    def test_hotp_many(self):
+        """Ensure batch HOTP results match check_hotp, in order."""
+        items = []
+        for counter in range(20):
+            code = hotp.get_hotp_code(self.secret, counter)
+            items.append((code, self.secret, counter))
+            items.append((code, self.secret, counter + 1, {"above": 0}))
+
+        expected = [hotp.check_hotp(*item[:3],
+                                    **(item[3] if len(item) > 3 else {}))
+                    for item in items]
+        got = batch.verify_hotp_many(items, workers=3, chunksize=4)
+        self.assertEqual(got, expected)
+        self.assertEqual(got[:4], [True, False, True, False])
+
+    def test_offsets(self):
+        """Ensure batch checks can return matched offsets."""
+        items = [("89005924", self.secret),
+                 ("89005924", self.secret,
+                  {"search_order": SearchOrder.CENTER_OUT, "below": 0}),
+                 ("00000000", self.secret)]
+        got = batch.verify_totp_many(items, self.timestamp - 30, offsets=True)
+        self.assertEqual(got, [1, 1, None])
+
+        code = hotp.get_hotp_code(self.secret, 7)
+        got = batch.verify_hotp_many([(code, self.secret, 5)], offsets=True)
+        self.assertEqual(got, [2])
+
+    def test_resync_many(self):
+        """Ensure batch resyncs match resync_hotp, in order."""
+        items = []
+        for i in range(10):
+            secret = self.secret + bytes([i])
+            codes = [hotp.get_hotp_code(secret, c)
+                     for c in range(i * 50, i * 50 + 2)]
+            items.append((codes, secret, 0, {"look_ahead": 300}))
+
+        expected = [i * 50 + 2 if i * 50 <= 300 else None
+                    for i in range(10)]
+        for workers in (None, 2):
+            with self.subTest(workers=workers):
+                got = batch.resync_hotp_many(items, workers=workers,
+                                             chunksize=3)
+                self.assertEqual(got, expected)
@@ -0,0 +1,22 @@
+# Copyright (C) 2018 Elizabeth Myers. All rights reserved.
+# See the included LICENSE file for terms of distribution.
+
+from io import StringIO
+from unittest import TestCase
+
+from pyotp.benchmarks import result
+from pyotp.benchmarks.__main__ import compare
+
+
+class TestBenchmarkCompare(TestCase):
+    def test_compare(self):
+        """Ensure slowdowns beyond the threshold are flagged."""
+        baseline = [result("a", 1.0, 100), result("b", 1.0, 100),
+                    result("c", 1.0, 100)]
+        results = [result("a", 1.0, 95), result("b", 1.0, 80),
+                   result("c", 1.0, 150), result("d", 1.0, 1)]
+
+        out = StringIO()
+        self.assertEqual(compare(baseline, results, 0.1, out), ["b"])
+        self.assertIn("d: new", out.getvalue())
+        self.assertIn("REGRESSION", out.getvalue())
@@ -0,0 +1,127 @@
+# Copyright (C) 2018 Elizabeth Myers. All rights reserved.
+# See the included LICENSE file for terms of distribution.
+
+from unittest import TestCase
+
+from pyotp import totp
+from pyotp.cache import CodeCache, SecretCache
+from pyotp.constants import HashAlgorithm, SecretEncoding
+
+
+class TestCodeCache(TestCase):
+    secret = b"12345678901234567890"
+
+    # Test vectors taken from RFC 6238
+    tests = [
+        (59, "94287082"),
+        (1111111109, "07081804"),
+        (1234567890, "89005924"),
+    ]
+
+    def test_results_match(self):
+        """Ensure cached checks give the same results as uncached ones."""
+        cache = CodeCache()
+        for (time, code) in self.tests:
+            for offset in (-120, -30, 0, 30, 120):
+                for constant_time in (True, False):
+                    expected = totp.check_totp(code, self.secret,
+                                               time + offset,
+                                               constant_time=constant_time)
+                    got = totp.check_totp(code, self.secret, time + offset,
+                                          constant_time=constant_time,
+                                          cache=cache)
+                    with self.subTest(time=time, offset=offset,
+                                      constant_time=constant_time):
+                        self.assertEqual(got, expected)
+
+            got = totp.get_totp_code(self.secret, time, length=8, cache=cache)
+            self.assertEqual(got, code)
+
+    def test_hits(self):
+        """Ensure checks within the same step reuse codes."""
+        cache = CodeCache()
+        totp.check_totp("000000", self.secret, 1000, cache=cache)
+        self.assertEqual(cache.stats()["misses"], 3)
+        self.assertEqual(cache.stats()["hits"], 0)
+
+        totp.check_totp("000000", self.secret, 1001, cache=cache)
+        self.assertEqual(cache.stats()["misses"], 3)
+        self.assertEqual(cache.stats()["hits"], 3)
+
+        # The next step overlaps the window by two steps
+        totp.check_totp("000000", self.secret, 1030, cache=cache)
+        self.assertEqual(cache.stats()["misses"], 4)
+        self.assertEqual(cache.stats()["hits"], 5)
+        self.assertEqual(cache.stats()["expired"], 1)
+
+    def test_expiry_backwards(self):
+        """Ensure windows moving back in time don't grow an entry forever."""
+        cache = CodeCache()
+        totp.check_totp("000000", self.secret, 10 ** 9, cache=cache)
+        for timestamp in range(10 ** 6, 10 ** 6 - 3000, -30):
+            totp.check_totp("000000", self.secret, timestamp, cache=cache)
+
+        entry = next(iter(cache._entries.values()))
+        self.assertLessEqual(len(entry.codes), 7)
+        self.assertGreater(cache.stats()["expired"], 90)
+
+        # Codes in and near the current window are still reused
+        hits = cache.stats()["hits"]
+        totp.check_totp("000000", self.secret, timestamp + 30, cache=cache)
+        self.assertEqual(cache.stats()["hits"], hits + 3)
+
+    def test_eviction(self):
+        """Ensure the least recently used secret is evicted."""
+        cache = CodeCache(maxsize=2)
+        for i in range(3):
+            totp.get_totp_code(bytes([i]) * 10, 1000, cache=cache)
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+        # Different algorithms and lengths don't share codes
+        totp.get_totp_code(self.secret, 1000, cache=cache,
+                           hash_algorithm=HashAlgorithm.SHA256)
+        totp.get_totp_code(self.secret, 1000, length=8, cache=cache)
+        self.assertEqual(cache.stats()["misses"], 5)
+
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.stats()["evictions"], 0)
+
+
+class TestSecretCache(TestCase):
+    secret = b"12345678901234567890"
+    encoded = b"GEZDGNBVGY3TQOJQGEZDGNBVGY3TQOJQ"
+
+    def test_decode(self):
+        """Ensure decoded secrets are cached."""
+        cache = SecretCache()
+        self.assertEqual(cache.decode(self.encoded), self.secret)
+        self.assertEqual(cache.decode(self.encoded), self.secret)
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+        self.assertEqual(stats["hit_rate"], 0.5)
+
+        encoded = b"MTIzNDU2Nzg5MDEyMzQ1Njc4OTA="
+        got = cache.decode(encoded, SecretEncoding.BASE64_STD)
+        self.assertEqual(got, self.secret)
+
+    def test_key(self):
+        """Ensure pre-keyed secrets are cached."""
+        cache = SecretCache()
+        key = cache.key(self.encoded)
+        self.assertIs(cache.key(self.encoded), key)
+        self.assertEqual(key.hotp(0), "755224")
+        self.assertIsNot(cache.key(self.encoded, length=8), key)
+
+    def test_eviction(self):
+        """Ensure the least recently used secret is evicted."""
+        cache = SecretCache(maxsize=1)
+        cache.decode(b"AAAAAAAA")
+        cache.decode(b"BBBBBBBB")
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+        with self.assertRaises(ValueError):
+            cache.decode(b"1")
+        self.assertEqual(len(cache), 1)
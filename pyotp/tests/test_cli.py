@@ -0,0 +1,120 @@
+# Copyright (C) 2018 Elizabeth Myers. All rights reserved.
+# See the included LICENSE file for terms of distribution.
+
+import json
+
+from contextlib import redirect_stderr, redirect_stdout
+from io import BytesIO, StringIO
+from unittest import TestCase
+
+from pyotp.__main__ import main, run_batch
+
+
+class TestCLI(TestCase):
+    # b"12345678901234567890" in base32
+    secret = "GEZDGNBVGY3TQOJQGEZDGNBVGY3TQOJQ"
+
+    def run_main(self, *argv):
+        out = StringIO()
+        with redirect_stdout(out):
+            status = main(list(argv))
+        return status, out.getvalue()
+
+    def test_gen(self):
+        """Ensure codes are generated."""
+        self.assertEqual(self.run_main("gen", self.secret, "--hotp", "1"),
+                         (0, "287082\n"))
+        self.assertEqual(self.run_main("gen", self.secret, "-t", "59", "-d",
+                                       "8"), (0, "94287082\n"))
+
+    def test_check(self):
+        """Ensure codes are checked, with the exit status as the result."""
+        self.assertEqual(self.run_main("check", "287082", self.secret,
+                                       "--hotp", "0"), (0, "ok 1\n"))
+        self.assertEqual(self.run_main("check", "94287082", self.secret,
+                                       "-t", "89"), (0, "ok -1\n"))
+        self.assertEqual(self.run_main("check", "000000", self.secret),
+                         (1, "fail\n"))
+
+    def test_bad_input(self):
+        """Ensure bad options are usage errors, and long codes just fail."""
+        self.assertEqual(self.run_main("check", "1234567890", self.secret,
+                                       "-t", "59"), (1, "fail\n"))
+        for argv in (("gen", self.secret, "-d", "9"),
+                     ("gen", self.secret, "-p", "0"),
+                     ("check", "123456", self.secret, "-p", "0"),
+                     ("check", "123456", self.secret, "--below", "-1")):
+            with self.subTest(argv=argv), redirect_stderr(StringIO()), \
+                    self.assertRaises(SystemExit) as cm:
+                self.run_main(*argv)
+            self.assertEqual(cm.exception.code, 2)
+
+    def batch(self, lines, fmt, workers=1):
+        out = BytesIO()
+        run_batch(BytesIO("".join(lines).encode()), out, fmt, workers,
+                  chunk_size=2)
+        return out.getvalue().decode().splitlines()
+
+    def test_batch_json(self):
+        """Ensure JSON requests are answered in order."""
+        requests = [
+            {"id": 1, "code": "94287082", "secret": self.secret,
+             "timestamp": 59},
+            {"id": 2, "type": "hotp", "code": "287082",
+             "secret": self.secret, "counter": 0, "above": 0},
+            {"id": 3, "type": "hotp", "code": "287082",
+             "secret": self.secret},
+            {"id": 4, "code": "287082", "secret": self.secret,
+             "algorithm": "md5"},
+        ]
+        lines = [json.dumps(r) + "\n" for r in requests] + ["[1]\n"]
+        expected = [{"id": 1, "ok": True, "offset": 0},
+                    {"id": 2, "ok": False, "offset": None}]
+
+        for workers in (1, 2):
+            with self.subTest(workers=workers):
+                results = [json.loads(r)
+                           for r in self.batch(lines, "jsonl", workers)]
+                self.assertEqual(results[:2], expected)
+                self.assertEqual([r["id"] for r in results[2:]],
+                                 [3, 4, None])
+                for result in results[2:]:
+                    self.assertIn("error", result)
+
+    def test_batch_json_bad_options(self):
+        """Ensure bad period, below, and above values only fail their line."""
+        good = {"id": 0, "code": "94287082", "secret": self.secret,
+                "timestamp": 59}
+        bad = [{"period": 0}, {"period": -30}, {"period": "30"},
+               {"below": -1}, {"above": 1.5}, {"above": True}]
+        lines = []
+        for i, options in enumerate(bad, 1):
+            request = dict(good, id=i, **options)
+            lines += [json.dumps(request) + "\n", json.dumps(good) + "\n"]
+
+        results = [json.loads(r) for r in self.batch(lines, "jsonl")]
+        self.assertEqual(len(results), len(lines))
+        for i in range(len(bad)):
+            with self.subTest(options=bad[i]):
+                self.assertEqual(results[i * 2]["id"], i + 1)
+                self.assertIn("error", results[i * 2])
+                self.assertEqual(results[i * 2 + 1],
+                                 {"id": 0, "ok": True, "offset": 0})
+
+    def test_batch_tsv_long_code(self):
+        """Ensure an over-long code only fails its own line."""
+        lines = ["totp\t1234567890\t{}\t59\n".format(self.secret),
+                 "totp\t94287082\t{}\t59\n".format(self.secret)]
+        self.assertEqual(self.batch(lines, "tsv"), ["fail", "ok\t0"])
+
+    def test_batch_tsv(self):
+        """Ensure TSV requests are answered in order."""
+        lines = ["totp\t94287082\t{}\t59\n".format(self.secret),
+                 "hotp\t287082\t{}\t0\n".format(self.secret),
+                 "hotp\t000000\t{}\t0\n".format(self.secret),
+                 "hotp\t287082\t{}\n".format(self.secret),
+                 "totp\t94287082\n"]
+        results = self.batch(lines, "tsv", 2)
+        self.assertEqual(results[:3], ["ok\t0", "ok\t1", "fail"])
+        self.assertTrue(results[3].startswith("error\t"))
+        self.assertTrue(results[4].startswith("error\t"))
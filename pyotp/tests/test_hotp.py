@@ -3,8 +3,9 @@
 
 from unittest import TestCase
 
-from pyotp import hotp
-from pyotp.constants import HashAlgorithm
+from pyotp import hotp, totp
+from pyotp.common import match_index, window_order
+from pyotp.constants import HashAlgorithm, SearchOrder
 
 
 class TestHOTPGeneration(TestCase):
@@ -57,3 +58,129 @@ class TestHOTPGeneration(TestCase):
         with self.subTest(secret=self.secret, check=check, counter=0,
                           msg="Ensure invalid code is rejected"):
             self.assertFalse(check)
+
+    def test_hotp_generate_int(self):
+        """Ensure integer HOTP generation matches the string codes."""
+        for i, expected in enumerate(self.codes):
+            s = hotp.get_hotp_code_int(self.secret, i, length=6)
+            with self.subTest(counter=i, expected=expected, got=s):
+                self.assertEqual(s, int(expected))
+
+    def test_hotp_check_buffers(self):
+        """Ensure bytes and memoryview codes are accepted."""
+        for code in self.codes:
+            raw = code.encode("ascii")
+            for value in (raw, bytearray(raw), memoryview(raw)):
+                for constant_time in (True, False):
+                    check = hotp.check_hotp(value, self.secret, 0, above=10,
+                                            constant_time=constant_time)
+                    with self.subTest(code=value,
+                                      constant_time=constant_time):
+                        self.assertTrue(check)
+
+    def test_hotp_check_malformed(self):
+        """Ensure codes that aren't ASCII digits are rejected."""
+        # The last one is 755224 in Arabic-Indic digits
+        for code in ("", "75522a", " 55224", b"-55224",
+                     "\u0667\u0665\u0665\u0662\u0662\u0664"):
+            check = hotp.check_hotp(code, self.secret, 0)
+            with self.subTest(code=code, check=check):
+                self.assertFalse(check)
+
+    def test_hotp_check_too_long(self):
+        """Ensure codes longer than any supported length are rejected."""
+        for code in ("123456789", b"1234567890", "0" * 100):
+            for constant_time in (True, False):
+                check = hotp.check_hotp(code, self.secret, 0,
+                                        constant_time=constant_time)
+                with self.subTest(code=code, constant_time=constant_time):
+                    self.assertFalse(check)
+                    self.assertIsNone(totp.match_totp(code, self.secret, 59))
+
+    def test_hotp_match(self):
+        """Ensure the matched counter offset is returned."""
+        for order in SearchOrder:
+            for constant_time in (True, False):
+                for i, code in enumerate(self.codes):
+                    offset = hotp.match_hotp(code, self.secret, 4, below=4,
+                                             above=5,
+                                             constant_time=constant_time,
+                                             search_order=order)
+                    with self.subTest(order=order, code=code,
+                                      constant_time=constant_time):
+                        self.assertEqual(offset, i - 4)
+
+                offset = hotp.match_hotp("000000", self.secret, 4,
+                                         search_order=order)
+                self.assertIsNone(offset)
+
+    def test_window_order(self):
+        """Ensure center-out order alternates outwards from the center."""
+        order = window_order(10, 15, 12, SearchOrder.CENTER_OUT)
+        self.assertEqual(order, [12, 11, 13, 10, 14, 15])
+
+        order = window_order(10, 12, 20, SearchOrder.CENTER_OUT)
+        self.assertEqual(order, [12, 11, 10])
+
+        order = window_order(10, 12, 11, SearchOrder.LINEAR)
+        self.assertEqual(list(order), [10, 11, 12])
+
+    def test_match_index(self):
+        """Ensure both comparison modes return the first match."""
+        for constant_time in (True, False):
+            with self.subTest(constant_time=constant_time):
+                self.assertEqual(match_index(5, [1, 5, 5], constant_time), 1)
+                self.assertEqual(match_index(1, [1, 5, 1], constant_time), 0)
+                self.assertEqual(match_index(0, [0], constant_time), 0)
+                self.assertIsNone(match_index(7, [1, 5, 5], constant_time))
+                self.assertIsNone(match_index(7, [], constant_time))
+
+    def test_match_index_constant_consumes_all(self):
+        """Ensure constant time comparison computes the whole window."""
+        seen = []
+
+        def codes():
+            for code in (3, 1, 2):
+                seen.append(code)
+                yield code
+
+        self.assertEqual(match_index(3, codes(), True), 0)
+        self.assertEqual(seen, [3, 1, 2])
+
+
+class TestHOTPResync(TestCase):
+    secret = b"12345678901234567890"
+
+    def codes(self, counter, count=3, length=6):
+        return [hotp.get_hotp_code(self.secret, i, length)
+                for i in range(counter, counter + count)]
+
+    def test_resync(self):
+        """Ensure consecutive codes far ahead give the next counter."""
+        for count in (2, 3):
+            for counter in (0, 517, 1000):
+                with self.subTest(count=count, counter=counter):
+                    self.assertEqual(
+                        hotp.resync_hotp(self.codes(counter, count),
+                                         self.secret, 0),
+                        counter + count)
+
+        self.assertEqual(hotp.resync_hotp(self.codes(4000, 2, 8),
+                                          self.secret, 3500), 4002)
+
+    def test_resync_rejected(self):
+        """Ensure codes out of range, out of order, or not found fail."""
+        self.assertIsNone(hotp.resync_hotp(self.codes(1001), self.secret, 0))
+        self.assertIsNone(hotp.resync_hotp(self.codes(5), self.secret, 6))
+        codes = self.codes(5)
+        self.assertIsNone(hotp.resync_hotp([codes[0], codes[2]],
+                                           self.secret, 0))
+        self.assertIsNone(hotp.resync_hotp(["755224", "abcdef"],
+                                           self.secret, 0))
+        self.assertIsNone(hotp.resync_hotp(["755224", "62287082"],
+                                           self.secret, 0))
+
+        with self.assertRaises(ValueError):
+            hotp.resync_hotp(self.codes(0, 1), self.secret, 0)
+        with self.assertRaises(ValueError):
+            hotp.resync_hotp(self.codes(0, 4), self.secret, 0)
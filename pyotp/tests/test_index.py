@@ -0,0 +1,62 @@
+# Copyright (C) 2018 Elizabeth Myers. All rights reserved.
+# See the included LICENSE file for terms of distribution.
+
+from unittest import TestCase
+from unittest.mock import patch
+
+from pyotp import totp, vector
+from pyotp.constants import HashAlgorithm
+from pyotp.index import CodeIndex, step_codes
+
+
+class TestCodeIndex(TestCase):
+    timestamp = 1234567890
+    secrets = [bytes([i]) * 20 for i in range(40)]
+
+    def test_step_codes(self):
+        """Ensure batch codes match, with or without NumPy."""
+        expected = [totp.get_totp_code_int(secret, self.timestamp, 8,
+                                           hash_algorithm=HashAlgorithm.SHA256)
+                    for secret in self.secrets]
+        step = self.timestamp // 30
+        self.assertEqual(step_codes(self.secrets, step, 8,
+                                    HashAlgorithm.SHA256), expected)
+        with patch.object(vector, "numpy", None):
+            self.assertEqual(step_codes(self.secrets, step, 8,
+                                        HashAlgorithm.SHA256), expected)
+
+    def test_lookup(self):
+        """Ensure lookups find the token and offset of a code."""
+        index = CodeIndex(self.secrets)
+        for token in (0, 17, 39):
+            for steps in (-1, 0, 1):
+                with self.subTest(token=token, steps=steps):
+                    code = totp.get_totp_code(self.secrets[token],
+                                              self.timestamp + steps * 30)
+                    self.assertIn((token, steps),
+                                  index.lookup(code, self.timestamp))
+
+        code = totp.get_totp_code(self.secrets[0], self.timestamp + 60)
+        self.assertNotIn(0, [token for token, _ in
+                             index.lookup(code, self.timestamp)])
+        self.assertEqual(index.lookup("12345", self.timestamp), [])
+        self.assertEqual(index.lookup("abcdef", self.timestamp), [])
+
+    def test_collisions(self):
+        """Ensure every token sharing a code is returned, nearest first."""
+        index = CodeIndex([b"a" * 20, b"b" * 20, b"a" * 20], below=60,
+                          above=60)
+        code = totp.get_totp_code(b"a" * 20, self.timestamp - 30)
+        self.assertEqual(index.lookup(code, self.timestamp)[:2],
+                         [(0, -1), (2, -1)])
+
+    def test_advance(self):
+        """Ensure only new steps are computed at each rollover."""
+        index = CodeIndex(self.secrets)
+        self.assertEqual(index.advance(self.timestamp), 3)
+        self.assertEqual(index.advance(self.timestamp), 0)
+        self.assertEqual(index.advance(self.timestamp + 30), 1)
+        self.assertEqual(index.advance(self.timestamp + 3600), 3)
+
+        code = totp.get_totp_code(self.secrets[5], self.timestamp + 3600)
+        self.assertIn((5, 0), index.lookup(code, self.timestamp + 3600))
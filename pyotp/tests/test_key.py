@@ -0,0 +1,99 @@
+# Copyright (C) 2018 Elizabeth Myers. All rights reserved.
+# See the included LICENSE file for terms of distribution.
+
+from unittest import TestCase
+
+from pyotp import hotp, totp
+from pyotp.key import OTPKey
+from pyotp.constants import HashAlgorithm, SearchOrder
+
+
+class TestOTPKey(TestCase):
+    # Test vectors taken from RFC 4226 and RFC 6238
+    secret = b"12345678901234567890"
+    hotp_codes = ["755224", "287082", "359152", "969429", "338314"]
+
+    secret_algo = {
+        HashAlgorithm.SHA1: b"12345678901234567890",
+        HashAlgorithm.SHA256: b"12345678901234567890123456789012",
+        HashAlgorithm.SHA512: b"1234567890123456789012345678901234567890" \
+                              b"123456789012345678901234",
+    }
+
+    totp_tests = [
+        (59, "94287082", HashAlgorithm.SHA1),
+        (59, "46119246", HashAlgorithm.SHA256),
+        (59, "90693936", HashAlgorithm.SHA512),
+        (1234567890, "89005924", HashAlgorithm.SHA1),
+        (1234567890, "91819424", HashAlgorithm.SHA256),
+        (1234567890, "93441116", HashAlgorithm.SHA512),
+    ]
+
+    def test_hotp(self):
+        """Ensure pre-keyed HOTP generation matches RFC 4226."""
+        key = OTPKey(self.secret)
+        for i, expected in enumerate(self.hotp_codes):
+            with self.subTest(counter=i, expected=expected):
+                self.assertEqual(key.hotp(i), expected)
+
+    def test_totp(self):
+        """Ensure pre-keyed TOTP generation matches RFC 6238."""
+        for (time, expected, algorithm) in self.totp_tests:
+            key = OTPKey(self.secret_algo[algorithm], algorithm, 8)
+            with self.subTest(time=time, algorithm=algorithm):
+                self.assertEqual(key.totp(time), expected)
+
+    def test_check_matches_module(self):
+        """Ensure key checks give the same results as the module functions."""
+        key = OTPKey(self.secret)
+        for counter in range(6):
+            for code in self.hotp_codes + ["000000"]:
+                for constant_time in (True, False):
+                    expected = hotp.check_hotp(code, self.secret, counter,
+                                               above=2,
+                                               constant_time=constant_time)
+                    got = key.check_hotp(code, counter, above=2,
+                                         constant_time=constant_time)
+                    with self.subTest(counter=counter, code=code,
+                                      constant_time=constant_time):
+                        self.assertEqual(got, expected)
+
+        for (time, code, algorithm) in self.totp_tests:
+            secret = self.secret_algo[algorithm]
+            key = OTPKey(secret, algorithm, 8)
+            for offset in (-120, -30, 0, 30, 120):
+                expected = totp.check_totp(code, secret, time + offset,
+                                           hash_algorithm=algorithm)
+                got = key.check_totp(code, time + offset)
+                with self.subTest(time=time, offset=offset,
+                                  algorithm=algorithm):
+                    self.assertEqual(got, expected)
+
+    def test_check_wrong_length(self):
+        """Ensure codes of the wrong length are rejected."""
+        key = OTPKey(self.secret, length=8)
+        self.assertFalse(key.check_hotp(self.hotp_codes[0], 0))
+
+    def test_resync(self):
+        """Ensure OTPKey resyncs as resync_hotp does."""
+        key = OTPKey(self.secret)
+        self.assertEqual(key.resync_hotp(self.hotp_codes[2:5], 0), 5)
+        self.assertIsNone(key.resync_hotp(self.hotp_codes[2:5], 3))
+        self.assertIsNone(OTPKey(self.secret, length=8).resync_hotp(
+            self.hotp_codes[2:5], 0))
+
+    def test_match(self):
+        """Ensure key matches give the same offsets as the module functions."""
+        key = OTPKey(self.secret)
+        for order in SearchOrder:
+            for i, code in enumerate(self.hotp_codes):
+                expected = hotp.match_hotp(code, self.secret, 2, below=2,
+                                           search_order=order)
+                got = key.match_hotp(code, 2, below=2, search_order=order)
+                with self.subTest(order=order, code=code):
+                    self.assertEqual(got, expected)
+                    self.assertEqual(got, i - 2)
+
+            key8 = OTPKey(self.secret, length=8)
+            got = key8.match_totp("89005924", 1234567920, search_order=order)
+            self.assertEqual(got, -1)
@@ -0,0 +1,123 @@
+# Copyright (C) 2018 Elizabeth Myers. All rights reserved.
+# See the included LICENSE file for terms of distribution.
+
+from unittest import TestCase
+
+from pyotp import hotp, totp
+from pyotp.constants import HashAlgorithm
+from pyotp.parallel import ParallelVerifier, SecretTable, _algorithm_ids
+
+
+class TestParallelVerifier(TestCase):
+    timestamp = 1234567890
+
+    tokens = [
+        (b"12345678901234567890", HashAlgorithm.SHA1, 8, 30),
+        (b"12345678901234567890123456789012", HashAlgorithm.SHA256, 8, 30),
+        (b"1234567890123456789012345678901234567890123456789012345678901234",
+         HashAlgorithm.SHA512, 8, 30),
+        (b"abcdefghij", HashAlgorithm.SHA1, 6, 60),
+    ]
+
+    def setUp(self):
+        self.table = SecretTable.create(self.tokens)
+        self.addCleanup(self.table.unlink)
+        self.addCleanup(self.table.close)
+
+    def test_table(self):
+        """Ensure records read back as they were written."""
+        self.assertEqual(len(self.table), len(self.tokens))
+        for i, token in enumerate(self.tokens):
+            secret, hash_algorithm, length, period = self.table.record(i)
+            self.assertEqual((bytes(secret), hash_algorithm, length, period),
+                             token)
+            secret.release()
+
+        with self.assertRaises(IndexError):
+            self.table.record(len(self.tokens))
+
+    def test_table_invalid(self):
+        """Ensure oversized secrets, bad lengths and periods are rejected."""
+        with self.assertRaises(ValueError):
+            SecretTable.create([(b"x" * 65, HashAlgorithm.SHA1, 6, 30)])
+        with self.assertRaises(ValueError):
+            SecretTable.create([(b"x" * 20, HashAlgorithm.SHA1, 9, 30)])
+        with self.assertRaises(ValueError):
+            SecretTable.create([(b"x" * 20, HashAlgorithm.SHA1, 6, 0)])
+
+    def test_totp(self):
+        """Ensure results match match_totp, in order, for any worker count."""
+        requests = []
+        expected = []
+        for i, (secret, hash_algorithm, length, period) in \
+                enumerate(self.tokens * 3):
+            index = i % len(self.tokens)
+            timestamp = self.timestamp + 31 * i
+            code = totp.get_totp_code(secret, timestamp + period, length,
+                                      period, hash_algorithm)
+            if i % 4 == 3:
+                code = "0" * length
+            requests.append((index, code, timestamp))
+            expected.append(totp.match_totp(code, secret, timestamp, period,
+                                            hash_algorithm))
+
+        self.assertIn(None, expected)
+        self.assertIn(1, expected)
+
+        for workers in (1, 3):
+            with self.subTest(workers=workers), \
+                    ParallelVerifier(self.table, workers) as verifier:
+                self.assertEqual(verifier.match_totp_many(requests),
+                                 expected)
+                self.assertEqual(verifier.match_totp_many([]), [])
+
+    def test_hotp(self):
+        """Ensure HOTP results match match_hotp."""
+        secret, hash_algorithm, length, _ = self.tokens[0]
+        code = hotp.get_hotp_code(secret, 7, length, hash_algorithm)
+        requests = [(0, code, 0), (0, code, 7), (0, code, 8),
+                    (1, "00000000", 0), (3, code, 0)]
+        with ParallelVerifier(self.table, 2) as verifier:
+            self.assertEqual(verifier.match_hotp_many(requests),
+                             [7, 0, None, None, None])
+            self.assertEqual(verifier.match_hotp_many(requests, below=1),
+                             [7, 0, -1, None, None])
+
+    def test_bad_index(self):
+        """Ensure unknown token indexes raise IndexError."""
+        with ParallelVerifier(self.table, 1) as verifier:
+            with self.assertRaises(IndexError):
+                verifier.match_totp_many([(99, "12345678", self.timestamp)])
+
+    def test_call_after_error(self):
+        """Ensure a failed call doesn't leave replies for the next one."""
+        secret, hash_algorithm, length, period = self.tokens[1]
+        code = totp.get_totp_code(secret, self.timestamp + 30, length,
+                                  period, hash_algorithm)
+        with ParallelVerifier(self.table, 2) as verifier:
+            with self.assertRaises(IndexError):
+                verifier.match_totp_many([(98, "12345678", self.timestamp),
+                                          (1, code, self.timestamp)])
+
+            requests = [(1, "00000000", self.timestamp),
+                        (1, code, self.timestamp)]
+            self.assertEqual(verifier.match_totp_many(requests), [None, 1])
+            self.assertEqual(verifier.match_totp_many(requests), [None, 1])
+
+    def test_bad_record(self):
+        """Ensure a corrupt record fails its request, not the worker."""
+        secret, hash_algorithm, length, period = self.tokens[1]
+        code = totp.get_totp_code(secret, self.timestamp + 30, length,
+                                  period, hash_algorithm)
+        # Zero the period of record 0 behind create()'s back
+        SecretTable._RECORD.pack_into(self.table.shm.buf, 0, secret,
+                                      len(secret),
+                                      _algorithm_ids[hash_algorithm], length,
+                                      0)
+        with ParallelVerifier(self.table, 1) as verifier:
+            with self.assertRaises(ZeroDivisionError):
+                verifier.match_totp_many([(0, code, self.timestamp),
+                                          (1, code, self.timestamp)])
+
+            requests = [(1, code, self.timestamp)]
+            self.assertEqual(verifier.match_totp_many(requests), [1])
@@ -0,0 +1,162 @@
+# Copyright (C) 2018 Elizabeth Myers. All rights reserved.
+# See the included LICENSE file for terms of distribution.
+
+from threading import Event, Thread
+from time import monotonic
+from unittest import TestCase
+from unittest.mock import patch
+
+from pyotp import common, totp
+from pyotp.prewarm import Prewarmer, StepClock
+
+
+class FakeClock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class TestStepClock(TestCase):
+    def test_step(self):
+        """Ensure the step follows the clock across rollovers."""
+        fake = FakeClock(1234567890)
+        clock = StepClock(30, fake)
+        self.assertEqual(clock.step(), 41152263)
+        self.assertEqual(clock.until_rollover(), 30)
+        fake.now += 1
+        self.assertEqual(clock.step(), 41152263)
+        self.assertEqual(clock.until_rollover(), 29)
+        fake.now += 29
+        self.assertEqual(clock.step(), 41152264)
+        fake.now -= 3600
+        self.assertEqual(clock.step(), 41152144)
+
+
+class TestPrewarmer(TestCase):
+    secret = b"12345678901234567890"
+
+    def setUp(self):
+        # 10 seconds before a rollover
+        self.fake = FakeClock(41152263 * 30 + 20)
+        self.prewarmer = Prewarmer(clock=StepClock(30, self.fake), lead=5,
+                                   below=60)
+        common.enable_stats()
+        self.addCleanup(common.disable_stats)
+
+    def check(self, steps, secret=None):
+        secret = secret or self.secret
+        code = totp.get_totp_code(secret, self.fake.now + steps * 30)
+        return self.prewarmer.match_totp(code, secret)
+
+    def test_prewarm(self):
+        """Ensure codes are computed ahead, and checks become lookups."""
+        self.assertEqual(self.check(0), 0)
+        self.assertEqual(common.stats_snapshot()["totp"]["cached_checks"],
+                         0)
+
+        self.prewarmer.tick()
+        self.assertEqual(self.check(-2), -2)
+        self.assertEqual(self.check(1), 1)
+        self.assertIsNone(self.check(2))
+        self.assertIsNone(self.prewarmer.match_totp("12345", self.secret))
+
+        # Into the lead time: the next step is prepared, but not published
+        self.fake.now += 6
+        self.prewarmer.tick()
+        self.assertEqual(len(self.prewarmer._next), 1)
+        self.assertEqual(self.check(0), 0)
+
+        self.fake.now += 4
+        self.prewarmer.tick()
+        for steps in (-2, -1, 0, 1):
+            self.assertEqual(self.check(steps), steps)
+        self.assertEqual(common.stats_snapshot()["totp"]["cached_checks"],
+                         9)
+        # Only the first check, before any tick, needed HMACs
+        self.assertEqual(common.stats_snapshot()["totp"]["hmacs"], 4)
+
+    def test_budget(self):
+        """Ensure each tick does at most max_per_tick secrets."""
+        self.prewarmer.max_per_tick = 2
+        secrets = [bytes([i]) * 20 for i in range(5)]
+        for secret in secrets:
+            self.check(0, secret)
+
+        self.assertEqual(self.prewarmer.tick(), 0)
+        self.assertEqual(len(self.prewarmer._current[1]), 2)
+        self.prewarmer.tick()
+        self.assertGreater(self.prewarmer.tick(), 0)
+        self.assertEqual(len(self.prewarmer._current[1]), 5)
+
+    def test_idle(self):
+        """Ensure secrets not checked for a while are dropped."""
+        self.prewarmer.idle = 60
+        self.check(0)
+        self.prewarmer.tick()
+        self.fake.now += 120
+        self.prewarmer.tick()
+        self.assertEqual(len(self.prewarmer), 0)
+        self.assertEqual(self.prewarmer._current[1], {})
+
+    def test_thread(self):
+        """Ensure the background thread starts and stops."""
+        self.check(0)
+        self.prewarmer.start()
+        self.prewarmer.start()
+        self.prewarmer.stop()
+        self.prewarmer.stop()
+        self.assertIn(self.secret, self.prewarmer._current[1])
+
+    def test_concurrent_rollover(self):
+        """Ensure checks from many threads across rollovers are safe."""
+        prewarmer = Prewarmer(grace_period=1, below=1, above=1, lead=0.5,
+                              idle=1, interval=0.01)
+        errors = []
+
+        def check(thread):
+            # New secrets all the time, so the active set keeps changing
+            deadline = monotonic() + 1.5
+            i = 0
+            while monotonic() < deadline:
+                secret = "{}-{}".format(thread, i % 5000).encode()
+                i += 1
+                now = prewarmer.clock.now()
+                code = totp.get_totp_code(secret, now, grace_period=1)
+                if prewarmer.match_totp(code, secret, now) is None:
+                    errors.append(secret)
+
+        prewarmer.start()
+        self.addCleanup(prewarmer.stop)
+        threads = [Thread(target=check, args=(i,)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertTrue(prewarmer._thread.is_alive())
+        self.assertEqual(errors, [])
+        self.assertGreater(len(prewarmer._current[1]), 0)
+
+    def test_tick_error_logged(self):
+        """Ensure an error in a tick is logged and the thread carries on."""
+        calls = []
+        done = Event()
+
+        def tick():
+            calls.append(None)
+            if len(calls) == 1:
+                raise RuntimeError("boom")
+            if len(calls) == 3:
+                done.set()
+            return 0.01
+
+        with patch.object(self.prewarmer, "tick", tick), \
+                self.assertLogs("pyotp.prewarm") as logs:
+            self.prewarmer.interval = 0.01
+            self.prewarmer.start()
+            self.assertTrue(done.wait(5))
+            self.prewarmer.stop()
+
+        self.assertIn("boom", logs.output[0])
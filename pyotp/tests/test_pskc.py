@@ -0,0 +1,113 @@
+# Copyright (C) 2018 Elizabeth Myers. All rights reserved.
+# See the included LICENSE file for terms of distribution.
+
+from io import BytesIO
+from unittest import TestCase
+from xml.etree.ElementTree import ParseError
+
+from pyotp import hotp, totp
+from pyotp.constants import HashAlgorithm, OTPType
+from pyotp.pskc import parse_pskc
+
+
+# Based on the examples in RFC 6030
+PSKC = b"""<?xml version="1.0" encoding="UTF-8"?>
+<KeyContainer Version="1.0" xmlns="urn:ietf:params:xml:ns:keyprov:pskc">
+  <KeyPackage>
+    <DeviceInfo>
+      <Manufacturer>Manufacturer</Manufacturer>
+      <SerialNo>987654321</SerialNo>
+    </DeviceInfo>
+    <Key Id="12345678" Algorithm="urn:ietf:params:xml:ns:keyprov:pskc:hotp">
+      <Issuer>Issuer-A</Issuer>
+      <AlgorithmParameters>
+        <ResponseFormat Length="8" Encoding="DECIMAL"/>
+      </AlgorithmParameters>
+      <Data>
+        <Secret>
+          <PlainValue>MTIzNDU2Nzg5MDEyMzQ1Njc4OTA=</PlainValue>
+        </Secret>
+        <Counter><PlainValue>3</PlainValue></Counter>
+      </Data>
+      <UserId>alice</UserId>
+    </Key>
+  </KeyPackage>
+  <KeyPackage>
+    <Key Id="t1" Algorithm="urn:ietf:params:xml:ns:keyprov:pskc:totp">
+      <AlgorithmParameters>
+        <Suite>HMAC-SHA256</Suite>
+        <ResponseFormat Length="6" Encoding="DECIMAL"/>
+      </AlgorithmParameters>
+      <Data>
+        <Secret>
+          <PlainValue>MTIzNDU2Nzg5MDEyMzQ1Njc4OTAxMjM0NTY3ODkwMTI=</PlainValue>
+        </Secret>
+        <TimeInterval><PlainValue>60</PlainValue></TimeInterval>
+      </Data>
+    </Key>
+  </KeyPackage>
+  <KeyPackage>
+    <Key Id="e1" Algorithm="urn:ietf:params:xml:ns:keyprov:pskc:hotp">
+      <Data>
+        <Secret><EncryptedValue/></Secret>
+      </Data>
+    </Key>
+  </KeyPackage>
+  <KeyPackage>
+    <Key Id="o1" Algorithm="urn:ietf:params:xml:ns:keyprov:pskc:ocra">
+    </Key>
+  </KeyPackage>
+  <KeyPackage>
+    <Key Id="r1" Algorithm="urn:ietf:params:xml:ns:keyprov:pskc:hotp">
+      <AlgorithmParameters>
+        <ResponseFormat Length="8" Encoding="HEXADECIMAL"/>
+      </AlgorithmParameters>
+    </Key>
+  </KeyPackage>
+</KeyContainer>
+"""
+
+
+class TestPSKC(TestCase):
+    def test_parse(self):
+        """Ensure tokens are read with their parameters."""
+        records = list(parse_pskc(BytesIO(PSKC)))
+        self.assertEqual([number for number, _, _ in records],
+                         [1, 2, 3, 4, 5])
+
+        _, key, error = records[0]
+        self.assertIsNone(error)
+        self.assertEqual((key.key_id, key.serial, key.issuer, key.user_id),
+                         ("12345678", "987654321", "Issuer-A", "alice"))
+        self.assertEqual((key.otp_type, key.hash_algorithm, key.length,
+                          key.counter),
+                         (OTPType.HOTP, HashAlgorithm.SHA1, 8, 3))
+        self.assertEqual(key.secret, b"12345678901234567890")
+        self.assertEqual(hotp.get_hotp_code(key.secret, key.counter,
+                                            key.length,
+                                            key.hash_algorithm), "26969429")
+
+        _, key, error = records[1]
+        self.assertIsNone(error)
+        self.assertEqual((key.otp_type, key.hash_algorithm, key.length,
+                          key.grace_period, key.counter, key.serial),
+                         (OTPType.TOTP, HashAlgorithm.SHA256, 6, 60, None,
+                          None))
+        self.assertTrue(totp.check_totp(
+            totp.get_totp_code(key.secret, 1234567890, key.length,
+                               key.grace_period, key.hash_algorithm),
+            key.secret, 1234567890, key.grace_period, key.hash_algorithm))
+
+    def test_errors(self):
+        """Ensure unusable packages are reported, not fatal."""
+        errors = [error for _, record, error in parse_pskc(BytesIO(PSKC))
+                  if record is None]
+        self.assertEqual(len(errors), 3)
+        self.assertIn("encrypted", errors[0])
+        self.assertIn("algorithm", errors[1])
+        self.assertIn("encoding", errors[2])
+
+    def test_malformed(self):
+        """Ensure malformed XML raises ParseError."""
+        with self.assertRaises(ParseError):
+            list(parse_pskc(BytesIO(PSKC[:200])))
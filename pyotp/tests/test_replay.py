@@ -0,0 +1,118 @@
+# Copyright (C) 2018 Elizabeth Myers. All rights reserved.
+# See the included LICENSE file for terms of distribution.
+
+import os
+
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from pyotp import hotp, totp
+from pyotp.replay import MemoryReplayStore, SQLiteReplayStore
+
+
+class ReplayStoreTests:
+    # Tests shared by all stores; subclasses set up self.store
+
+    def test_reserve(self):
+        """Ensure only newer steps are reserved."""
+        self.assertTrue(self.store.reserve("alice", 10))
+        self.assertFalse(self.store.reserve("alice", 10))
+        self.assertFalse(self.store.reserve("alice", 9))
+        self.assertTrue(self.store.reserve("bob", 10))
+        self.assertTrue(self.store.reserve("alice", 11))
+
+    def test_reserve_many(self):
+        """Ensure batch reservations give per-item results in order."""
+        items = [("alice", 1), ("bob", 1), ("alice", 1), ("alice", 2)]
+        self.assertEqual(self.store.reserve_many(items),
+                         [True, True, False, True])
+
+    def test_check_totp(self):
+        """Ensure an accepted TOTP code can't be used again."""
+        secret = b"12345678901234567890"
+        code = totp.get_totp_code(secret, 1000)
+        kwargs = {"replay": self.store, "replay_key": "alice"}
+
+        self.assertTrue(totp.check_totp(code, secret, 1000, **kwargs))
+        self.assertFalse(totp.check_totp(code, secret, 1001, **kwargs))
+
+        # An older code still in the window is a replay too
+        code = totp.get_totp_code(secret, 1000 - 30)
+        self.assertIsNone(totp.match_totp(code, secret, 1000, **kwargs))
+
+        code = totp.get_totp_code(secret, 1000 + 30)
+        self.assertEqual(totp.match_totp(code, secret, 1000, **kwargs), 1)
+
+    def test_check_hotp(self):
+        """Ensure an accepted HOTP code can't be used again."""
+        secret = b"12345678901234567890"
+        code = hotp.get_hotp_code(secret, 3)
+        kwargs = {"replay": self.store, "replay_key": "token-1"}
+
+        self.assertEqual(hotp.match_hotp(code, secret, 0, **kwargs), 3)
+        self.assertFalse(hotp.check_hotp(code, secret, 0, **kwargs))
+        self.assertFalse(hotp.check_hotp(hotp.get_hotp_code(secret, 2),
+                                         secret, 0, **kwargs))
+
+    def test_key_required(self):
+        """Ensure a replay key must be given with a store."""
+        with self.assertRaises(ValueError):
+            totp.check_totp("000000", b"secret", replay=self.store)
+
+
+class TestMemoryReplayStore(ReplayStoreTests, TestCase):
+    def setUp(self):
+        self.now = 0.0
+        self.store = MemoryReplayStore(clock=lambda: self.now)
+
+    def test_ttl(self):
+        """Ensure records expire after their TTL."""
+        self.assertTrue(self.store.reserve("alice", 10, ttl=90))
+        self.now = 89.0
+        self.assertFalse(self.store.reserve("alice", 10, ttl=90))
+        self.now = 91.0
+        self.assertTrue(self.store.reserve("alice", 10, ttl=90))
+
+        # Expired records are dropped as others in their stripe are added
+        store = MemoryReplayStore(stripes=1, clock=lambda: self.now)
+        store.reserve("alice", 10, ttl=90)
+        self.now = 200.0
+        store.reserve("bob", 1, ttl=90)
+        self.assertEqual(len(store), 1)
+
+    def test_maxsize(self):
+        """Ensure the store stays within its size bound."""
+        store = MemoryReplayStore(maxsize=8, stripes=2)
+        for i in range(100):
+            store.reserve(i, 1)
+        self.assertLessEqual(len(store), 8)
+        self.assertEqual(store.evictions, 100 - len(store))
+
+
+class TestSQLiteReplayStore(ReplayStoreTests, TestCase):
+    def setUp(self):
+        self.tempdir = TemporaryDirectory()
+        self.path = os.path.join(self.tempdir.name, "replay.db")
+        self.store = SQLiteReplayStore(self.path)
+
+    def tearDown(self):
+        self.store.close()
+        self.tempdir.cleanup()
+
+    def test_persistence(self):
+        """Ensure reservations survive reopening the database."""
+        self.assertTrue(self.store.reserve("alice", 10))
+        self.store.close()
+
+        self.store = SQLiteReplayStore(self.path, batch_size=1)
+        self.assertFalse(self.store.reserve("alice", 10))
+        self.assertTrue(self.store.reserve("alice", 11))
+
+    def test_ttl(self):
+        """Ensure expired records can be reserved again and are purged."""
+        self.assertTrue(self.store.reserve("alice", 10, ttl=-1))
+        self.assertTrue(self.store.reserve("alice", 10, ttl=-1))
+        self.store.purge()
+        count = self.store._conn.execute(
+            "SELECT COUNT(*) FROM pyotp_replay").fetchone()[0]
+        self.assertEqual(count, 0)
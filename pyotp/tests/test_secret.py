@@ -1,10 +1,16 @@
 # Copyright (C) 2018 Elizabeth Myers. All rights reserved.
 # See the included LICENSE file for terms of distribution.
 
+import base64
+import binascii
+import csv
+import json
+
+from io import StringIO
 from unittest import TestCase
 
 from pyotp import secret
-from pyotp.constants import SecretLength, SecretEncoding
+from pyotp.constants import ExportFormat, SecretLength, SecretEncoding
 
 
 class TestSecretGenerationLength(TestCase):
@@ -29,6 +35,51 @@ class TestSecretGenerationLength(TestCase):
         self.assertEqual(len(s), SecretLength.GOOGLE_AUTH.value)
 
 
+class TestBulkSecrets(TestCase):
+    def test_make_secrets(self):
+        """Test bulk secret generation for every encoding and chunking."""
+        for encoding in [None] + list(SecretEncoding):
+            for length in (SecretLength.GOOGLE_AUTH, 16, 20, 7):
+                s = list(secret.make_secrets(50, length, encoding,
+                                             chunk_size=64))
+                with self.subTest(encoding=encoding, length=length):
+                    self.assertEqual(len(s), 50)
+                    self.assertEqual(len(set(s)), 50)
+                    if encoding is not None:
+                        s = [secret.decode_secret(e, encoding) for e in s]
+                    for raw in s:
+                        self.assertEqual(len(raw), getattr(length, "value",
+                                                           length))
+
+    def test_make_secrets_matches_encode(self):
+        """Test that batch encoding matches encode_secret."""
+        for encoding in SecretEncoding:
+            for encoded in secret.make_secrets(20, 20, encoding):
+                raw = secret.decode_secret(encoded, encoding)
+                with self.subTest(encoding=encoding, encoded=encoded):
+                    self.assertEqual(secret.encode_secret(raw, encoding),
+                                     encoded)
+
+    def test_write_secrets(self):
+        """Test writing secrets as CSV and JSONL."""
+        secrets = [b"AAAA", "BB,\"B", b"CCCC"]
+
+        out = StringIO()
+        self.assertEqual(secret.write_secrets(out, secrets, start=1,
+                                              batch_size=2), 3)
+        out.seek(0)
+        rows = list(csv.reader(out))
+        self.assertEqual(rows, [["id", "secret"], ["1", "AAAA"],
+                                ["2", "BB,\"B"], ["3", "CCCC"]])
+
+        out = StringIO()
+        secret.write_secrets(out, secrets, ExportFormat.JSONL, batch_size=2)
+        rows = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual(rows, [{"id": 0, "secret": "AAAA"},
+                                {"id": 1, "secret": "BB,\"B"},
+                                {"id": 2, "secret": "CCCC"}])
+
+
 # Test data for encoding and decoding
 # format:
 # encoding: { (byte, size): expected value, ... }
@@ -98,7 +149,6 @@ class TestSecretEncoding(TestCase):
 
 
 class TestSecretDecoding(TestCase):
-    # TODO: test invalid strings in decoding
     def test_decoding(self):
         """Test that decoding of secrets is correct"""
         for encoding, val in test_data.items():
@@ -117,3 +167,33 @@ class TestSecretDecoding(TestCase):
         test_str = b"\x00" * SecretLength.GOOGLE_AUTH.value
         s = secret.decode_secret(b"AAAAAAAAAAAAAAAA")
         self.assertEqual(s, test_str)
+
+    def test_base32_matches_b32decode(self):
+        """Ensure base32 decoding matches base64.b32decode for all lengths"""
+        for length in range(41):
+            test_str = bytes(range(256 - length, 256))
+            encoded = base64.b32encode(test_str)
+            with self.subTest(length=length):
+                self.assertEqual(secret.decode_secret(encoded), test_str)
+
+    def test_base32_tolerant(self):
+        """Test that base32 decoding tolerates case, padding and whitespace"""
+        expected = b"\x00" * SecretLength.RFC_4226_MIN.value
+        for encoded in (b"AAAAAAAAAAAAAAAAAAAAAAAAAA",
+                        b"aaaaaaaaaaaaaaaaaaaaaaaaaa======",
+                        b"aaaa AAAA aaaa AAAA aaaa AAAA aa\n",
+                        "AAAAAAAAAAAAAAAAAAAAAAAAAA",
+                        memoryview(b"AAAAAAAAAAAAAAAAAAAAAAAAAA")):
+            with self.subTest(encoded=encoded):
+                self.assertEqual(secret.decode_secret(encoded), expected)
+
+    def test_base32_invalid(self):
+        """Test that invalid base32 is rejected"""
+        for encoded in (b"A", b"AAA", b"AAAAAA", b"AAAAAAA1", b"AA=AAAAA",
+                        b"+AAAAAAA", b"AAAA_AAA"):
+            with self.subTest(encoded=encoded):
+                with self.assertRaises(binascii.Error):
+                    secret.decode_secret(encoded)
+
+        with self.assertRaises(ValueError):
+            secret.decode_secret("AAAAAAA\u00e9")
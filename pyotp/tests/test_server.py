@@ -0,0 +1,138 @@
+# Copyright (C) 2018 Elizabeth Myers. All rights reserved.
+# See the included LICENSE file for terms of distribution.
+
+import asyncio
+import os
+
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from pyotp import server
+from pyotp.constants import HashAlgorithm, OTPType
+from pyotp.replay import MemoryReplayStore
+from pyotp.totp import get_totp_code
+
+
+class TestServer(TestCase):
+    secret = b"12345678901234567890"
+    timestamp = 1234567890
+
+    def setUp(self):
+        self.tempdir = TemporaryDirectory()
+        self.path = os.path.join(self.tempdir.name, "pyotp.sock")
+        self.loop = asyncio.new_event_loop()
+        self.server = server.Server(replay=MemoryReplayStore())
+        self.listener = self.loop.run_until_complete(
+            self.server.start_unix(self.path))
+        self.client = server.Client(self.path, pool_size=2)
+
+    def tearDown(self):
+        self.loop.run_until_complete(self.client.close())
+        self.listener.close()
+        self.loop.run_until_complete(self.listener.wait_closed())
+        self.loop.close()
+        self.tempdir.cleanup()
+
+    def run_async(self, coro):
+        return self.loop.run_until_complete(coro)
+
+    def test_checks(self):
+        """Ensure checks through the server match local results."""
+        client = self.client
+        code = get_totp_code(self.secret, self.timestamp)
+
+        async def checks():
+            return await asyncio.gather(
+                client.check_totp(code, self.secret, self.timestamp),
+                client.match_totp(code, self.secret, self.timestamp + 30),
+                client.check_totp("000000", self.secret, self.timestamp),
+                client.match_totp("89005924", self.secret, self.timestamp,
+                                  hash_algorithm=HashAlgorithm.SHA1),
+                client.match_hotp("287082", self.secret, 0),
+                client.check_hotp("287082", self.secret, 0, above=0),
+            )
+
+        self.assertEqual(self.run_async(checks()),
+                         [True, -1, False, 0, 1, False])
+
+    def test_pipelined_batch(self):
+        """Ensure many pipelined requests and batch frames are answered."""
+        client = self.client
+        codes = [get_totp_code(self.secret, self.timestamp + i * 30)
+                 for i in range(-1, 2)]
+
+        async def checks():
+            singles = [client.match_totp(code, self.secret, self.timestamp)
+                       for code in codes * 20]
+            items = [server.encode_item(OTPType.TOTP, code, self.secret,
+                                        self.timestamp) for code in codes]
+            items.append(server.encode_item(OTPType.HOTP, "755224",
+                                            self.secret, 0))
+            return await asyncio.gather(client.verify_many(items), *singles)
+
+        results = self.run_async(checks())
+        self.assertEqual(results[0], [-1, 0, 1, 0])
+        self.assertEqual(results[1:], [-1, 0, 1] * 20)
+
+    def test_replay(self):
+        """Ensure the server's replay store is used with a replay key."""
+        code = get_totp_code(self.secret, self.timestamp)
+        check = self.client.check_totp(code, self.secret, self.timestamp,
+                                       replay_key="alice")
+        self.assertTrue(self.run_async(check))
+        check = self.client.check_totp(code, self.secret, self.timestamp,
+                                       replay_key="alice")
+        self.assertFalse(self.run_async(check))
+
+    def test_window_limit(self):
+        """Ensure windows past the server's limits are rejected."""
+        code = get_totp_code(self.secret, self.timestamp)
+        items = [
+            server.encode_item(OTPType.TOTP, code, self.secret,
+                               self.timestamp, below=600, above=600),
+            server.encode_item(OTPType.TOTP, code, self.secret,
+                               self.timestamp, below=601),
+            server.encode_item(OTPType.TOTP, code, self.secret,
+                               self.timestamp, above=0xFFFFFFFF),
+            server.encode_item(OTPType.HOTP, code, self.secret, 0,
+                               above=101),
+        ]
+        response = self.server.handle_request(
+            server.encode_request(1, items)[4:])
+        _, results = server.decode_response(response[4:])
+        error = (server.STATUS_ERROR, server.ERROR_WINDOW)
+        self.assertEqual(results, [(server.STATUS_OK, 0)] + [error] * 3)
+
+        with self.assertRaises(ValueError):
+            self.run_async(self.client.check_hotp(code, self.secret, 0,
+                                                  above=1000))
+
+    def test_cache_disabled(self):
+        """Ensure cache=None turns the code cache off."""
+        self.assertIsNotNone(self.server.cache)
+        uncached = server.Server(cache=None)
+        self.assertIsNone(uncached.cache)
+        code = get_totp_code(self.secret, self.timestamp)
+        item = server.encode_item(OTPType.TOTP, code, self.secret,
+                                  self.timestamp)
+        response = uncached.handle_request(
+            server.encode_request(1, [item])[4:])
+        self.assertEqual(server.decode_response(response[4:])[1],
+                         [(server.STATUS_OK, 0)])
+
+    def test_errors(self):
+        """Ensure invalid items are reported as errors."""
+        # Over-long codes simply don't match
+        self.assertFalse(self.run_async(self.client.check_totp("0" * 9,
+                                                               self.secret)))
+        with self.assertRaises(ValueError):
+            self.run_async(self.client.check_totp(
+                "000000", self.secret, grace_period=0))
+
+        item = server.encode_item(OTPType.TOTP, "000000", self.secret)
+        response = self.server.handle_request(
+            server.encode_request(7, [item[:-3]])[4:])
+        request_id, results = server.decode_response(response[4:])
+        self.assertEqual(request_id, 7)
+        self.assertEqual(results, [(server.STATUS_ERROR,
+                                    server.ERROR_MALFORMED)])
@@ -0,0 +1,91 @@
+# Copyright (C) 2018 Elizabeth Myers. All rights reserved.
+# See the included LICENSE file for terms of distribution.
+
+from unittest import TestCase
+
+from pyotp import common, hotp, totp
+from pyotp.cache import CodeCache
+from pyotp.key import OTPKey
+from pyotp.replay import MemoryReplayStore
+
+
+class TestStats(TestCase):
+    secret = b"12345678901234567890"
+    timestamp = 1234567890
+
+    def setUp(self):
+        self.events = []
+        common.enable_stats(self.events.append)
+        self.addCleanup(common.disable_stats)
+
+    def test_disabled(self):
+        """Ensure nothing is recorded unless stats are enabled."""
+        common.disable_stats()
+        totp.check_totp("000000", self.secret, self.timestamp)
+        self.assertIsNone(common.stats_snapshot())
+        self.assertEqual(self.events, [])
+
+    def test_totp(self):
+        """Ensure TOTP matches, failures, offsets, and HMACs are counted."""
+        code = totp.get_totp_code(self.secret, self.timestamp - 30)
+        self.assertTrue(totp.check_totp(code, self.secret, self.timestamp))
+        self.assertTrue(totp.check_totp(code, self.secret, self.timestamp,
+                                        constant_time=False))
+        self.assertFalse(totp.check_totp("000000", self.secret,
+                                         self.timestamp, below=60,
+                                         above=60))
+        self.assertFalse(totp.check_totp("abc", self.secret, self.timestamp))
+
+        stats = common.stats_snapshot()["totp"]
+        self.assertEqual(stats["checks"], 4)
+        self.assertEqual(stats["matches"], 2)
+        self.assertEqual(stats["failures"], 2)
+        self.assertEqual(stats["offsets"], {-1: 2})
+        self.assertEqual(stats["failures_by_window"], {5: 1, 3: 1})
+        # 3 constant time, 1 stopping at the first, 5 for the failure, and
+        # none for a code that doesn't parse
+        self.assertEqual(stats["hmacs"], 3 + 1 + 5)
+        self.assertGreater(stats["seconds"], 0)
+        self.assertNotIn("hotp", common.stats_snapshot())
+
+        self.assertEqual([event["offset"] for event in self.events],
+                         [-1, -1, None, None])
+        self.assertEqual(self.events[0]["type"], "totp")
+        self.assertEqual(self.events[0]["window"], 3)
+
+    def test_hotp(self):
+        """Ensure HOTP checks and OTPKey checks are counted."""
+        code = hotp.get_hotp_code(self.secret, 4)
+        self.assertTrue(hotp.check_hotp(code, self.secret, 2))
+        key = OTPKey(self.secret)
+        self.assertTrue(key.check_hotp(code, 4))
+        self.assertTrue(key.check_totp(key.totp(self.timestamp),
+                                       self.timestamp))
+
+        stats = common.stats_snapshot()
+        self.assertEqual(stats["hotp"]["offsets"], {2: 1, 0: 1})
+        self.assertEqual(stats["hotp"]["hmacs"], 32)
+        self.assertEqual(stats["totp"]["offsets"], {0: 1})
+
+    def test_cache_and_replay(self):
+        """Ensure cached checks and replayed codes are counted apart."""
+        code = totp.get_totp_code(self.secret, self.timestamp)
+        store = MemoryReplayStore()
+        cache = CodeCache()
+        for _ in range(2):
+            totp.check_totp(code, self.secret, self.timestamp, cache=cache,
+                            replay=store, replay_key="user")
+
+        stats = common.stats_snapshot()["totp"]
+        self.assertEqual(stats["cached_checks"], 2)
+        self.assertEqual(stats["hmacs"], 0)
+        self.assertEqual(stats["matches"], 1)
+        self.assertEqual(stats["replayed"], 1)
+        self.assertEqual(self.events[1]["hmacs"], None)
+        self.assertTrue(self.events[1]["replayed"])
+
+    def test_reset(self):
+        """Ensure enabling again starts from nothing."""
+        totp.check_totp("000000", self.secret, self.timestamp)
+        common.enable_stats()
+        self.assertEqual(common.stats_snapshot(), {})
@@ -0,0 +1,86 @@
+# Copyright (C) 2018 Elizabeth Myers. All rights reserved.
+# See the included LICENSE file for terms of distribution.
+
+import os
+
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from pyotp import totp
+from pyotp.constants import HashAlgorithm
+from pyotp.table import CodeTable, write_table
+
+
+class TestCodeTable(TestCase):
+    secrets = [b"12345678901234567890", b"abcdefghijklmnopqrst", b"xyz"]
+    start = 1234567890
+    end = 1234567890 + 3600
+
+    def setUp(self):
+        tempdir = TemporaryDirectory()
+        self.addCleanup(tempdir.cleanup)
+        self.path = os.path.join(tempdir.name, "codes.tbl")
+
+    def write(self, **kwargs):
+        with open(self.path, "wb") as f:
+            self.assertEqual(write_table(f, self.secrets, self.start,
+                                         self.end, **kwargs),
+                             len(self.secrets))
+
+    def test_codes(self):
+        """Ensure table codes and matches agree with pyotp.totp."""
+        self.write(length=8, hash_algorithm=HashAlgorithm.SHA256)
+        with CodeTable(self.path) as table:
+            self.assertEqual(len(table), 3)
+            self.assertEqual(table.steps, 121)
+            for token, secret in enumerate(self.secrets):
+                for timestamp in (self.start, self.start + 1000, self.end):
+                    with self.subTest(token=token, timestamp=timestamp):
+                        expected = totp.get_totp_code_int(
+                            secret, timestamp, 8,
+                            hash_algorithm=HashAlgorithm.SHA256)
+                        step = timestamp // 30
+                        self.assertEqual(table.code_int(token, step),
+                                         expected)
+
+                        code = totp.get_totp_code(
+                            secret, timestamp + 30, 8,
+                            hash_algorithm=HashAlgorithm.SHA256)
+                        for constant_time in (False, True):
+                            self.assertEqual(
+                                table.match_totp(token, code, timestamp,
+                                                 constant_time=constant_time),
+                                1 if timestamp < self.end else None)
+
+    def test_outside_table(self):
+        """Ensure steps and codes the table can't check don't match."""
+        self.write()
+        secret = self.secrets[0]
+        with CodeTable(self.path) as table:
+            code = totp.get_totp_code(secret, self.start)
+            self.assertTrue(table.check_totp(0, code, self.start))
+            self.assertFalse(table.check_totp(1, code, self.start))
+            self.assertFalse(table.check_totp(0, code, self.start - 3600))
+            self.assertFalse(table.check_totp(0, code + "0", self.start))
+            self.assertFalse(table.check_totp(0, "abcdef", self.start))
+            with self.assertRaises(IndexError):
+                table.code_int(0, self.end // 30 + 1)
+            with self.assertRaises(IndexError):
+                table.check_totp(3, code, self.start)
+
+    def test_invalid(self):
+        """Ensure bad and truncated files are rejected."""
+        with open(self.path, "wb") as f:
+            f.write(b"not a table at all, not even close")
+        with self.assertRaises(ValueError):
+            CodeTable(self.path)
+
+        self.write()
+        with open(self.path, "r+b") as f:
+            f.truncate(os.path.getsize(self.path) - 1)
+        with self.assertRaises(ValueError):
+            CodeTable(self.path)
+
+        with open(self.path, "wb") as f:
+            with self.assertRaises(ValueError):
+                write_table(f, self.secrets, self.end, self.start)
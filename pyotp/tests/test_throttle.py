@@ -0,0 +1,88 @@
+# Copyright (C) 2018 Elizabeth Myers. All rights reserved.
+# See the included LICENSE file for terms of distribution.
+
+from unittest import TestCase
+from unittest.mock import patch
+
+from pyotp import hotp, totp
+from pyotp.throttle import MemoryThrottleStore
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestMemoryThrottleStore(TestCase):
+    def test_bucket(self):
+        """Ensure attempts run out, and refill at the given rate."""
+        clock = FakeClock()
+        store = MemoryThrottleStore(burst=3, rate=0.5, clock=clock)
+        self.assertEqual([store.acquire("user") for _ in range(4)],
+                         [True, True, True, False])
+        self.assertTrue(store.acquire("other"))
+        self.assertEqual(store.rejected, 1)
+
+        clock.now += 1
+        self.assertFalse(store.acquire("user"))
+        clock.now += 1
+        self.assertTrue(store.acquire("user"))
+
+        clock.now += 3600
+        self.assertEqual([store.acquire("user") for _ in range(4)],
+                         [True, True, True, False])
+
+        store.reset("user")
+        self.assertTrue(store.acquire("user"))
+
+    def test_eviction(self):
+        """Ensure each stripe stays within its share of maxsize."""
+        store = MemoryThrottleStore(maxsize=4, stripes=1)
+        for i in range(10):
+            store.acquire(i)
+        self.assertEqual(len(store), 4)
+        self.assertEqual(store.evictions, 6)
+        store.clear()
+        self.assertEqual(len(store), 0)
+
+
+class TestThrottledChecks(TestCase):
+    secret = b"12345678901234567890"
+    timestamp = 1234567890
+
+    def test_totp(self):
+        """Ensure throttled TOTP checks compute no codes."""
+        store = MemoryThrottleStore(burst=2)
+        for _ in range(2):
+            self.assertFalse(totp.check_totp(
+                "000000", self.secret, self.timestamp, throttle=store,
+                throttle_key="user"))
+
+        code = totp.get_totp_code(self.secret, self.timestamp)
+        with patch.object(totp, "find_keyed") as find_keyed:
+            self.assertIsNone(totp.match_totp(
+                code, self.secret, self.timestamp, throttle=store,
+                throttle_key="user"))
+            find_keyed.assert_not_called()
+
+        with self.assertRaises(ValueError):
+            totp.check_totp(code, self.secret, self.timestamp,
+                            throttle=store)
+
+    def test_success_resets(self):
+        """Ensure a successful check refills the bucket."""
+        store = MemoryThrottleStore(burst=2)
+        code = hotp.get_hotp_code(self.secret, 1)
+        self.assertFalse(hotp.check_hotp("000000", self.secret, 0,
+                                         throttle=store, throttle_key="u"))
+        self.assertTrue(hotp.check_hotp(code, self.secret, 0,
+                                        throttle=store, throttle_key="u"))
+        for _ in range(2):
+            self.assertFalse(hotp.check_hotp("000000", self.secret, 0,
+                                             throttle=store,
+                                             throttle_key="u"))
+        self.assertFalse(hotp.check_hotp(code, self.secret, 0,
+                                         throttle=store, throttle_key="u"))
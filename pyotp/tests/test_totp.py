@@ -4,7 +4,7 @@
 from unittest import TestCase, skip
 
 from pyotp import totp
-from pyotp.constants import HashAlgorithm
+from pyotp.constants import HashAlgorithm, SearchOrder
 
 
 class TestTOTPGeneration(TestCase):
@@ -107,3 +107,19 @@ class TestTOTPGeneration(TestCase):
         with self.subTest(secret=secret, check=check, time=test[0],
                            msg="Ensure invalid secret is rejected"):
             self.assertFalse(check)
+
+
+class TestTOTPMatch(TestCase):
+    secret = b"12345678901234567890"
+
+    def test_totp_match(self):
+        """Ensure the matched time step offset is returned."""
+        # "89005924" is the RFC 6238 code for Unix time 1234567890
+        for order in SearchOrder:
+            for delta, expected in ((0, 0), (30, -1), (-30, 1), (90, None)):
+                offset = totp.match_totp("89005924", self.secret,
+                                         1234567890 + delta,
+                                         constant_time=False,
+                                         search_order=order)
+                with self.subTest(order=order, delta=delta):
+                    self.assertEqual(offset, expected)
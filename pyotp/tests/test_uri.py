@@ -0,0 +1,85 @@
+# Copyright (C) 2018 Elizabeth Myers. All rights reserved.
+# See the included LICENSE file for terms of distribution.
+
+from io import StringIO
+from unittest import TestCase
+
+from pyotp import uri
+from pyotp.constants import HashAlgorithm, OTPType
+
+
+class TestURI(TestCase):
+    secret = b"12345678901234567890"
+
+    def test_make(self):
+        """Ensure URIs are made in the Key Uri Format."""
+        s = uri.make_uri(self.secret, "alice@example.com", issuer="ACME Co")
+        self.assertEqual(s, "otpauth://totp/ACME%20Co:alice@example.com"
+                            "?secret=GEZDGNBVGY3TQOJQGEZDGNBVGY3TQOJQ"
+                            "&issuer=ACME%20Co")
+
+        s = uri.make_uri(b"\x00" * 10, "bob", OTPType.HOTP,
+                         hash_algorithm=HashAlgorithm.SHA256, length=8,
+                         counter=5)
+        self.assertEqual(s, "otpauth://hotp/bob?secret=AAAAAAAAAAAAAAAA"
+                            "&algorithm=SHA256&digits=8&counter=5")
+
+    def test_round_trip(self):
+        """Ensure made URIs parse back to the same values."""
+        records = [
+            uri.OTPAuthURI(OTPType.TOTP, "alice@example.com", "ACME Co",
+                           self.secret, HashAlgorithm.SHA1, 6, 30, None),
+            uri.OTPAuthURI(OTPType.TOTP, "a b&c=d%/?", None, b"\xff" * 7,
+                           HashAlgorithm.SHA512, 8, 60, None),
+            uri.OTPAuthURI(OTPType.HOTP, "carol", "X", b"\x01" * 16,
+                           HashAlgorithm.SHA256, 7, 30, 42),
+        ]
+        for record in records:
+            with self.subTest(record=record):
+                s = uri.format_uri(record)
+                self.assertEqual(uri.parse_uri(s), record)
+
+    def test_parse(self):
+        """Ensure URIs from other sources are parsed leniently."""
+        record = uri.parse_uri(
+            "OTPAUTH://TOTP/Example:%20alice?SECRET=gezdgnbvgy3tqojq"
+            "&algorithm=sha256&period=60\n")
+        self.assertEqual(record.issuer, "Example")
+        self.assertEqual(record.account, "alice")
+        self.assertEqual(record.secret, b"1234567890")
+        self.assertEqual(record.hash_algorithm, HashAlgorithm.SHA256)
+        self.assertEqual(record.grace_period, 60)
+
+    def test_parse_invalid(self):
+        """Ensure malformed URIs are rejected."""
+        for s in ("http://totp/a?secret=AAAAAAAA",
+                  "otpauth://totp",
+                  "otpauth://motp/a?secret=AAAAAAAA",
+                  "otpauth://totp/a",
+                  "otpauth://totp/a?secret=A1",
+                  "otpauth://totp/a?secret=AAAAAAAA&algorithm=MD5",
+                  "otpauth://totp/a?secret=AAAAAAAA&digits=9",
+                  "otpauth://totp/a?secret=AAAAAAAA&period=0",
+                  "otpauth://totp/a?secret=AAAAAAAA&period=-30",
+                  "otpauth://hotp/a?secret=AAAAAAAA"):
+            with self.subTest(uri=s):
+                with self.assertRaises(ValueError):
+                    uri.parse_uri(s)
+
+    def test_bulk(self):
+        """Ensure bulk parsing reports errors per line and writes back."""
+        lines = StringIO("otpauth://totp/a?secret=AAAAAAAA\n"
+                         "\n"
+                         "garbage\n"
+                         "otpauth://hotp/b?secret=AAAAAAAA&counter=1\n")
+        results = list(uri.parse_uris(lines))
+        self.assertEqual([n for n, _, _ in results], [1, 3, 4])
+        self.assertIsNone(results[1][1])
+        self.assertEqual(results[1][2], "not an otpauth:// URI")
+        self.assertEqual(list(uri.parse_uris([b"\xff"]))[0][2], "not ASCII")
+
+        out = StringIO()
+        records = [r for _, r, _ in results if r is not None]
+        self.assertEqual(uri.write_uris(out, records, batch_size=1), 2)
+        out.seek(0)
+        self.assertEqual([r for _, r, _ in uri.parse_uris(out)], records)
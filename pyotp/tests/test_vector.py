@@ -0,0 +1,56 @@
+# Copyright (C) 2018 Elizabeth Myers. All rights reserved.
+# See the included LICENSE file for terms of distribution.
+
+from unittest import TestCase, skipIf
+
+from pyotp import vector
+from pyotp.common import code_range
+from pyotp.constants import HashAlgorithm
+
+
+@skipIf(vector.numpy is None, "NumPy is not installed")
+class TestVector(TestCase):
+    # Test vectors taken from RFC 4226
+    secret = b"12345678901234567890"
+    codes = [755224, 287082, 359152, 969429, 338314, 254676, 287922, 162583,
+             399871, 520489]
+
+    def test_code_range(self):
+        """Ensure array codes match RFC 4226."""
+        codes = vector.code_range(self.secret, 6, HashAlgorithm.SHA1, 0, 9)
+        self.assertEqual(codes.dtype, vector.numpy.uint32)
+        self.assertEqual(codes.tolist(), self.codes)
+
+    def test_matches_python(self):
+        """Ensure array codes match the pure Python ones."""
+        for algorithm in HashAlgorithm:
+            for length in (6, 8):
+                expected = [int(c) for c in code_range(
+                    self.secret, length, algorithm, 1000, 1100)]
+                got = vector.code_range(self.secret, length, algorithm, 1000,
+                                        1100)
+                with self.subTest(algorithm=algorithm, length=length):
+                    self.assertEqual(got.tolist(), expected)
+
+    def test_codes_for_secrets(self):
+        """Ensure per-secret codes match the pure Python ones."""
+        secrets = [bytes([i]) * 20 for i in range(50)]
+        got = vector.codes_for_secrets(secrets, 12345, 6, HashAlgorithm.SHA1)
+        expected = [int(next(code_range(s, 6, HashAlgorithm.SHA1, 12345,
+                                        12345)))
+                    for s in secrets]
+        self.assertEqual(got.tolist(), expected)
+
+    def test_match(self):
+        """Ensure codes are found in arrays."""
+        codes = vector.code_range(self.secret, 6, HashAlgorithm.SHA1, 0, 9)
+        self.assertEqual(vector.match("287082", codes), 1)
+        self.assertEqual(vector.match(b"520489", codes), 9)
+        self.assertEqual(vector.match(287922, codes), 6)
+        self.assertIsNone(vector.match("000000", codes))
+        self.assertIsNone(vector.match("abc", codes))
+        self.assertEqual(vector.matches(287082, codes).sum(), 1)
+
+    def test_empty(self):
+        """Ensure empty input gives an empty array."""
+        self.assertEqual(len(vector.digests_to_codes([], 6)), 0)
@@ -0,0 +1,106 @@
+# Copyright (C) 2018 Elizabeth Myers. All rights reserved.
+# See the included LICENSE file for terms of distribution.
+
+
+"""Stores that limit how often a user may try a code.
+
+Every guess at a code costs a window of HMACs, so an attacker flooding
+guesses decides how much CPU is spent. A throttle store gives each key (a
+user or token) a bucket of attempts that refills at a steady rate. Pass a
+store and a key as the throttle and throttle_key arguments of
+pyotp.totp.check_totp or pyotp.hotp.check_hotp, and an attempt with an
+empty bucket is rejected before any code is computed. A successful check
+refills the bucket.
+"""
+
+
+from collections import OrderedDict
+from threading import Lock
+from time import monotonic
+
+
+class ThrottleStore:
+    """Base class for throttle stores."""
+
+    def acquire(self, key):
+        """Use up one attempt for key.
+
+        Returns True if the attempt is allowed, and False if key is out of
+        attempts.
+        """
+        raise NotImplementedError
+
+    def reset(self, key):
+        """Give key its full allowance of attempts again."""
+        raise NotImplementedError
+
+    def close(self):
+        """Release any resources held by the store."""
+
+
+class MemoryThrottleStore(ThrottleStore):
+    """A bounded in-memory token bucket store.
+
+    Each key may make burst attempts at once, after which it gets rate more
+    attempts per second, up to burst again. The default allows 5 attempts,
+    then one every 12 seconds.
+
+    Keys are spread over stripes, each with its own lock, so threads working
+    on different keys rarely contend. Each stripe holds at most
+    maxsize // stripes keys, dropping the least recently used ones.
+
+    Beware that a key dropped to stay within maxsize starts over with a full
+    bucket, so size the store for the number of keys seen within the time
+    it takes a bucket to refill.
+    """
+
+    def __init__(self, burst=5, rate=1/12, maxsize=1048576, stripes=64,
+                 clock=monotonic):
+        self.burst = burst
+        self.rate = rate
+        self.maxsize = maxsize
+        self.clock = clock
+        self.rejected = 0
+        self.evictions = 0
+        self._stripe_size = max(1, maxsize // stripes)
+        self._stripes = [(Lock(), OrderedDict()) for _ in range(stripes)]
+
+    def __len__(self):
+        return sum(len(records) for _, records in self._stripes)
+
+    def acquire(self, key):
+        lock, records = self._stripes[hash(key) % len(self._stripes)]
+        with lock:
+            now = self.clock()
+            record = records.get(key)
+            if record is None:
+                tokens = self.burst
+            else:
+                tokens, last = record
+                tokens = min(self.burst, tokens + (now - last) * self.rate)
+
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            else:
+                self.rejected += 1
+
+            records[key] = (tokens, now)
+            records.move_to_end(key)
+
+            while len(records) > self._stripe_size:
+                records.popitem(last=False)
+                self.evictions += 1
+
+            return allowed
+
+    def reset(self, key):
+        lock, records = self._stripes[hash(key) % len(self._stripes)]
+        with lock:
+            records.pop(key, None)
+
+    def clear(self):
+        """Forget all records."""
+        for lock, records in self._stripes:
+            with lock:
+                records.clear()
@@ -5,14 +5,49 @@
 """TOTP-related functions."""
 
 
-from time import time
+from time import time, perf_counter
 
-from pyotp.constants import HashAlgorithm
-from pyotp.common import get_code, check_range, check_range_constant
+from pyotp import common
+from pyotp.constants import HashAlgorithm, OTPType, SearchOrder
+from pyotp.common import (get_code, get_code_int, prekey, find_keyed,
+                          window_order)
+
+
+def totp_step(timestamp, grace_period):
+    # Convert a Unix timestamp (or None for now) into a TOTP time step
+    if timestamp is None:
+        timestamp = int(time())
+
+    # 64-bit timestamps only
+    timestamp &= 0xFFFFFFFFFFFFFFFF
+
+    return timestamp // grace_period
+
+
+def totp_window(timestamp, grace_period, below, above):
+    # Return the first, current, and last time steps to check for the given
+    # timestamp
+    if timestamp is None:
+        timestamp = int(time())
+
+    # 64-bit timestamps only
+    timestamp &= 0xFFFFFFFFFFFFFFFF
+
+    start = timestamp - below
+    end = timestamp + above
+
+    if start < 0:
+        start = 0
+
+    # Cap at 64 bits
+    end &= 0xFFFFFFFFFFFFFFFF
+
+    return (start // grace_period, timestamp // grace_period,
+            end // grace_period)
 
 
 def get_totp_code(secret, timestamp=None, length=6, grace_period=30,
-                  hash_algorithm=HashAlgorithm.SHA1):
+                  hash_algorithm=HashAlgorithm.SHA1, cache=None):
     """Get TOTP code of the given length using the given secret.
 
     If timestamp is None, the current system time will be used. Beware though:
@@ -24,21 +59,90 @@ def get_totp_code(secret, timestamp=None, length=6, grace_period=30,
 
     It is not recommended to use any algorithm but SHA1 unless you know what
     you are doing, due to interoperability concerns.
-    """
-    if timestamp is None:
-        timestamp = int(time())
 
-    # 64-bit timestamps only
-    timestamp &= 0xFFFFFFFFFFFFFFFF
+    If cache is a pyotp.cache.CodeCache, the code is taken from (or added to)
+    that cache.
+    """
+    timestamp = totp_step(timestamp, grace_period)
 
-    timestamp //= grace_period
+    if cache is not None:
+        code = cache.code_range(secret, length, hash_algorithm, timestamp,
+                                timestamp)[0]
+        return str(code).zfill(length)
 
     return get_code(secret, timestamp, length, hash_algorithm)
 
 
+def get_totp_code_int(secret, timestamp=None, length=6, grace_period=30,
+                      hash_algorithm=HashAlgorithm.SHA1):
+    """Same as get_totp_code, but return the code as an integer.
+
+    This skips formatting the code as a zero-padded string.
+    """
+    timestamp = totp_step(timestamp, grace_period)
+
+    return get_code_int(secret, timestamp, length, hash_algorithm)
+
+
+def match_totp(code, secret, timestamp=None, grace_period=30,
+               hash_algorithm=HashAlgorithm.SHA1, below=30, above=30,
+               constant_time=True, search_order=SearchOrder.LINEAR,
+               cache=None, replay=None, replay_key=None, throttle=None,
+               throttle_key=None):
+    """Find which time step the given TOTP code matches.
+
+    Returns the offset in time steps of the matching step from the step of the
+    given timestamp (0 for the current step, -1 for the previous one, etc.), or
+    None if the code doesn't match. Be careful to check the result against
+    None rather than for truthiness, as 0 is a match.
+
+    See check_totp for the other arguments.
+    """
+    if replay is not None and replay_key is None:
+        raise ValueError("replay_key is required with replay")
+    if throttle is not None:
+        if throttle_key is None:
+            raise ValueError("throttle_key is required with throttle")
+        if not throttle.acquire(throttle_key):
+            return None
+
+    stats = common._stats
+    if stats is not None:
+        started = perf_counter()
+
+    start, center, end = totp_window(timestamp, grace_period, below, above)
+    counters = window_order(start, end, center, search_order)
+
+    if cache is not None:
+        counter = cache.find(code, secret, hash_algorithm, counters,
+                             constant_time)
+    else:
+        counter = find_keyed(code, prekey(secret, hash_algorithm), counters,
+                             constant_time)
+
+    # The step can't be accepted again once the window has moved past it
+    replayed = (counter is not None and replay is not None and
+                not replay.reserve(replay_key, counter,
+                                   grace_period + below + above))
+
+    if stats is not None:
+        stats.record(OTPType.TOTP, code, counters, center, counter,
+                     constant_time, cache is not None, replayed, started)
+
+    if counter is None or replayed:
+        return None
+
+    if throttle is not None:
+        throttle.reset(throttle_key)
+
+    return counter - center
+
+
 def check_totp(code, secret, timestamp=None, grace_period=30,
                hash_algorithm=HashAlgorithm.SHA1, below=30, above=30,
-               constant_time=True):
+               constant_time=True, search_order=SearchOrder.LINEAR,
+               cache=None, replay=None, replay_key=None, throttle=None,
+               throttle_key=None):
     """Check if the given TOTP code matches the given timestamp.
 
     If timestamp is None, the current system time will be used. Beware though:
@@ -59,28 +163,33 @@ def check_totp(code, secret, timestamp=None, grace_period=30,
     at 10, it will check 490 and 510 as well. This is to account for client
     clock drift as well as "not being fast enough" to put in their code.
 
-    constant_time determines if a constant time string comparison is used, to
-    help mitigate timing attacks.
-    """
-    if timestamp is None:
-        timestamp = int(time())
+    constant_time determines if a constant time comparison is used, to help
+    mitigate timing attacks. In that mode the whole window is always computed
+    and compared, so the time taken doesn't show whether or where the code
+    matched; match_totp still reports which time step matched.
 
-    # 64-bit timestamps only
-    timestamp &= 0xFFFFFFFFFFFFFFFF
+    The code may be a str, or bytes, bytearray, or memoryview straight from a
+    request buffer. It is parsed once and compared as an integer.
 
-    start = timestamp - below
-    end = timestamp + above
+    search_order is a pyotp.constants.SearchOrder. With constant_time off,
+    checking stops at the first match, so SearchOrder.CENTER_OUT finds the
+    usual case of a current or nearly current code with fewer HMACs.
 
-    if start < 0:
-        start = 0
+    If cache is a pyotp.cache.CodeCache, codes already computed for this
+    secret in an overlapping window are reused rather than recomputed.
 
-    # Cap at 64 bits
-    end &= 0xFFFFFFFFFFFFFFFF
+    If replay is a pyotp.replay.ReplayStore, a matching code is only accepted
+    if its time step is newer than the last one accepted for replay_key, and
+    that step is then reserved, atomically. replay_key identifies the user or
+    token; don't use the secret for it.
 
-    start //= grace_period
-    end //= grace_period
+    If throttle is a pyotp.throttle.ThrottleStore, each check uses up one of
+    throttle_key's attempts, and is rejected without computing any codes if
+    it has none left. A successful check gives throttle_key its full
+    allowance back.
 
-    if constant_time:
-        return check_range_constant(code, secret, hash_algorithm, start, end)
-    else:
-        return check_range(code, secret, hash_algorithm, start, end)
+    Use match_totp to find out which time step matched.
+    """
+    return match_totp(code, secret, timestamp, grace_period, hash_algorithm,
+                      below, above, constant_time, search_order, cache,
+                      replay, replay_key, throttle, throttle_key) is not None
@@ -0,0 +1,210 @@
+# Copyright (C) 2018 Elizabeth Myers. All rights reserved.
+# See the included LICENSE file for terms of distribution.
+
+
+"""otpauth:// provisioning URIs, as used by Google Authenticator.
+
+A URI looks like this:
+
+    otpauth://totp/Example:alice?secret=JBSWY3DPEHPK3PXP&issuer=Example
+
+See https://github.com/google/google-authenticator/wiki/Key-Uri-Format.
+"""
+
+
+from collections import namedtuple
+from itertools import islice
+from urllib.parse import quote, unquote
+
+from pyotp.common import _digits_mod
+from pyotp.constants import HashAlgorithm, OTPType
+from pyotp.secret import decode_secret, encode_secret
+
+
+OTPAuthURI = namedtuple("OTPAuthURI", (
+    "otp_type",
+    "account",
+    "issuer",
+    "secret",
+    "hash_algorithm",
+    "length",
+    "grace_period",
+    "counter",
+))
+OTPAuthURI.__doc__ = """The contents of an otpauth:// URI.
+
+otp_type is an OTPType, secret is the raw secret bytes, hash_algorithm is a
+HashAlgorithm, length is the number of digits, and grace_period is the TOTP
+period in seconds. counter is the initial HOTP counter (None for TOTP), and
+issuer may be None.
+"""
+
+
+_SCHEME = "otpauth://"
+
+_algorithms = {algorithm.name: algorithm for algorithm in HashAlgorithm}
+
+
+def _unquote(s):
+    # unquote is comparatively slow; most fields don't need it
+    return unquote(s) if "%" in s else s
+
+
+def make_uri(secret, account, otp_type=OTPType.TOTP, issuer=None,
+             hash_algorithm=HashAlgorithm.SHA1, length=6, grace_period=30,
+             counter=0):
+    """Make an otpauth:// URI for the given raw secret.
+
+    account names the user (e.g. an email address), and issuer the service;
+    neither may contain a colon.
+    Parameters at their defaults are left out, as many apps only support the
+    defaults anyway; counter is always included for HOTP, as it is required.
+    """
+    label = quote(account, safe="@")
+    if issuer is not None:
+        label = quote(issuer, safe="@") + ":" + label
+
+    secret = encode_secret(secret).rstrip(b"=").decode("ascii")
+    parts = [_SCHEME, otp_type.value, "/", label, "?secret=", secret]
+
+    if issuer is not None:
+        parts.extend(("&issuer=", quote(issuer, safe="@")))
+    if hash_algorithm is not HashAlgorithm.SHA1:
+        parts.extend(("&algorithm=", hash_algorithm.name))
+    if length != 6:
+        parts.extend(("&digits=", str(length)))
+    if otp_type is OTPType.HOTP:
+        parts.extend(("&counter=", str(counter)))
+    elif grace_period != 30:
+        parts.extend(("&period=", str(grace_period)))
+
+    return "".join(parts)
+
+
+def format_uri(record):
+    """Make an otpauth:// URI from an OTPAuthURI."""
+    return make_uri(record.secret, record.account, record.otp_type,
+                    record.issuer, record.hash_algorithm, record.length,
+                    record.grace_period, record.counter)
+
+
+def _int_param(params, name, default, minimum):
+    value = params.get(name)
+    if value is None:
+        return default
+
+    if not value.isdigit():
+        raise ValueError("{} is not a number: {!r}".format(name, value))
+
+    value = int(value)
+    if value < minimum:
+        raise ValueError("{} is too small: {}".format(name, value))
+
+    return value
+
+
+def parse_uri(uri):
+    """Parse an otpauth:// URI into an OTPAuthURI.
+
+    The URI is split apart in a single pass with str.partition and str.split;
+    no regular expressions are used. Raises ValueError if it is malformed.
+    """
+    uri = uri.strip()
+    if uri[:len(_SCHEME)].lower() != _SCHEME:
+        raise ValueError("not an otpauth:// URI")
+
+    otp_type, sep, rest = uri[len(_SCHEME):].partition("/")
+    if not sep:
+        raise ValueError("missing label")
+
+    try:
+        otp_type = OTPType(otp_type.lower())
+    except ValueError:
+        raise ValueError("unknown OTP type: {!r}".format(otp_type)) from None
+
+    label, _, query = rest.partition("?")
+    label = _unquote(label)
+    issuer, sep, account = label.partition(":")
+    if sep:
+        account = account.lstrip()
+    else:
+        issuer, account = None, label
+
+    params = {}
+    for param in query.split("&"):
+        name, _, value = param.partition("=")
+        params[name.lower()] = _unquote(value)
+
+    secret = params.get("secret")
+    if not secret:
+        raise ValueError("missing secret")
+    try:
+        secret = decode_secret(secret)
+    except ValueError:
+        raise ValueError("secret is not valid base32") from None
+
+    issuer = params.get("issuer", issuer)
+
+    algorithm = params.get("algorithm", "SHA1")
+    hash_algorithm = _algorithms.get(algorithm.upper())
+    if hash_algorithm is None:
+        raise ValueError("unknown algorithm: {!r}".format(algorithm))
+
+    length = _int_param(params, "digits", 6, 1)
+    if length not in _digits_mod:
+        raise ValueError("digits out of range: {}".format(length))
+
+    grace_period = _int_param(params, "period", 30, 1)
+
+    if otp_type is OTPType.HOTP:
+        counter = _int_param(params, "counter", None, 0)
+        if counter is None:
+            raise ValueError("missing counter")
+    else:
+        counter = None
+
+    return OTPAuthURI(otp_type, account, issuer, secret, hash_algorithm,
+                      length, grace_period, counter)
+
+
+def parse_uris(lines):
+    """Parse an iterable of otpauth:// URIs, one per line.
+
+    This is a generator yielding (line number, record, error) for each
+    non-blank line, numbered from 1. record is an OTPAuthURI, or None if the
+    line couldn't be parsed, in which case error says why. Lines are handled
+    one at a time, so a file object of any size can be passed in.
+    """
+    for number, line in enumerate(lines, 1):
+        if isinstance(line, bytes):
+            try:
+                line = line.decode("ascii")
+            except UnicodeDecodeError:
+                yield number, None, "not ASCII"
+                continue
+
+        if not line.strip():
+            continue
+
+        try:
+            yield number, parse_uri(line), None
+        except ValueError as e:
+            yield number, None, str(e)
+
+
+def write_uris(fileobj, records, batch_size=4096):
+    """Write OTPAuthURI records to a text file, one URI per line.
+
+    Records are written batch_size at a time, so an iterable of any size can
+    be passed in. Returns the number of URIs written.
+    """
+    written = 0
+    records = iter(records)
+    while True:
+        batch = [format_uri(record) for record in islice(records, batch_size)]
+        if not batch:
+            return written
+
+        batch.append("")
+        fileobj.write("\n".join(batch))
+        written += len(batch) - 1
@@ -0,0 +1,129 @@
+# Copyright (C) 2018 Elizabeth Myers. All rights reserved.
+# See the included LICENSE file for terms of distribution.
+
+
+"""Array versions of OTP code generation and matching, for bulk jobs.
+
+This module needs NumPy (pip install pyotp[vector]). The HMACs are still
+computed one at a time; everything after that (dynamic truncation, masking,
+reduction to the code length, and comparison) is done on whole arrays.
+
+Codes are returned as numpy.uint32 arrays. Format one as a string with
+str(code).zfill(length).
+"""
+
+
+from hmac import new as new_hmac
+
+try:
+    from hmac import digest as hmac_digest
+except ImportError:
+    # hmac.digest is new in Python 3.7
+    def hmac_digest(key, msg, digest):
+        return new_hmac(key, msg, digest).digest()
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from pyotp.common import _digits_mod, prekey, parse_code
+
+
+def _require_numpy():
+    if numpy is None:
+        raise ImportError("pyotp.vector requires NumPy")
+
+
+def _counter_bytes(counters):
+    # 64-bit integers only, please!
+    return [(i & 0xFFFFFFFFFFFFFFFF).to_bytes(8, "big") for i in counters]
+
+
+def digests_to_codes(digests, length):
+    """Turn HMAC digests into integer OTP codes of the given length.
+
+    digests is either a sequence of digests of the same size, or a 2D uint8
+    array with one digest per row. Returns a uint32 array of codes.
+    """
+    _require_numpy()
+
+    if isinstance(digests, numpy.ndarray):
+        rows = digests
+    else:
+        digests = list(digests)
+        if not digests:
+            return numpy.zeros(0, dtype=numpy.uint32)
+        rows = numpy.frombuffer(b"".join(digests), dtype=numpy.uint8)
+        rows = rows.reshape(len(digests), -1)
+
+    # Dynamic truncation from RFC 4226
+    offsets = (rows[:, -1] & 0xf).astype(numpy.intp)
+    index = offsets[:, None] + numpy.arange(4)
+    words = numpy.take_along_axis(rows, index, axis=1).astype(numpy.uint32)
+
+    codes = ((words[:, 0] << 24) | (words[:, 1] << 16) | (words[:, 2] << 8) |
+             words[:, 3])
+    codes &= 0x7FFFFFFF
+    codes %= _digits_mod[length]
+
+    return codes
+
+
+def codes(secret, length, hash_algorithm, counters):
+    """Return a uint32 array of codes for the given counters."""
+    _require_numpy()
+
+    digest = prekey(secret, hash_algorithm)
+    return digests_to_codes([digest(c) for c in _counter_bytes(counters)],
+                            length)
+
+
+def code_range(secret, length, hash_algorithm, start, end):
+    """Return a uint32 array of codes from start to end inclusive."""
+    return codes(secret, length, hash_algorithm, range(start, end+1))
+
+
+def codes_for_secrets(secrets, counter, length, hash_algorithm):
+    """Return a uint32 array with the code of each secret at one counter.
+
+    For TOTP, the counter is the time step (see pyotp.totp.totp_step).
+    """
+    _require_numpy()
+
+    value = _counter_bytes((counter,))[0]
+    hash_name = hash_algorithm.value
+    digests = [hmac_digest(secret, value, hash_name) for secret in secrets]
+    return digests_to_codes(digests, length)
+
+
+def match(code, codes):
+    """Return the index of the first of codes equal to code, or None.
+
+    code may be an integer, or a str or bytes-like code as accepted by
+    pyotp.totp.check_totp.
+    """
+    _require_numpy()
+
+    if not isinstance(code, int):
+        parsed = parse_code(code)
+        if parsed is None:
+            return None
+        code = parsed[0]
+
+    found = numpy.flatnonzero(codes == code)
+    if not len(found):
+        return None
+
+    return int(found[0])
+
+
+def matches(code, codes):
+    """Return a boolean array marking which of codes equal code.
+
+    code may also be an array the same shape as codes, to compare a submitted
+    code per user against each user's current code.
+    """
+    _require_numpy()
+
+    return codes == code
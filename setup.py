@@ -35,6 +35,9 @@ setup(
     python_requires="~=3.4",
     keywords="hotp totp development",
     packages=find_packages(exclude=["docs"]),
+    extras_require={
+        "vector": ["numpy"],
+    },
     test_suite="nose.collector",
     tests_require=["nose"],
     project_urls={